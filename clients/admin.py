@@ -23,7 +23,7 @@ class ClientForm(forms.ModelForm):
 
         # Si c'est une modification, afficher le KVA détecté
         if self.instance and self.instance.pk:
-            kva = self.instance.extraire_kva()
+            kva = self.instance.kva
             if kva:
                 prix = self.instance.get_prix_intervention()
                 # Formater le prix en chaîne avec séparateurs de milliers
@@ -48,12 +48,13 @@ class ClientAdmin(admin.ModelAdmin):
 
     # Ajout de colonnes calculées dans la liste
     def get_kva_display(self, obj):
-        kva = obj.extraire_kva()
+        kva = obj.kva
         if kva:
             return format_html('<span style="color: green; font-weight: bold;">{} KVA</span>', kva)
         return format_html('<span style="color: red;">⚠ Aucun KVA</span>')
 
     get_kva_display.short_description = 'KVA'
+    get_kva_display.admin_order_field = 'kva'
 
     def get_prix_preview(self, obj):
         prix = obj.get_prix_intervention()
@@ -72,7 +73,7 @@ class ClientAdmin(admin.ModelAdmin):
         clients_erreur = []
 
         for client in queryset:
-            if client.contient_kva_valide():
+            if client.kva is not None:
                 clients_ok.append(client)
             else:
                 clients_erreur.append(client)
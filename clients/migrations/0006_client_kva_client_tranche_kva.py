@@ -0,0 +1,48 @@
+# Generated by Django 5.2.9 on 2026-10-17 20:33
+
+import re
+
+from django.db import migrations, models
+
+
+# Copies figées de utils.extraire_kva / determiner_tranche_kva à la date de la migration
+KVA = re.compile(r'(\d+)\s*KVA', re.IGNORECASE)
+PUISSANCES_KVA_SUIVIES = [3, 5, 8, 16, 24]
+KVA_MAX_STOCKABLE = 32767
+
+
+def remplir_kva(apps, schema_editor):
+    """Extrait une fois pour toutes le KVA des clients existants"""
+    Client = apps.get_model('clients', 'Client')
+
+    clients = []
+    for client in Client.objects.only('id', 'type_installation').iterator(chunk_size=1000):
+        match = KVA.search(client.type_installation or '')
+        kva = int(match.group(1)) if match else None
+        # Valeur hors de la plage du champ : non stockée
+        client.kva = kva if kva is not None and kva <= KVA_MAX_STOCKABLE else None
+        client.tranche_kva = f"{client.kva}KVA" if client.kva in PUISSANCES_KVA_SUIVIES else 'Autre'
+        clients.append(client)
+
+    Client.objects.bulk_update(clients, ['kva', 'tranche_kva'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_alter_fournisseur_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='kva',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, help_text="KVA extrait automatiquement du type d'installation", null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='tranche_kva',
+            field=models.CharField(db_index=True, default='Autre', editable=False, help_text='Tranche de puissance utilisée dans les statistiques', max_length=10),
+        ),
+        migrations.RunPython(remplir_kva, migrations.RunPython.noop),
+    ]
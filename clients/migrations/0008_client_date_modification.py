@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0007_recherche_trigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
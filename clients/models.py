@@ -1,6 +1,15 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-import re
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import extraire_kva, determiner_tranche_kva, TRANCHE_KVA_AUTRE
+from core.search import rechercher
+
+
+# Plus grande valeur d'un PositiveSmallIntegerField sur toutes les bases
+KVA_MAX_STOCKABLE = 32767
 
 
 class Fournisseur(models.Model):
@@ -21,6 +30,29 @@ class Fournisseur(models.Model):
         ordering = ['nom']
 
 
+class ClientQuerySet(models.QuerySet):
+
+    # Champs parcourus par la recherche de la liste des clients
+    CHAMPS_RECHERCHE = ('nom', 'email', 'telephone', 'adresse', 'type_installation', 'notes')
+
+    def rechercher(self, terme):
+        """Recherche textuelle (index trigram et tri par pertinence sur PostgreSQL)"""
+        return rechercher(self, terme, self.CHAMPS_RECHERCHE)
+
+    def realigner_tranches_kva(self):
+        """
+        Recalcule les tranches stockées avec determiner_tranche_kva (après un
+        changement de PUISSANCES_KVA_SUIVIES) : une requête par valeur de KVA.
+        Retourne le nombre de clients modifiés.
+        """
+        modifies = 0
+        for kva in list(self.order_by().values_list('kva', flat=True).distinct()):
+            clients = self.filter(kva__isnull=True) if kva is None else self.filter(kva=kva)
+            tranche = determiner_tranche_kva(kva)
+            modifies += clients.exclude(tranche_kva=tranche).update(tranche_kva=tranche)
+        return modifies
+
+
 class Client(models.Model):
     nom = models.CharField(max_length=100)
     adresse = models.TextField()
@@ -49,6 +81,40 @@ class Client(models.Model):
         help_text="Matériels spécifiques fournis par le fournisseur à ce client"
     )
 
+    # KVA extrait du type d'installation, stocké pour éviter de le recalculer à chaque accès
+    kva = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="KVA extrait automatiquement du type d'installation"
+    )
+    tranche_kva = models.CharField(
+        max_length=10,
+        default=TRANCHE_KVA_AUTRE,
+        editable=False,
+        db_index=True,
+        help_text="Tranche de puissance utilisée dans les statistiques"
+    )
+    # Invalide le cache HTTP du calendrier quand le nom du client change
+    date_modification = models.DateTimeField(auto_now=True)
+
+    objects = ClientQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.mettre_a_jour_kva()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'type_installation' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'kva', 'tranche_kva'}
+        super().save(*args, **kwargs)
+
+    def mettre_a_jour_kva(self):
+        """Recalcule les champs KVA stockés à partir du type d'installation."""
+        kva = self.extraire_kva()
+        # Valeur aberrante (rejetée par clean()) : non stockée plutôt qu'un dépassement en base
+        self.kva = kva if kva is not None and kva <= KVA_MAX_STOCKABLE else None
+        self.tranche_kva = determiner_tranche_kva(self.kva)
+
     def clean(self):
         """
         Validation personnalisée pour s'assurer que le type d'installation contient un KVA.
@@ -72,8 +138,9 @@ class Client(models.Model):
             })
 
         # Vérification que le KVA est dans une plage raisonnable
+        self.mettre_a_jour_kva()
         kva = self.extraire_kva()
-        if kva:
+        if kva is not None:
             if kva < 1:
                 raise ValidationError({
                     'type_installation': 'Le KVA doit être supérieur à 0.'
@@ -91,32 +158,20 @@ class Client(models.Model):
         """
         Extrait le nombre de KVA du type d'installation.
         Retourne None si aucun KVA valide n'est trouvé.
+        Préférer le champ `kva`, déjà calculé à l'enregistrement.
         """
-        if not self.type_installation:
-            return None
-
-        # Recherche d'un nombre suivi de "KVA" (insensible à la casse et aux espaces)
-        match = re.search(r'(\d+)\s*KVA', self.type_installation, re.IGNORECASE)
-
-        if match:
-            try:
-                kva = int(match.group(1))
-                return kva
-            except ValueError:
-                return None
-
-        return None
+        return extraire_kva(self.type_installation)
 
     def get_kva(self):
-        """Retourne le KVA extrait (méthode publique pour les templates)."""
-        return self.extraire_kva()
+        """Retourne le KVA stocké (méthode publique pour les templates)."""
+        return self.kva
 
     def get_prix_intervention(self):
         """
         Retourne le prix d'intervention basé sur le KVA.
         Utile pour prévisualiser le prix sans créer d'intervention.
         """
-        kva = self.extraire_kva()
+        kva = self.kva
         if not kva:
             return 0
 
@@ -133,9 +188,8 @@ class Client(models.Model):
             return 45000
 
     def __str__(self):
-        kva = self.extraire_kva()
-        if kva:
-            return f"{self.nom} ({kva}KVA)"
+        if self.kva:
+            return f"{self.nom} ({self.kva}KVA)"
         return f"{self.nom} ({self.type_installation})"
 
     class Meta:
@@ -1,3 +1,120 @@
+from importlib import import_module
+from unittest import skipUnless
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.http import QueryDict
 from django.test import TestCase
+from django.urls import reverse
+
+from core.pagination import PaginationCurseur
+from core.testing import creer_client
+
+from .models import Client
+
+
+class ClientKvaTests(TestCase):
+
+    def test_kva_et_tranche_stockes(self):
+        client = creer_client(type_installation='16KVA 20KWH')
+        client.refresh_from_db()
+        self.assertEqual((client.kva, client.tranche_kva), (16, '16KVA'))
+
+    def test_kva_non_suivi(self):
+        client = creer_client(type_installation='6KVA')
+        self.assertEqual((client.kva, client.tranche_kva), (6, 'Autre'))
+
+    def test_kva_hors_plage_non_stocke(self):
+        """Un KVA qui dépasserait le PositiveSmallIntegerField est stocké NULL"""
+        client = creer_client(type_installation='99999KVA')
+        client.refresh_from_db()
+        self.assertEqual((client.kva, client.tranche_kva), (None, 'Autre'))
+
+    def test_clean_refuse_kva_hors_plage(self):
+        for type_installation in ('150KVA', '99999KVA'):
+            client = Client(type_installation=type_installation)
+            with self.assertRaises(ValidationError):
+                client.clean()
+
+    def test_migration_remplir_kva(self):
+        migration = import_module('clients.migrations.0006_client_kva_client_tranche_kva')
+        ids = [
+            creer_client(i, type_installation).pk
+            for i, type_installation in enumerate(('3 kva', '99999KVA', 'sans puissance'))
+        ]
+        Client.objects.update(kva=None, tranche_kva='')
+
+        migration.remplir_kva(apps, None)
+
+        self.assertEqual(
+            list(Client.objects.filter(pk__in=ids).order_by('pk').values_list('kva', 'tranche_kva')),
+            [(3, '3KVA'), (None, 'Autre'), (None, 'Autre')]
+        )
+
+    def test_realigner_tranches_kva(self):
+        client = creer_client(type_installation='8KVA')
+        Client.objects.filter(pk=client.pk).update(tranche_kva='Autre')
+
+        self.assertEqual(Client.objects.realigner_tranches_kva(), 1)
+        self.assertEqual(Client.objects.realigner_tranches_kva(), 0)
+        client.refresh_from_db()
+        self.assertEqual(client.tranche_kva, '8KVA')
+
+
+class ClientRechercheTests(TestCase):
+
+    def setUp(self):
+        self.diallo = creer_client(1, nom='Awa Diallo')
+        self.ndiaye = creer_client(2, nom='Moussa Ndiaye', notes='Voisin de Mme Diallo')
+
+    def test_filtre_insensible_a_la_casse(self):
+        self.assertEqual(set(Client.objects.rechercher('DIALLO')), {self.diallo, self.ndiaye})
+        self.assertEqual(list(Client.objects.rechercher('770000002')), [self.ndiaye])
+
+    def test_terme_vide(self):
+        self.assertEqual(Client.objects.rechercher('  ').count(), 2)
+
+    @skipUnless(connection.vendor != 'postgresql', "Repli des bases sans pg_trgm")
+    def test_sans_tri_par_pertinence_hors_postgresql(self):
+        resultats = Client.objects.order_by('-nom').rechercher('diallo')
+
+        self.assertEqual(list(resultats), [self.ndiaye, self.diallo])
+        self.assertNotIn('pertinence', resultats.query.annotations)
+
+    @skipUnless(connection.vendor == 'postgresql', "Similarité trigramme (PostgreSQL)")
+    def test_tri_par_pertinence(self):
+        """Le nom qui correspond passe avant la simple mention dans les notes"""
+        self.assertEqual(list(Client.objects.order_by('-nom').rechercher('diallo')), [self.diallo, self.ndiaye])
+
+    @skipUnless(connection.vendor == 'postgresql', "Similarité trigramme (PostgreSQL)")
+    def test_pagination_des_resultats_classes(self):
+        """Pertinences égales : chaque client apparaît une seule fois en parcourant les pages"""
+        for i in range(3, 15):
+            creer_client(i, nom=f'Diallo {i}')
+        resultats = Client.objects.order_by('-id').rechercher('diallo')
+
+        vus, parametres = [], ''
+        while True:
+            page = PaginationCurseur(resultats, 4).page(QueryDict(parametres))
+            vus.extend(client.pk for client in page)
+            if not page.has_next():
+                break
+            parametres = page.parametres_suivant
+
+        self.assertEqual(vus, list(resultats.values_list('pk', flat=True)))
+
+
+class ClientListeTests(TestCase):
+
+    def test_numeros_de_page(self):
+        for i in range(25):
+            creer_client(i)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.sn', 'x'))
+
+        premiere = self.client.get(reverse('client_list'))
+        seconde = self.client.get(f"{reverse('client_list')}?{premiere.context['clients'].parametres_suivant}")
 
-# Create your tests here.
+        self.assertEqual((seconde.context['clients'].number, seconde.context['nombre_pages']), (2, 3))
+        self.assertContains(seconde, '<span class="page-link">2</span>', html=False)
@@ -1,8 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
+from core.pagination import PaginationCurseur
 from .models import Client, Fournisseur
 from .forms import ClientForm, FournisseurForm, ClientSearchForm
 from django.http import JsonResponse
@@ -83,25 +82,20 @@ def client_list(request):
     if search_form.is_valid():
         search_query = search_form.cleaned_data.get('search')
         if search_query:
-            clients = clients.filter(
-                Q(nom__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(telephone__icontains=search_query) |
-                Q(adresse__icontains=search_query) |
-                Q(type_installation__icontains=search_query) |
-                Q(notes__icontains=search_query)
-            )
+            clients = clients.rechercher(search_query)
 
-    # Pagination
-    paginator = Paginator(clients, 10)  # 10 clients par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur : 10 clients par page, sans OFFSET
+    paginator = PaginationCurseur(clients, 10)
+    page_obj = paginator.page(request.GET)
+    total_clients, total_estime = paginator.compte_estime()
 
     context = {
         'page_title': 'Gestion des Clients',
         'clients': page_obj,
         'search_form': search_form,
-        'total_clients': clients.count(),
+        'total_clients': total_clients,
+        'total_estime': total_estime,
+        'nombre_pages': paginator.nombre_pages(),
     }
 
     return render(request, 'clients/client_list.html', context)
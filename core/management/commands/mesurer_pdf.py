@@ -0,0 +1,60 @@
+import io
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from core.pdf_theme import IMAGES, _chemins_candidats, theme_pdf
+from interventions.pdf_service import InterventionPDFService
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Image, SimpleDocTemplate
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps de génération des PDF avec le thème partagé (styles et images préparés une fois)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repetitions', type=int, default=5, help='Nombre de mesures (défaut: 5, médiane affichée)')
+
+    def handle(self, *args, **options):
+        self.repetitions = max(1, options['repetitions'])
+
+        # Construction du thème hors mesure
+        theme = theme_pdf()
+
+        contenu = {
+            'version': 0, 'id': 1, 'date': '01/01/2025',
+            'general': [['Statut:', 'Terminée']] * 6,
+            'personnes': [['Client:', 'Client test']] * 8,
+            'details': [['Notes', 'Onduleur remplacé. ' * 20]],
+            'url': 'http://example.com/interventions/1/',
+        }
+        self._afficher("Rapport d'intervention", self._mediane(lambda: InterventionPDFService.generer(contenu)))
+
+        fichiers, (largeur, hauteur) = IMAGES['logo']
+        chemin = next((c for c in _chemins_candidats(fichiers) if os.path.exists(c)), None)
+        if chemin is None:
+            self.stdout.write(self.style.WARNING("Logo absent de static/images : comparaison ignorée"))
+            return
+
+        def document(logo):
+            SimpleDocTemplate(io.BytesIO(), pagesize=A4).build([logo])
+
+        self._afficher(
+            "Logo pleine résolution",
+            self._mediane(lambda: document(Image(chemin, width=largeur, height=hauteur)))
+        )
+        self._afficher("Logo du thème", self._mediane(lambda: document(theme.image('logo'))))
+
+    def _mediane(self, fonction):
+        durees = []
+        for _ in range(self.repetitions):
+            debut = time.perf_counter()
+            fonction()
+            durees.append(time.perf_counter() - debut)
+        return statistics.median(durees)
+
+    def _afficher(self, libelle, duree):
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {libelle} : {duree * 1000:.0f} ms par document (médiane de {self.repetitions})"
+        ))
@@ -0,0 +1,268 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+class PageCurseur:
+    """Page d'une PaginationCurseur (même usage que Page dans les templates)"""
+
+    def __init__(self, object_list, number, has_previous, has_next, parametres_precedent, parametres_suivant,
+                 parametres_premier='', parametres_dernier=''):
+        self.object_list = object_list
+        self.number = number
+        self._has_previous = has_previous
+        self._has_next = has_next
+        # Query strings (sans « ? ») des pages voisines et des extrémités, filtres conservés
+        self.parametres_precedent = parametres_precedent
+        self.parametres_suivant = parametres_suivant
+        self.parametres_premier = parametres_premier
+        self.parametres_dernier = parametres_dernier
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+
+class PaginationCurseur:
+    """
+    Pagination par curseur (keyset) : la page suivante est lue avec
+    « WHERE (clé) < (dernière clé affichée) ORDER BY clé LIMIT n » au lieu
+    d'un OFFSET, et sans COUNT(*). Le coût d'une page ne dépend donc pas de
+    sa profondeur.
+
+    Les clés sont l'ordre du queryset (ou le Meta.ordering du modèle),
+    complété par la clé primaire pour départager les égalités. Les champs
+    de tri ne doivent pas être NULL, et les annotations de tri doivent avoir
+    une valeur exacte (entier, pas de flottant) pour être comparées au curseur.
+
+    Le numéro de page voyage dans le curseur ; le nombre de pages vient de
+    compte_estime() (approché sur les grandes tables PostgreSQL).
+    """
+
+    PARAMETRE = 'curseur'
+    SALT = 'core.pagination'
+
+    def __init__(self, queryset, par_page=10):
+        self.par_page = par_page
+        self.cles = self._cles_de_tri(queryset)
+        self.queryset = queryset.order_by(*self.cles)
+        self._compte = None
+
+    @staticmethod
+    def _cles_de_tri(queryset):
+        ordre = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(cle, str) and cle.lstrip('-') for cle in ordre):
+            raise ValueError("La pagination par curseur exige un tri sur des noms de champs")
+
+        champs = [cle.lstrip('-') for cle in ordre]
+        pk = queryset.model._meta.pk.name
+        if 'pk' not in champs and pk not in champs:
+            sens = '-' if ordre and ordre[-1].startswith('-') else ''
+            ordre.append(f'{sens}pk')
+        return ordre
+
+    # ==================== CURSEURS ====================
+
+    def _champ(self, chemin):
+        """Champ du modèle désigné par `chemin` (None pour une annotation)"""
+        modele = self.queryset.model
+        champ = None
+        for nom in chemin.split('__'):
+            try:
+                champ = modele._meta.pk if nom == 'pk' else modele._meta.get_field(nom)
+            except FieldDoesNotExist:
+                return None
+            modele = champ.related_model or modele
+        return champ
+
+    def _valeurs(self, objet):
+        valeurs = []
+        for cle in self.cles:
+            valeur = objet
+            for nom in cle.lstrip('-').split('__'):
+                valeur = getattr(valeur, nom)
+            if isinstance(valeur, (date, datetime)):
+                valeur = valeur.isoformat()
+            elif isinstance(valeur, Decimal):
+                valeur = str(valeur)
+            valeurs.append(valeur)
+        return valeurs
+
+    def _encoder(self, objet, sens, numero):
+        """Curseur vers la page `numero`, après (« s ») ou avant (« p ») l'objet ; « d » pour la dernière page"""
+        valeurs = self._valeurs(objet) if objet is not None else []
+        return signing.dumps({'v': valeurs, 's': sens, 'n': numero}, salt=self.SALT)
+
+    def _decoder(self, curseur):
+        """(valeurs, sens, numéro) du curseur, ou None s'il est absent, altéré ou d'un autre tri"""
+        if not curseur:
+            return None
+        try:
+            donnees = signing.loads(curseur, salt=self.SALT)
+        except signing.BadSignature:
+            return None
+
+        numero = donnees.get('n')
+        if not isinstance(numero, int) or numero < 1:
+            return None
+        if donnees.get('s') == 'd':
+            return [], 'd', numero
+
+        valeurs = donnees.get('v')
+        if not isinstance(valeurs, list) or len(valeurs) != len(self.cles) or donnees.get('s') not in ('s', 'p'):
+            return None
+
+        converties = []
+        for cle, valeur in zip(self.cles, valeurs):
+            champ = self._champ(cle.lstrip('-'))
+            if isinstance(valeur, str) and champ is not None:
+                if champ.get_internal_type() == 'DateTimeField':
+                    valeur = parse_datetime(valeur)
+                elif champ.get_internal_type() == 'DateField':
+                    valeur = parse_date(valeur)
+                elif champ.get_internal_type() == 'DecimalField':
+                    valeur = Decimal(valeur)
+            converties.append(valeur)
+        return converties, donnees['s'], numero
+
+    def _apres(self, valeurs, inverse=False):
+        """Q des lignes situées après `valeurs` dans l'ordre de tri (avant si inverse)"""
+        conditions = []
+        for i, cle in enumerate(self.cles):
+            champ = cle.lstrip('-')
+            descendant = cle.startswith('-') != inverse
+            egalites = {c.lstrip('-'): v for c, v in zip(self.cles[:i], valeurs[:i])}
+            comparaison = {f"{champ}__{'lt' if descendant else 'gt'}": valeurs[i]}
+            conditions.append(Q(**egalites, **comparaison))
+        return reduce(or_, conditions)
+
+    # ==================== PAGES ====================
+
+    def _parametres(self, parametres, curseur):
+        parametres = parametres.copy()
+        parametres.pop('page', None)
+        if curseur:
+            parametres[self.PARAMETRE] = curseur
+        else:
+            parametres.pop(self.PARAMETRE, None)
+        return parametres.urlencode()
+
+    def page(self, parametres):
+        """Page désignée par le curseur des paramètres GET (première page par défaut)"""
+        position = self._decoder(parametres.get(self.PARAMETRE))
+
+        if position is None:
+            numero = 1
+            lignes = list(self.queryset[:self.par_page + 1])
+            has_previous, has_next = False, len(lignes) > self.par_page
+            lignes = lignes[:self.par_page]
+        else:
+            valeurs, sens, numero = position
+            if sens == 's':
+                lignes = list(self.queryset.filter(self._apres(valeurs))[:self.par_page + 1])
+                has_previous, has_next = True, len(lignes) > self.par_page
+                lignes = lignes[:self.par_page]
+            else:
+                # Page précédente (ou dernière) : lecture à rebours puis remise dans l'ordre
+                taille = self.par_page
+                if sens == 'd':
+                    a_rebours = self.queryset
+                    compte, estime = self.compte_estime()
+                    if not estime:
+                        # Mêmes lignes qu'en arrivant sur la dernière page par « Suivant »
+                        taille = compte % self.par_page or self.par_page
+                else:
+                    a_rebours = self.queryset.filter(self._apres(valeurs, inverse=True))
+                lignes = list(a_rebours.reverse()[:taille + 1])
+                has_previous, has_next = len(lignes) > taille, sens != 'd'
+                lignes = lignes[:taille][::-1]
+            if not has_previous:
+                # Lignes supprimées ou ajoutées depuis : c'est en fait la première page
+                numero = 1
+
+        if not lignes:
+            if position is not None:
+                # Curseur périmé (lignes supprimées entre-temps) : retour au début
+                parametres = parametres.copy()
+                parametres.pop(self.PARAMETRE)
+                return self.page(parametres)
+            return PageCurseur([], 1, False, False, '', '')
+
+        return PageCurseur(
+            lignes,
+            numero,
+            has_previous,
+            has_next,
+            self._parametres(parametres, self._encoder(lignes[0], 'p', max(1, numero - 1))) if has_previous else '',
+            self._parametres(parametres, self._encoder(lignes[-1], 's', numero + 1)) if has_next else '',
+            self._parametres(parametres, '') if has_previous else '',
+            self._parametres(parametres, self._encoder(None, 'd', self.nombre_pages())) if has_next else '',
+        )
+
+    def nombre_pages(self):
+        """Nombre de pages d'après compte_estime() (approché quand le compte l'est)"""
+        compte, _ = self.compte_estime()
+        return max(1, -(-compte // self.par_page))
+
+    # ==================== COMPTAGE ====================
+
+    # En dessous de ce nombre estimé de lignes, un COUNT(*) exact reste bon marché
+    SEUIL_COMPTE_EXACT = 1000
+
+    def compte_estime(self):
+        """
+        Nombre de lignes du queryset et indicateur « estimé ».
+
+        Sur PostgreSQL, le nombre vient des statistiques du planificateur
+        (pg_class.reltuples sans filtre, estimation d'EXPLAIN sinon) ; un
+        COUNT(*) exact n'est fait que sous SEUIL_COMPTE_EXACT.
+        """
+        if self._compte is not None:
+            return self._compte
+
+        queryset = self.queryset.order_by()
+        connexion = connections[queryset.db]
+
+        estimation = None
+        if connexion.vendor == 'postgresql':
+            if not queryset.query.where:
+                with connexion.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                        [queryset.model._meta.db_table]
+                    )
+                    ligne = cursor.fetchone()
+                    estimation = ligne[0] if ligne and ligne[0] >= 0 else None
+            else:
+                plan = json.loads(queryset.explain(format='json'))
+                if isinstance(plan, list):
+                    plan = plan[0]
+                estimation = plan['Plan']['Plan Rows']
+
+        if estimation is None or estimation < self.SEUIL_COMPTE_EXACT:
+            self._compte = queryset.count(), False
+        else:
+            self._compte = int(estimation), True
+        return self._compte
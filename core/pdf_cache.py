@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+
+def empreinte(contenu):
+    """Empreinte (sha256) d'un dictionnaire de contenu sérialisable en JSON"""
+    return hashlib.sha256(
+        json.dumps(contenu, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+class CachePDF:
+    """
+    Cache de PDF sous MEDIA_ROOT/<dossier>/<pk>/<empreinte>.pdf.
+
+    Le fichier d'un objet est nommé par l'empreinte du contenu imprimé : tant
+    que ce contenu ne change pas, le PDF existant est servi tel quel. Les
+    versions périmées ne sont pas supprimées à l'écriture (un téléchargement
+    peut être en cours) : invalider() les retire à la modification de l'objet,
+    purger() retire périodiquement celles qui ne servent plus.
+    """
+
+    # Un PDF ni lu ni écrit depuis ce délai est supprimé par purger() (il sera régénéré au besoin)
+    CONSERVATION = timedelta(days=7)
+
+    def __init__(self, dossier):
+        self.dossier_relatif = dossier
+
+    def dossier(self, pk):
+        return os.path.join(settings.MEDIA_ROOT, self.dossier_relatif, str(pk))
+
+    def chemin(self, pk, contenu):
+        return os.path.join(self.dossier(pk), f"{empreinte(contenu)}.pdf")
+
+    @staticmethod
+    def ecrire(chemin, pdf):
+        """Enregistre le PDF (bytes)"""
+        dossier = os.path.dirname(chemin)
+        os.makedirs(dossier, exist_ok=True)
+
+        # Écriture atomique : un téléchargement concurrent ne lit jamais un fichier partiel
+        descripteur, temporaire = tempfile.mkstemp(dir=dossier, suffix='.tmp')
+        try:
+            with os.fdopen(descripteur, 'wb') as fichier:
+                fichier.write(pdf)
+            os.replace(temporaire, chemin)
+        except BaseException:
+            os.unlink(temporaire)
+            raise
+
+    def obtenir(self, pk, contenu, generer):
+        """Chemin du PDF à jour, generer(contenu) n'étant appelé que si le contenu a changé"""
+        chemin = self.chemin(pk, contenu)
+        if not os.path.exists(chemin):
+            self.ecrire(chemin, generer(contenu))
+        return chemin
+
+    def ouvrir(self, pk, contenu, generer):
+        """
+        Fichier ouvert du PDF à jour. Un fichier ouvert reste lisible même s'il
+        est supprimé ensuite ; s'il l'est entre obtenir() et l'ouverture
+        (invalider() concurrent), il est simplement régénéré.
+        """
+        try:
+            return open(self.obtenir(pk, contenu, generer), 'rb')
+        except FileNotFoundError:
+            return open(self.obtenir(pk, contenu, generer), 'rb')
+
+    def invalider(self, pk):
+        """Supprime les PDF en cache de l'objet"""
+        shutil.rmtree(self.dossier(pk), ignore_errors=True)
+
+    def purger(self, conservation=None):
+        """
+        Supprime les PDF ni lus ni écrits depuis `conservation` (CONSERVATION par
+        défaut) : versions remplacées par un nouveau contenu, objets supprimés.
+        Retourne le nombre de fichiers supprimés.
+        """
+        limite = time.time() - (conservation or self.CONSERVATION).total_seconds()
+        racine = os.path.join(settings.MEDIA_ROOT, self.dossier_relatif)
+        supprimes = 0
+
+        for dossier, _, fichiers in os.walk(racine, topdown=False):
+            for nom in fichiers:
+                chemin = os.path.join(dossier, nom)
+                try:
+                    etat = os.stat(chemin)
+                    # atime : dernière lecture (approximative avec relatime, absente avec noatime)
+                    if max(etat.st_atime, etat.st_mtime) < limite:
+                        os.unlink(chemin)
+                        supprimes += 1
+                except FileNotFoundError:
+                    pass
+            if dossier != racine:
+                try:
+                    os.rmdir(dossier)  # Seulement s'il est vide
+                except OSError:
+                    pass
+        return supprimes
+
+    def reponse(self, pk, contenu, generer, nom_fichier):
+        """
+        Réponse de téléchargement du PDF à jour. Avec PDF_SENDFILE_HEADER,
+        l'envoi du fichier est délégué au serveur web (X-Sendfile / X-Accel-Redirect).
+        """
+        entete = getattr(settings, 'PDF_SENDFILE_HEADER', '')
+        if not entete:
+            return FileResponse(self.ouvrir(pk, contenu, generer), as_attachment=True, filename=nom_fichier,
+                                content_type='application/pdf')
+
+        chemin = self.obtenir(pk, contenu, generer)
+
+        response = HttpResponse(content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+        if entete == 'X-Accel-Redirect':
+            # nginx : URL interne correspondant à MEDIA_ROOT
+            relatif = os.path.relpath(chemin, settings.MEDIA_ROOT).replace(os.sep, '/')
+            response[entete] = settings.PDF_SENDFILE_URL + relatif
+        else:
+            response[entete] = chemin
+        return response
@@ -0,0 +1,216 @@
+import io
+import os
+import threading
+from types import MappingProxyType
+
+from django.conf import settings
+from PIL import Image as PILImage
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Image, TableStyle
+
+
+# Résolution des images embarquées : au-delà, l'impression n'y gagne rien
+# et chaque document paie l'encodage des pixels en trop
+DPI_IMAGES = 200
+
+
+class ThemePDF:
+    """
+    Styles, styles de tableaux et images partagés par les documents PDF
+    (rapports d'intervention, rapports mensuels...).
+
+    Construit une seule fois par processus (theme_pdf()) puis partagé entre
+    requêtes et threads, sans copie à l'accès. Seuls l'objet et ses
+    dictionnaires sont en lecture seule : les ParagraphStyle et TableStyle
+    qu'ils contiennent restent des objets ReportLab modifiables, et une
+    modification s'appliquerait à tous les documents suivants du processus.
+    Ne jamais les modifier (ni attribut, ni TableStyle.add) : dériver un
+    nouveau style, ParagraphStyle('Nom', parent=styles['body'], ...) ou
+    TableStyle(commandes, parent=tableaux['cle_valeur']).
+    """
+
+    __slots__ = ('styles', 'tableaux', 'images')
+
+    def __init__(self, styles, tableaux, images):
+        object.__setattr__(self, 'styles', MappingProxyType(styles))
+        object.__setattr__(self, 'tableaux', MappingProxyType(tableaux))
+        # nom -> (données encodées, largeur, hauteur en points)
+        object.__setattr__(self, 'images', MappingProxyType(images))
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError("ThemePDF est immuable")
+
+    def image(self, nom):
+        """Nouveau flowable pour l'image `nom` (à sa taille prévue), None si absente"""
+        if nom not in self.images:
+            return None
+        donnees, largeur, hauteur = self.images[nom]
+        return Image(io.BytesIO(donnees), width=largeur, height=hauteur)
+
+
+# Images du thème : fichiers candidats (static/images) et taille d'affichage en points
+IMAGES = {
+    'logo': (('solar_logo.png',), (2.5 * inch, 1 * inch)),
+    'signature': (('signature.png', 'signature_admin.png'), (1.5 * inch, 1.5 * inch)),
+}
+
+
+def _chemins_candidats(fichiers):
+    dossiers = [os.path.join(settings.BASE_DIR, 'static', 'images')]
+    if settings.STATIC_ROOT:
+        dossiers.append(os.path.join(settings.STATIC_ROOT, 'images'))
+    for fichier in fichiers:
+        for dossier in dossiers:
+            yield os.path.join(dossier, fichier)
+
+
+def _preparer_image(chemin, largeur, hauteur):
+    """
+    Décode l'image une fois, la ramène à sa taille d'affichage (DPI_IMAGES) et
+    la réencode : JPEG si elle est opaque (intégré tel quel dans le PDF), PNG sinon.
+    """
+    with PILImage.open(chemin) as source:
+        source.load()
+        taille = (round(largeur / inch * DPI_IMAGES), round(hauteur / inch * DPI_IMAGES))
+        trop_grande = source.width > taille[0] or source.height > taille[1]
+        image = source.resize(taille, PILImage.LANCZOS) if trop_grande else source.copy()
+
+    donnees = io.BytesIO()
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image.save(donnees, format='PNG', optimize=True)
+    else:
+        image.convert('RGB').save(donnees, format='JPEG', quality=90)
+    return donnees.getvalue()
+
+
+def _construire_images():
+    images = {}
+    for nom, (fichiers, (largeur, hauteur)) in IMAGES.items():
+        chemin = next((c for c in _chemins_candidats(fichiers) if os.path.exists(c)), None)
+        if chemin is None:
+            continue
+        try:
+            images[nom] = (_preparer_image(chemin, largeur, hauteur), largeur, hauteur)
+        except OSError:
+            # Image illisible : le document utilise son texte de secours
+            continue
+    return images
+
+
+def _construire_styles():
+    base = getSampleStyleSheet()
+    return {
+        'normal': base['Normal'],
+
+        # Style personnalisé pour le titre principal
+        'main_title': ParagraphStyle(
+            'MainTitle',
+            parent=base['Title'],
+            fontSize=24,
+            spaceAfter=5,
+            textColor=colors.HexColor('#2c3e50'),
+            alignment=1
+        ),
+        'main_subtitle': ParagraphStyle(
+            'SubTitle',
+            parent=base['Normal'],
+            fontSize=12,
+            textColor=colors.HexColor('#6c757d'),
+            alignment=1,
+            spaceAfter=15
+        ),
+
+        # Style pour le titre du document
+        'report_title': ParagraphStyle(
+            'ReportTitle',
+            parent=base['Heading1'],
+            fontSize=18,
+            spaceAfter=15,
+            textColor=colors.HexColor('#2c3e50'),
+            alignment=1
+        ),
+
+        # Style pour les sous-titres
+        'subtitle': ParagraphStyle(
+            'Subtitle',
+            parent=base['Heading2'],
+            fontSize=14,
+            spaceAfter=10,
+            spaceBefore=20,
+            textColor=colors.HexColor('#2FD1FA'),
+            fontName='Helvetica-Bold'
+        ),
+
+        'body': ParagraphStyle(
+            'BodyText',
+            parent=base['Normal'],
+            leftIndent=15,
+            spaceAfter=10
+        ),
+        'signature_line': ParagraphStyle('SignatureLine', parent=base['Normal'], fontSize=12, alignment=2),
+        'signature': ParagraphStyle(
+            'Signature',
+            parent=base['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#2c3e50'),
+            alignment=2,
+            spaceBefore=2
+        ),
+        'date': ParagraphStyle(
+            'Date',
+            parent=base['Italic'],
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=2
+        ),
+        'small': ParagraphStyle('Small', parent=base['Normal'], fontSize=8),
+    }
+
+
+def _construire_tableaux():
+    return {
+        # Tableaux libellé / valeur
+        'cle_valeur': TableStyle([
+            # Colonne gauche (labels) - fond gris clair, texte en gras
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#212529')),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (0, -1), 10),
+
+            # Colonne droite (valeurs) - fond blanc
+            ('BACKGROUND', (1, 0), (1, -1), colors.white),
+            ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#212529')),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (1, 0), (1, -1), 10),
+
+            # Bordures
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
+        ]),
+        'aligne_droite': TableStyle([
+            ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
+        ]),
+        'image_texte': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ]),
+    }
+
+
+_theme = None
+_verrou = threading.Lock()
+
+
+def theme_pdf():
+    """Thème partagé, construit au premier appel"""
+    global _theme
+    if _theme is None:
+        with _verrou:
+            if _theme is None:
+                _theme = ThemePDF(_construire_styles(), _construire_tableaux(), _construire_images())
+    return _theme
@@ -0,0 +1,53 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import IntegerField, Q
+from django.db.models.functions import Cast, Greatest, Round
+
+
+# Pertinence exprimée en millièmes de similarité trigramme
+ECHELLE_PERTINENCE = 1000
+
+
+def filtre_recherche(terme, champs):
+    """Q « le terme est contenu dans un des champs » (insensible à la casse)"""
+    return reduce(or_, (Q(**{f"{champ}__icontains": terme}) for champ in champs))
+
+
+def rechercher(queryset, terme, champs):
+    """
+    Recherche `terme` dans les `champs` du queryset.
+
+    Sur PostgreSQL, les icontains sont servis par les index GIN pg_trgm
+    (créés par les migrations *_recherche_trigram) et les résultats sont triés par
+    pertinence (similarité trigramme). Les autres bases (SQLite en
+    développement) gardent le même filtre, sans tri par pertinence.
+    """
+    terme = (terme or '').strip()
+    if not terme:
+        return queryset
+
+    return trier_par_pertinence(queryset.filter(filtre_recherche(terme, champs)), terme, champs)
+
+
+def trier_par_pertinence(queryset, terme, champs):
+    """
+    Trie le queryset par similarité trigramme décroissante entre `terme` et
+    les `champs` (relations comprises), l'ordre existant départageant les
+    égalités. Sans effet hors PostgreSQL.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset
+
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # GREATEST ignore les NULL (relations facultatives absentes)
+    similarites = [TrigramWordSimilarity(terme, champ) for champ in champs]
+    similarite = Greatest(*similarites) if len(similarites) > 1 else similarites[0]
+
+    # En millièmes entiers : le curseur de pagination compare des valeurs exactes,
+    # un réel (float4) relu puis renvoyé en paramètre ne serait plus égal à lui-même
+    pertinence = Cast(Round(similarite * ECHELLE_PERTINENCE), IntegerField())
+
+    return queryset.annotate(pertinence=pertinence).order_by('-pertinence', *queryset.query.order_by)
@@ -0,0 +1,39 @@
+"""Fabriques d'objets partagées par les tests des applications"""
+from datetime import date
+
+from django.utils import timezone
+
+from clients.models import Client
+from interventions.models import Intervention
+from techniciens.models import Technicien
+
+
+def creer_client(numero=0, type_installation='5KVA', **kwargs):
+    """Client valide ; `numero` rend le téléphone et l'email uniques"""
+    valeurs = {
+        'nom': f'Client {numero}',
+        'adresse': 'Dakar',
+        'telephone': f'77000000{numero}',
+        'email': f'client{numero}@test.sn',
+        'date_installation': date(2024, 1, 1),
+        'type_installation': type_installation,
+    }
+    valeurs.update(kwargs)
+    return Client.objects.create(**valeurs)
+
+
+def creer_technicien(numero=0, **kwargs):
+    valeurs = {
+        'nom': f'Technicien {numero}',
+        'telephone': f'78000000{numero}',
+        'email': f'technicien{numero}@test.sn',
+    }
+    valeurs.update(kwargs)
+    return Technicien.objects.create(**valeurs)
+
+
+def creer_intervention(client=None, **kwargs):
+    """Intervention d'entretien datée de maintenant (client créé au besoin)"""
+    valeurs = {'date_intervention': timezone.now(), 'type_intervention': 'entretien'}
+    valeurs.update(kwargs)
+    return Intervention.objects.create(client=client or creer_client(), **valeurs)
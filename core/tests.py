@@ -1,3 +1,220 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from unittest import mock
+from urllib.parse import parse_qs
 
-# Create your tests here.
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from interventions.models import Intervention
+from .pagination import PaginationCurseur
+from .testing import creer_client
+from .pdf_cache import CachePDF
+from .pdf_theme import DPI_IMAGES, _construire_images, theme_pdf
+from PIL import Image as PILImage
+from reportlab.lib.units import inch
+
+
+class PaginationCurseurTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        client = creer_client()
+        # Dates en double : l'ordre (-date, -pk) doit départager sans perdre de ligne
+        Intervention.objects.bulk_create([
+            Intervention(
+                client=client, type_intervention='entretien',
+                date_intervention=timezone.make_aware(datetime(2025, 1, 1 + i // 3))
+            )
+            for i in range(23)
+        ])
+        cls.ordre = list(Intervention.objects.order_by('-date_intervention', '-pk').values_list('pk', flat=True))
+
+    def page(self, parametres=''):
+        pagination = PaginationCurseur(Intervention.objects.all(), 5)
+        return pagination, pagination.page(QueryDict(parametres, mutable=True))
+
+    def test_parcours_avant_puis_arriere(self):
+        pages = [self.page()[1]]
+        while pages[-1].has_next():
+            pages.append(self.page(pages[-1].parametres_suivant)[1])
+
+        self.assertEqual([i.pk for page in pages for i in page], self.ordre)
+        self.assertEqual([page.number for page in pages], [1, 2, 3, 4, 5])
+
+        retour = [pages[-1]]
+        while retour[-1].has_previous():
+            retour.append(self.page(retour[-1].parametres_precedent)[1])
+        self.assertEqual([i.pk for page in reversed(retour) for i in page], self.ordre)
+        self.assertEqual(retour[-1].number, 1)
+
+    def test_derniere_page(self):
+        pagination, premiere = self.page('statut=prevue&search=')
+        self.assertEqual(pagination.nombre_pages(), 5)
+
+        # 23 lignes : la page 5 n'en a que 3, qu'on y arrive par « Dernier » ou par « Suivant »
+        derniere = self.page(premiere.parametres_dernier)[1]
+        self.assertEqual([i.pk for i in derniere], self.ordre[20:])
+        self.assertEqual((derniere.number, derniere.has_next()), (5, False))
+        self.assertEqual([i.pk for i in self.page(derniere.parametres_precedent)[1]], self.ordre[15:20])
+
+    def test_filtres_conserves_et_premiere_page(self):
+        premiere = self.page('statut=en_cours&page=3')[1]
+        seconde = self.page(premiere.parametres_suivant)[1]
+
+        parametres = parse_qs(premiere.parametres_suivant)
+        self.assertEqual(parametres['statut'], ['en_cours'])
+        self.assertNotIn('page', parametres)
+        self.assertEqual(parse_qs(seconde.parametres_premier), {'statut': ['en_cours']})
+
+    def test_curseur_altere(self):
+        page = self.page('curseur=abc')[1]
+
+        self.assertEqual(page.number, 1)
+        self.assertEqual([i.pk for i in page], self.ordre[:5])
+
+
+class CachePDFTests(SimpleTestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        reglages = override_settings(MEDIA_ROOT=media.name, PDF_SENDFILE_HEADER='')
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.cache = CachePDF('pdf_cache/test')
+        self.generations = 0
+
+    def generer(self, contenu):
+        self.generations += 1
+        return f"%PDF {contenu['texte']}".encode()
+
+    def test_contenu_inchange_servi_depuis_le_cache(self):
+        chemin = self.cache.obtenir(1, {'texte': 'a'}, self.generer)
+
+        self.assertEqual(self.cache.obtenir(1, {'texte': 'a'}, self.generer), chemin)
+        self.assertEqual(self.generations, 1)
+
+    def test_ancienne_version_conservee_a_l_ecriture(self):
+        """Un téléchargement de l'ancienne version peut être en cours"""
+        ancien = self.cache.obtenir(1, {'texte': 'a'}, self.generer)
+        nouveau = self.cache.obtenir(1, {'texte': 'b'}, self.generer)
+
+        self.assertNotEqual(ancien, nouveau)
+        self.assertTrue(os.path.exists(ancien))
+
+    def test_fichier_supprime_avant_ouverture(self):
+        """invalider() entre obtenir() et l'ouverture : le PDF est régénéré au lieu d'une erreur 500"""
+        obtenir = self.cache.obtenir
+
+        def obtenir_puis_invalider(pk, contenu, generer):
+            chemin = obtenir(pk, contenu, generer)
+            if self.generations == 1:
+                self.cache.invalider(pk)
+            return chemin
+        self.cache.obtenir = obtenir_puis_invalider
+
+        reponse = self.cache.reponse(1, {'texte': 'a'}, self.generer, 'test.pdf')
+
+        self.assertEqual(b''.join(reponse.streaming_content), b'%PDF a')
+        self.assertEqual(self.generations, 2)
+
+    def test_purge_des_fichiers_inutilises(self):
+        ancien = self.cache.obtenir(1, {'texte': 'a'}, self.generer)
+        recent = self.cache.obtenir(2, {'texte': 'b'}, self.generer)
+        il_y_a = time.time() - CachePDF.CONSERVATION.total_seconds() - 60
+        os.utime(ancien, (il_y_a, il_y_a))
+
+        self.assertEqual(self.cache.purger(), 1)
+        self.assertFalse(os.path.exists(self.cache.dossier(1)))
+        self.assertTrue(os.path.exists(recent))
+
+
+class ThemePDFTests(SimpleTestCase):
+
+    def setUp(self):
+        self.theme = theme_pdf()
+
+    def test_partage_par_le_processus(self):
+        self.assertIs(theme_pdf(), self.theme)
+
+    def test_construit_une_seule_fois(self):
+        """Premier appel concurrent : un seul thème construit, le même pour tous les threads"""
+        themes = []
+        with mock.patch('core.pdf_theme._theme', None), \
+                mock.patch('core.pdf_theme._construire_images', wraps=_construire_images) as construire:
+            fils = [threading.Thread(target=lambda: themes.append(theme_pdf())) for _ in range(4)]
+            for fil in fils:
+                fil.start()
+            for fil in fils:
+                fil.join()
+
+        self.assertEqual(construire.call_count, 1)
+        self.assertEqual(len({id(theme) for theme in themes}), 1)
+
+    def test_generation_reutilise_le_theme(self):
+        from interventions.pdf_service import InterventionPDFService
+
+        with mock.patch('core.pdf_theme.ThemePDF') as construire:
+            InterventionPDFService.generer(contenu_intervention())
+            InterventionPDFService.generer(contenu_intervention())
+
+        construire.assert_not_called()
+
+    def test_lecture_seule(self):
+        for dictionnaire in (self.theme.styles, self.theme.tableaux, self.theme.images):
+            self.assertIsInstance(dictionnaire, MappingProxyType)
+        with self.assertRaises(AttributeError):
+            self.theme.styles = {}
+        with self.assertRaises(TypeError):
+            self.theme.styles['body'] = None
+        with self.assertRaises(TypeError):
+            self.theme.tableaux['cle_valeur'] = None
+        with self.assertRaises(TypeError):
+            self.theme.images['logo'] = None
+        with self.assertRaises(TypeError):
+            del self.theme.styles['body']
+
+    def test_logo_ramene_a_sa_taille_d_affichage(self):
+        if 'logo' not in self.theme.images:
+            self.skipTest("Logo absent de static/images")
+        donnees, largeur, hauteur = self.theme.images['logo']
+
+        with PILImage.open(io.BytesIO(donnees)) as image:
+            self.assertLessEqual(image.width, round(largeur / inch * DPI_IMAGES))
+            self.assertLessEqual(image.height, round(hauteur / inch * DPI_IMAGES))
+
+    def test_generation_ne_modifie_pas_les_styles_partages(self):
+        """Contrat de ThemePDF : les documents dérivent les styles sans modifier ceux du thème"""
+        from interventions.pdf_service import InterventionPDFService
+
+        styles = {nom: dict(vars(style)) for nom, style in self.theme.styles.items()}
+        commandes = {nom: list(style.getCommands()) for nom, style in self.theme.tableaux.items()}
+
+        InterventionPDFService.generer(contenu_intervention())
+
+        self.assertEqual({nom: dict(vars(style)) for nom, style in self.theme.styles.items()}, styles)
+        self.assertEqual({nom: list(style.getCommands()) for nom, style in self.theme.tableaux.items()}, commandes)
+
+    def test_image_nouveau_flowable_a_chaque_appel(self):
+        if 'logo' not in self.theme.images:
+            self.skipTest("Logo absent de static/images")
+        self.assertIsNot(self.theme.image('logo'), self.theme.image('logo'))
+        self.assertIsNone(self.theme.image('inexistante'))
+
+
+def contenu_intervention():
+    return {
+        'version': 0, 'id': 1, 'date': '01/01/2025',
+        'general': [['Statut:', 'Terminée']] * 6,
+        'personnes': [['Client:', 'Client test']] * 8,
+        'details': [['Notes', 'Onduleur remplacé. ' * 20]],
+        'url': 'http://example.com/interventions/1/',
+    }
@@ -1,3 +1,44 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import creer_client, creer_intervention
+from interventions.models import Intervention
+
+
+class AdminDashboardTests(TestCase):
+
+    def setUp(self):
+        client = creer_client()
+        for statut in ('terminee', 'terminee', 'en_cours', 'prevue', 'annulee'):
+            creer_intervention(client, statut=statut)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.sn', 'x'))
+
+    def test_compteurs_identiques_aux_comptes_par_statut(self):
+        compteurs = Intervention.objects.compteurs()
+
+        for statut in ('en_cours', 'terminee', 'annulee', 'prevue'):
+            self.assertEqual(compteurs[statut], Intervention.objects.filter(statut=statut).count())
+        self.assertEqual(compteurs['total'], 5)
+        self.assertEqual(
+            compteurs['revenus_termines'],
+            sum(Intervention.objects.filter(statut='terminee').values_list('prix_intervention', flat=True))
+        )
+
+    def test_compteurs_sans_intervention(self):
+        compteurs = Intervention.objects.none().compteurs()
+        self.assertEqual((compteurs['total'], compteurs['revenus_total']), (0, 0))
+
+    def test_une_requete_pour_tous_les_compteurs(self):
+        with self.assertNumQueries(1):
+            Intervention.objects.compteurs()
+
+    def test_tableau_de_bord(self):
+        reponse = self.client.get(reverse('dashboard'))
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(
+            [reponse.context[cle] for cle in ('total_interventions', 'interventions_terminees',
+                                              'interventions_en_cours', 'interventions_prevues')],
+            [5, 2, 1, 1]
+        )
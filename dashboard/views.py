@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, Q
+from django.db.models import Q
 from datetime import datetime, timedelta
 from django.contrib import messages
 
@@ -31,22 +31,8 @@ def admin_dashboard(request):
     # Toutes les interventions (tous statuts)
     toutes_interventions = Intervention.objects.all()
 
-    # Statistiques globales
-    total_interventions = toutes_interventions.count()
-    interventions_en_cours = toutes_interventions.filter(statut='en_cours').count()
-    interventions_terminees = toutes_interventions.filter(statut='terminee').count()
-    interventions_annulees = toutes_interventions.filter(statut='annulee').count()
-    interventions_prevues = toutes_interventions.filter(statut='prevue').count()
-
-    # Revenus totaux (terminées seulement)
-    revenus_totaux = toutes_interventions.filter(statut='terminee').aggregate(
-        total=Sum('prix_intervention')
-    )['total'] or 0
-
-    # TOTAL de TOUTES les interventions (tous statuts) - NOUVEAU
-    total_toutes_interventions = toutes_interventions.aggregate(
-        total=Sum('prix_intervention')
-    )['total'] or 0
+    # Statistiques globales et revenus (terminées / tous statuts) en une requête
+    compteurs = toutes_interventions.compteurs()
 
     # Autres statistiques
     total_clients = Client.objects.count()
@@ -73,13 +59,13 @@ def admin_dashboard(request):
         'page_title': 'Tableau de Bord Administrateur',
         'total_clients': total_clients,
         'total_techniciens': total_techniciens,
-        'total_interventions': total_interventions,
-        'revenus_totaux': revenus_totaux,
-        'total_toutes_interventions': total_toutes_interventions,  # NOUVEAU
-        'interventions_en_cours': interventions_en_cours,
-        'interventions_terminees': interventions_terminees,
-        'interventions_annulees': interventions_annulees,
-        'interventions_prevues': interventions_prevues,
+        'total_interventions': compteurs['total'],
+        'revenus_totaux': compteurs['revenus_termines'],
+        'total_toutes_interventions': compteurs['revenus_total'],  # NOUVEAU
+        'interventions_en_cours': compteurs['en_cours'],
+        'interventions_terminees': compteurs['terminee'],
+        'interventions_annulees': compteurs['annulee'],
+        'interventions_prevues': compteurs['prevue'],
         'prochaines_interventions': prochaines_interventions,
         'interventions_recentes': interventions_recentes,
         'aujourdhui': aujourdhui,  # NOUVEAU - pour vérifier les retards
@@ -98,11 +84,7 @@ def technicien_dashboard(request, technicien):
     ).select_related('client').order_by('-date_intervention')
 
     # Statistiques pour CE technicien uniquement
-    interventions_total = interventions_assignees.count()
-    interventions_en_cours = interventions_assignees.filter(statut='en_cours').count()
-    interventions_terminees = interventions_assignees.filter(statut='terminee').count()
-    interventions_annulees = interventions_assignees.filter(statut='annulee').count()
-    interventions_prevues = interventions_assignees.filter(statut='prevue').count()
+    compteurs = interventions_assignees.compteurs()
 
     # Date d'aujourd'hui pour les comparaisons
     aujourdhui = datetime.now().date()
@@ -125,11 +107,11 @@ def technicien_dashboard(request, technicien):
         'title': 'Mon Espace Technicien',
         'page_title': 'Mon Espace Technicien',
         'technicien': technicien,
-        'interventions_total': interventions_total,
-        'interventions_en_cours': interventions_en_cours,
-        'interventions_terminees': interventions_terminees,
-        'interventions_annulees': interventions_annulees,
-        'interventions_prevues': interventions_prevues,
+        'interventions_total': compteurs['total'],
+        'interventions_en_cours': compteurs['en_cours'],
+        'interventions_terminees': compteurs['terminee'],
+        'interventions_annulees': compteurs['annulee'],
+        'interventions_prevues': compteurs['prevue'],
         'prochaines_interventions': prochaines_interventions,
         'interventions_en_retard': interventions_en_retard,
         'aujourdhui': aujourdhui,  # NOUVEAU
@@ -1,5 +1,20 @@
 from django.contrib import admin
-from .models import Intervention
+from django.shortcuts import redirect
+from django.utils import timezone
+from .models import EmailSortant, ExportPDF, Intervention, InterventionStatusEvent
+from .pdf_service import InterventionPDFService
+
+
+class InterventionStatusEventInline(admin.TabularInline):
+    """Historique des statuts, en lecture seule"""
+    model = InterventionStatusEvent
+    fields = ('timestamp', 'action', 'ancien_statut', 'nouveau_statut', 'duree', 'note')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Intervention)
@@ -23,11 +38,60 @@ class InterventionAdmin(admin.ModelAdmin):
     ]
 
     readonly_fields = ('prix_intervention',)
+    inlines = [InterventionStatusEventInline]
+
+    # Changements de statut en masse (suivi du temps conservé, voir InterventionQuerySet.transition)
+    actions = ['marquer_terminees', 'marquer_en_cours', 'marquer_prevues', 'marquer_annulees',
+               'exporter_pdf_zip', 'exporter_pdf_fusionne']
+
+    def _transition(self, request, queryset, statut):
+        nombre = queryset.transition(statut)
+        libelle = dict(Intervention.STATUT_CHOICES)[statut]
+        self.message_user(request, f"{nombre} intervention(s) passée(s) au statut « {libelle} ».")
+
+    def marquer_terminees(self, request, queryset):
+        self._transition(request, queryset, 'terminee')
+
+    marquer_terminees.short_description = "Passer au statut Terminée"
+
+    def marquer_en_cours(self, request, queryset):
+        self._transition(request, queryset, 'en_cours')
+
+    marquer_en_cours.short_description = "Passer au statut En cours"
+
+    def marquer_prevues(self, request, queryset):
+        self._transition(request, queryset, 'prevue')
+
+    marquer_prevues.short_description = "Passer au statut Prévue"
+
+    def marquer_annulees(self, request, queryset):
+        self._transition(request, queryset, 'annulee')
+
+    marquer_annulees.short_description = "Passer au statut Annulée"
+
+    # Export PDF en lot : mis en file pour le worker `traiter_exports_pdf` (voir InterventionPDFService.traiter)
+    def _exporter_pdf(self, request, queryset, format):
+        export = InterventionPDFService.mettre_en_file(queryset, format, request.user)
+        self.message_user(
+            request, f"Export de {len(export.interventions)} rapport(s) mis en file : le lien de "
+                     f"téléchargement apparaîtra sur cette page une fois le fichier prêt."
+        )
+        return redirect('interventions:export_pdf', pk=export.pk)
+
+    def exporter_pdf_zip(self, request, queryset):
+        return self._exporter_pdf(request, queryset, 'zip')
+
+    exporter_pdf_zip.short_description = "Exporter les rapports PDF (zip)"
+
+    def exporter_pdf_fusionne(self, request, queryset):
+        return self._exporter_pdf(request, queryset, 'pdf')
+
+    exporter_pdf_fusionne.short_description = "Exporter les rapports PDF (un seul fichier)"
 
     def get_client_kva(self, obj):
         """Affiche le KVA du client dans la liste des interventions."""
         if obj.client:
-            kva = obj.client.extraire_kva()
+            kva = obj.client.kva
             if kva:
                 return f"{kva}KVA"
         return "N/A"
@@ -36,7 +100,7 @@ class InterventionAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         # Validation: le client doit avoir un KVA valide
-        if obj.client and not obj.client.contient_kva_valide():
+        if obj.client and obj.client.kva is None:
             from django.core.exceptions import ValidationError
             raise ValidationError(
                 f"Le client '{obj.client.nom}' n'a pas de KVA valide dans son type d'installation: '{obj.client.type_installation}'. "
@@ -49,7 +113,7 @@ class InterventionAdmin(admin.ModelAdmin):
 
         # Règle 2 : Calcul automatique du prix basé sur le KVA du client et le type d'intervention
         if obj.client and not obj.prix_intervention:
-            kva = obj.client.extraire_kva()
+            kva = obj.client.kva
             if kva:
                 # Utiliser la nouvelle fonction de calcul
                 from utils import calculer_prix_par_kva_et_type
@@ -58,4 +122,28 @@ class InterventionAdmin(admin.ModelAdmin):
                 # Ce cas ne devrait pas arriver grâce à la validation
                 obj.prix_intervention = 0
 
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+@admin.register(EmailSortant)
+class EmailSortantAdmin(admin.ModelAdmin):
+    list_display = ('id', 'sujet', 'statut', 'tentatives', 'prochaine_tentative', 'date_creation', 'date_envoi')
+    list_filter = ('statut',)
+    search_fields = ('sujet',)
+    readonly_fields = ('intervention', 'tentatives', 'erreur', 'date_creation', 'date_envoi')
+    actions = ['renvoyer']
+
+    def renvoyer(self, request, queryset):
+        """Remet les emails sélectionnés dans la file, avec un nouveau crédit de tentatives"""
+        nombre = queryset.exclude(statut='envoye').update(
+            statut='en_attente', tentatives=0, prochaine_tentative=timezone.now(), erreur=''
+        )
+        self.message_user(request, f"{nombre} email(s) remis dans la file d'envoi.")
+
+    renvoyer.short_description = "Remettre dans la file d'envoi"
+
+
+@admin.register(ExportPDF)
+class ExportPDFAdmin(admin.ModelAdmin):
+    list_display = ('id', 'format', 'statut', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('statut', 'format')
+    readonly_fields = ('interventions', 'fichier', 'tentatives', 'created_at', 'started_at', 'finished_at')
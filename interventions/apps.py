@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InterventionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'interventions'
+
+    def ready(self):
+        # Brancher les traces de suppression du calendrier et l'invalidation des PDF
+        from . import signals
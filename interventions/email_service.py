@@ -1,34 +1,178 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import get_template
 from django.conf import settings
+from django.contrib.sites.models import Site
 from django.utils import timezone
 from datetime import timedelta
+import html as html_entites
+import re
+
+from .models import EmailSortant, Intervention
+
+
+# Blocs sans texte lisible (en-tête, feuilles de style) et balises restantes
+_BLOCS_INVISIBLES = re.compile(r'<(head|style|script)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_BALISES = re.compile(r'<[^>]*>')
+_LIGNES_VIDES = re.compile(r'\n{3,}')
+
+
+def texte_brut(html):
+    """
+    Version texte d'un email HTML, en un seul passage : les styles et l'en-tête
+    sont retirés (strip_tags les conservait dans le texte), puis les balises.
+    """
+    texte = html_entites.unescape(_BALISES.sub('', _BLOCS_INVISIBLES.sub('', html)))
+    lignes = (ligne.strip() for ligne in texte.splitlines())
+    return _LIGNES_VIDES.sub('\n\n', '\n'.join(lignes)).strip()
+
+
+class FileEmailsService:
+    """Boîte d'envoi : les vues y déposent les emails, `envoyer_emails` les envoie par lots"""
+
+    # Un message réservé par un worker arrêté en cours d'envoi redevient disponible après ce délai
+    DUREE_RESERVATION = timedelta(minutes=10)
+
+    @staticmethod
+    def preparer(sujet, message, destinataires, intervention=None):
+        """EmailSortant non enregistré ; `message` est le couple (HTML, texte) d'un rendu"""
+        html, texte = message
+        return EmailSortant(
+            sujet=sujet,
+            corps_texte=texte,
+            corps_html=html,
+            expediteur=settings.DEFAULT_FROM_EMAIL,
+            destinataires=list(destinataires),
+            intervention=intervention,
+        )
+
+    @staticmethod
+    def mettre_en_file(sujet, message, destinataires, intervention=None):
+        """Enregistre l'email ; aucune connexion SMTP n'est ouverte ici"""
+        email = FileEmailsService.preparer(sujet, message, destinataires, intervention)
+        email.save()
+        return email
+
+    @staticmethod
+    def reserver_lot(taille=50):
+        """
+        Réserve les plus anciens emails à envoyer (plusieurs workers peuvent
+        tourner en parallèle). La réservation compte comme une tentative.
+        """
+        maintenant = timezone.now()
+        with transaction.atomic():
+            emails = list(EmailSortant.objects.select_for_update(skip_locked=True).filter(
+                statut='en_attente',
+                prochaine_tentative__lte=maintenant
+            ).order_by('prochaine_tentative', 'pk')[:taille])
+
+            if emails:
+                EmailSortant.objects.filter(pk__in=[email.pk for email in emails]).update(
+                    tentatives=F('tentatives') + 1,
+                    prochaine_tentative=maintenant + FileEmailsService.DUREE_RESERVATION
+                )
+        for email in emails:
+            email.tentatives += 1
+        return emails
+
+    @staticmethod
+    def envoyer_lot(emails):
+        """
+        Envoie les emails réservés sur une seule connexion SMTP et enregistre le
+        statut de chacun. Renvoie le nombre d'emails envoyés et en échec.
+        """
+        envoyes, echecs = [], []
+        connexion = get_connection(fail_silently=False)
+        restants = list(emails)
+
+        try:
+            connexion.open()
+            while restants:
+                email = restants.pop(0)
+                try:
+                    if not connexion.send_messages([email.message(connexion)]):
+                        raise RuntimeError("Message refusé par le serveur d'envoi")
+                except Exception as e:
+                    echecs.append((email, e))
+                    # La connexion est peut-être rompue : la rouvrir pour la suite du lot
+                    connexion.close()
+                    if restants:
+                        connexion.open()
+                else:
+                    envoyes.append(email)
+        except Exception as e:
+            # Serveur injoignable : le reste du lot sera retenté plus tard
+            echecs.extend((email, e) for email in restants)
+        finally:
+            connexion.close()
+
+        if envoyes:
+            EmailSortant.objects.filter(pk__in=[email.pk for email in envoyes]).update(
+                statut='envoye', date_envoi=timezone.now(), erreur=''
+            )
+        for email, erreur in echecs:
+            FileEmailsService._echec(email, erreur)
+
+        return len(envoyes), len(echecs)
+
+    @staticmethod
+    def _echec(email, erreur):
+        """Planifie la tentative suivante (délai doublé à chaque échec) ou abandonne le message"""
+        email.erreur = f"{type(erreur).__name__}: {erreur}"
+        if email.tentatives >= EmailSortant.MAX_TENTATIVES:
+            email.statut = 'echec'
+        else:
+            email.prochaine_tentative = timezone.now() + EmailSortant.delai_apres(email.tentatives)
+        email.save(update_fields=['erreur', 'statut', 'prochaine_tentative'])
+
+    @staticmethod
+    def purger():
+        """Supprime les emails envoyés depuis plus de EmailSortant.RETENTION"""
+        return EmailSortant.objects.filter(
+            statut='envoye',
+            date_envoi__lt=timezone.now() - EmailSortant.RETENTION
+        ).delete()[0]
 
 
 class InterventionEmailService:
 
+    # Templates compilés, gardés par processus (hors DEBUG, où ils sont relus à chaque modification)
+    _templates = {}
+
+    @staticmethod
+    def _template(nom):
+        if settings.DEBUG:
+            return get_template(nom)
+        template = InterventionEmailService._templates.get(nom)
+        if template is None:
+            template = InterventionEmailService._templates[nom] = get_template(nom)
+        return template
+
+    @staticmethod
+    def rendre(nom, context):
+        """Rendu HTML de l'email et sa version texte, calculée une seule fois pour ce rendu"""
+        html = InterventionEmailService._template(nom).render(context)
+        return html, texte_brut(html)
+
     @staticmethod
     def get_base_context(intervention, request=None):
         """Retourne le contexte de base pour tous les emails"""
-        # Utiliser l'importation locale pour éviter les problèmes de circular import
-        try:
-            from django.contrib.sites.models import Site
-            site = Site.objects.get_current()
-            domain = site.domain
-        except:
-            # Fallback si le site n'est pas configuré
-            domain = 'localhost:8000'
-
         # Déterminer le protocole
         if request and request.is_secure():
             protocol = 'https://'
         else:
             protocol = 'http://'
 
+        # Site courant (SITE_ID), mis en cache par Django après la première lecture
+        try:
+            domaine = Site.objects.get_current().domain
+        except Site.DoesNotExist:
+            domaine = 'localhost:8000'
+
         return {
             'intervention': intervention,
-            'domain': domain,
+            'domain': domaine,
             'protocol': protocol,
             'support_email': 'support@solar-maintenance.com',
             'support_phone': '+221 77 123 45 67',
@@ -45,30 +189,16 @@ class InterventionEmailService:
 
         # Email au technicien
         sujet_tech = f"[Solar Maintenance] Nouvelle intervention programmée - #{intervention.id}"
-        message_tech = render_to_string('interventions/emails/nouvelle_intervention_tech.html', context)
+        message_tech = InterventionEmailService.rendre('interventions/emails/nouvelle_intervention_tech.html', context)
 
         # Email au client
         if intervention.client and intervention.client.email:
             sujet_client = f"[Solar Maintenance] Votre intervention #{intervention.id} est programmée"
-            message_client = render_to_string('interventions/emails/nouvelle_intervention_client.html', context)
-
-            send_mail(
-                sujet_client,
-                strip_tags(message_client),
-                settings.DEFAULT_FROM_EMAIL,
-                [intervention.client.email],
-                html_message=message_client,
-                fail_silently=True
-            )
+            message_client = InterventionEmailService.rendre('interventions/emails/nouvelle_intervention_client.html', context)
 
-        send_mail(
-            sujet_tech,
-            strip_tags(message_tech),
-            settings.DEFAULT_FROM_EMAIL,
-            [intervention.technicien.email],
-            html_message=message_tech,
-            fail_silently=True
-        )
+            FileEmailsService.mettre_en_file(sujet_client, message_client, [intervention.client.email], intervention)
+
+        FileEmailsService.mettre_en_file(sujet_tech, message_tech, [intervention.technicien.email], intervention)
 
     @staticmethod
     def envoyer_notification_statut(intervention, ancien_statut, request=None):
@@ -82,53 +212,58 @@ class InterventionEmailService:
             context['ancien_statut_display'] = statut_dict.get(ancien_statut, ancien_statut)
 
             sujet = f"[Solar Maintenance] Mise à jour intervention #{intervention.id} - {intervention.get_statut_display()}"
-            message = render_to_string('interventions/emails/changement_statut.html', context)
-
-            send_mail(
-                sujet,
-                strip_tags(message),
-                settings.DEFAULT_FROM_EMAIL,
-                [intervention.client.email],
-                html_message=message,
-                fail_silently=True
-            )
+            message = InterventionEmailService.rendre('interventions/emails/changement_statut.html', context)
+
+            FileEmailsService.mettre_en_file(sujet, message, [intervention.client.email], intervention)
 
             # Si l'intervention est terminée, envoyer aussi au technicien
             if intervention.statut == 'terminee' and intervention.technicien and intervention.technicien.email:
                 sujet_tech = f"[Solar Maintenance] Intervention #{intervention.id} terminée"
-                message_tech = render_to_string('interventions/emails/intervention_terminee_tech.html', context)
-
-                send_mail(
-                    sujet_tech,
-                    strip_tags(message_tech),
-                    settings.DEFAULT_FROM_EMAIL,
-                    [intervention.technicien.email],
-                    html_message=message_tech,
-                    fail_silently=True
-                )
-
-    @staticmethod
-    def envoyer_rappel_24h(intervention, request=None):
-        """Envoyer un rappel 24h avant l'intervention"""
-        context = InterventionEmailService.get_base_context(intervention, request)
+                message_tech = InterventionEmailService.rendre('interventions/emails/intervention_terminee_tech.html', context)
 
-        sujet = f"[Solar Maintenance] Rappel - Intervention #{intervention.id} demain"
-        message = render_to_string('interventions/emails/rappel_24h.html', context)
+                FileEmailsService.mettre_en_file(sujet_tech, message_tech, [intervention.technicien.email], intervention)
 
+    @staticmethod
+    def _rappel_24h(intervention, request=None):
+        """EmailSortant (non enregistré) du rappel, None si personne n'a d'email"""
         destinataires = []
         if intervention.technicien and intervention.technicien.email:
             destinataires.append(intervention.technicien.email)
         if intervention.client and intervention.client.email:
             destinataires.append(intervention.client.email)
 
-        if destinataires:
-            send_mail(
-                sujet,
-                strip_tags(message),
-                settings.DEFAULT_FROM_EMAIL,
-                destinataires,
-                html_message=message,
-                fail_silently=True
+        if not destinataires:
+            return None
+
+        context = InterventionEmailService.get_base_context(intervention, request)
+        sujet = f"[Solar Maintenance] Rappel - Intervention #{intervention.id} demain"
+        message = InterventionEmailService.rendre('interventions/emails/rappel_24h.html', context)
+        return FileEmailsService.preparer(sujet, message, destinataires, intervention)
+
+    @staticmethod
+    def envoyer_rappels_24h(interventions, request=None):
+        """
+        Met en file les rappels 24h des interventions (client et technicien
+        préchargés) : une insertion groupée et une mise à jour de rappel_envoye.
+        Renvoie les interventions rappelées.
+        """
+        emails, rappelees = [], []
+        for intervention in interventions:
+            email = InterventionEmailService._rappel_24h(intervention, request)
+            if email is not None:
+                emails.append(email)
+                rappelees.append(intervention)
+
+        with transaction.atomic():
+            EmailSortant.objects.bulk_create(emails, batch_size=500)
+            Intervention.objects.filter(pk__in=[intervention.pk for intervention in rappelees]).update(
+                rappel_envoye=True
             )
+        for intervention in rappelees:
             intervention.rappel_envoye = True
-            intervention.save(update_fields=['rappel_envoye'])
\ No newline at end of file
+        return rappelees
+
+    @staticmethod
+    def envoyer_rappel_24h(intervention, request=None):
+        """Envoyer un rappel 24h avant l'intervention"""
+        InterventionEmailService.envoyer_rappels_24h([intervention], request)
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from interventions.models import Intervention
+
+
+class Command(BaseCommand):
+    help = "Change le statut d'un ensemble d'interventions (ex: clôturer les interventions du jour)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'statut',
+            choices=[code for code, _ in Intervention.STATUT_CHOICES],
+            help='Nouveau statut'
+        )
+        parser.add_argument('--ids', nargs='+', type=int, help="Identifiants des interventions")
+        parser.add_argument('--date', help="Interventions de ce jour (AAAA-MM-JJ)")
+        parser.add_argument(
+            '--depuis',
+            choices=[code for code, _ in Intervention.STATUT_CHOICES],
+            help='Ne traiter que les interventions ayant ce statut'
+        )
+        parser.add_argument('--technicien', type=int, help="Identifiant du technicien")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche le nombre sans rien modifier")
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['date'] or options['depuis'] or options['technicien']):
+            raise CommandError("Précisez au moins un filtre : --ids, --date, --depuis ou --technicien")
+
+        interventions = Intervention.objects.all()
+
+        if options['ids']:
+            interventions = interventions.filter(pk__in=options['ids'])
+        if options['date']:
+            try:
+                jour = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Date invalide, format attendu : AAAA-MM-JJ")
+            interventions = interventions.filter(date_intervention__date=jour)
+        if options['depuis']:
+            interventions = interventions.filter(statut=options['depuis'])
+        if options['technicien']:
+            interventions = interventions.filter(technicien_id=options['technicien'])
+
+        if options['dry_run']:
+            nombre = interventions.exclude(statut=options['statut']).count()
+            self.stdout.write(f"{nombre} intervention(s) seraient passées au statut '{options['statut']}'")
+            return
+
+        nombre = interventions.transition(options['statut'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {nombre} intervention(s) passée(s) au statut '{options['statut']}'"
+        ))
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from interventions.email_service import FileEmailsService
+from interventions.models import InterventionTombstone
+from interventions.pdf_service import InterventionPDFService
+
+
+class Command(BaseCommand):
+    help = "Worker qui envoie les emails en file d'attente (une connexion SMTP par lot)"
+
+    # Fréquence (en secondes) de la purge des emails envoyés, traces du calendrier et PDF anciens
+    INTERVALLE_PURGE = 3600
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help="Envoie les emails en attente puis s'arrête (utile en cron)"
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=5,
+            help='Secondes entre deux vérifications de la file (défaut: 5)'
+        )
+        parser.add_argument(
+            '--lot',
+            type=int,
+            default=50,
+            help="Nombre maximum d'emails envoyés par connexion SMTP (défaut: 50)"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("=== WORKER EMAILS ===")
+        derniere_purge = None
+
+        while True:
+            # Le worker tourne longtemps : ne pas garder de connexion périmée
+            close_old_connections()
+
+            if derniere_purge is None or time.monotonic() - derniere_purge > self.INTERVALLE_PURGE:
+                purges = FileEmailsService.purger()
+                if purges:
+                    self.stdout.write(f"{purges} email(s) envoyé(s) ancien(s) supprimé(s)")
+                # Hors des suppressions d'interventions, qui n'écrivent plus qu'une ligne
+                traces = InterventionTombstone.purger()
+                if traces:
+                    self.stdout.write(f"{traces} trace(s) de calendrier expirée(s) supprimée(s)")
+                pdf = InterventionPDFService.purger()
+                if pdf:
+                    self.stdout.write(f"{pdf} PDF d'intervention inutilisé(s) supprimé(s)")
+                derniere_purge = time.monotonic()
+
+            lot = FileEmailsService.reserver_lot(options['lot'])
+
+            if not lot:
+                if options['une_fois']:
+                    break
+                time.sleep(options['intervalle'])
+                continue
+
+            debut = time.perf_counter()
+            envoyes, echecs = FileEmailsService.envoyer_lot(lot)
+            duree = time.perf_counter() - debut
+
+            self.stdout.write(f"\n→ Lot de {len(lot)} email(s) en {duree:.1f} s")
+            if envoyes:
+                self.stdout.write(self.style.SUCCESS(f"   ✓ {envoyes} envoyé(s)"))
+            if echecs:
+                self.stdout.write(self.style.ERROR(f"   ✗ {echecs} en échec (nouvelle tentative planifiée ou abandon)"))
+
+            if options['une_fois'] and echecs == len(lot):
+                # Serveur indisponible : inutile d'insister avant la prochaine exécution
+                break
+
+        self.stdout.write("\n=== FIN ===")
@@ -26,6 +26,7 @@ class Command(BaseCommand):
             rappel_envoye=False
         ).select_related('client', 'technicien', 'fournisseur')
 
+        a_rappeler = []
         for intervention in interventions:
             # Calculer l'heure exacte du rappel (24h avant)
             heure_rappel = intervention.date_intervention - timedelta(hours=24)
@@ -33,20 +34,24 @@ class Command(BaseCommand):
             # Vérifier si nous sommes dans la fenêtre du rappel (±30 min)
             marge = timedelta(minutes=30)
             if maintenant >= (heure_rappel - marge) and maintenant <= (heure_rappel + marge):
-                try:
-                    self.stdout.write(f"\n→ Intervention #{intervention.id} - Rappel 24h avant")
-                    self.stdout.write(f"   Date intervention: {intervention.date_intervention}")
-                    self.stdout.write(f"   Heure rappel idéale: {heure_rappel}")
-
-                    InterventionEmailService.envoyer_rappel_24h(intervention)
-                    self.stdout.write(self.style.SUCCESS('   ✓ RAPPEL ENVOYÉ'))
-
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'   ✗ Erreur: {str(e)}'))
+                self.stdout.write(f"\n→ Intervention #{intervention.id} - Rappel 24h avant")
+                self.stdout.write(f"   Date intervention: {intervention.date_intervention}")
+                self.stdout.write(f"   Heure rappel idéale: {heure_rappel}")
+                a_rappeler.append(intervention)
             else:
                 minutes_avant = (heure_rappel - maintenant).total_seconds() / 60
                 if minutes_avant > 0:
                     self.stdout.write(f"\n→ Intervention #{intervention.id}")
                     self.stdout.write(f"   Rappel prévu dans: {int(minutes_avant)} minutes")
 
+        # Rendu des rappels puis mise en file groupée (envoi par la commande envoyer_emails)
+        if a_rappeler:
+            try:
+                rappelees = InterventionEmailService.envoyer_rappels_24h(a_rappeler)
+                self.stdout.write(self.style.SUCCESS(
+                    f"\n✓ {len(rappelees)} RAPPEL(S) MIS EN FILE D'ENVOI (commande envoyer_emails)"
+                ))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'\n✗ Erreur: {str(e)}'))
+
         self.stdout.write(f"\n=== FIN ===")
\ No newline at end of file
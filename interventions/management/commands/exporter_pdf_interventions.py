@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from interventions.models import Intervention
+from interventions.pdf_service import InterventionPDFService
+
+
+class Command(BaseCommand):
+    help = "Exporte les rapports PDF d'un ensemble d'interventions (zip ou PDF unique), générés en parallèle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', nargs='+', type=int, help="Identifiants des interventions")
+        parser.add_argument('--mois', help="Interventions de ce mois (AAAA-MM)")
+        parser.add_argument(
+            '--statut',
+            choices=[code for code, _ in Intervention.STATUT_CHOICES],
+            help='Ne traiter que les interventions ayant ce statut'
+        )
+        parser.add_argument('--format', choices=['zip', 'pdf'], default='zip',
+                            help="zip (un PDF par intervention) ou pdf (un seul document)")
+        parser.add_argument('--sortie', required=True, help="Fichier à écrire")
+        parser.add_argument('--processus', type=int, help="Nombre de processus (par défaut : nombre de cœurs)")
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['mois'] or options['statut']):
+            raise CommandError("Précisez au moins un filtre : --ids, --mois ou --statut")
+
+        interventions = Intervention.objects.order_by('date_intervention', 'pk')
+
+        if options['ids']:
+            interventions = interventions.filter(pk__in=options['ids'])
+        if options['mois']:
+            try:
+                mois = datetime.strptime(options['mois'], '%Y-%m')
+            except ValueError:
+                raise CommandError("Mois invalide, format attendu : AAAA-MM")
+            interventions = interventions.filter(
+                date_intervention__year=mois.year, date_intervention__month=mois.month
+            )
+        if options['statut']:
+            interventions = interventions.filter(statut=options['statut'])
+
+        if not interventions.exists():
+            raise CommandError("Aucune intervention ne correspond à ces filtres")
+
+        fichiers, debit = InterventionPDFService.exporter(interventions, processus=options['processus'])
+        with open(options['sortie'], 'wb') as sortie:
+            if options['format'] == 'zip':
+                InterventionPDFService.ecrire_zip(fichiers, sortie)
+            else:
+                InterventionPDFService.ecrire_fusionne(fichiers, sortie)
+
+        self.stdout.write(self.style.SUCCESS(f"✓ {options['sortie']} : {InterventionPDFService.decrire_debit(debit)}"))
@@ -0,0 +1,48 @@
+import time
+from itertools import cycle, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from interventions.email_service import InterventionEmailService
+from interventions.models import Intervention
+
+
+class Annulation(Exception):
+    """Annule la transaction de mesure (aucun email ni rappel n'est conservé)"""
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit des notifications (rendu et mise en file des rappels 24h), sans rien conserver"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nombre', type=int, default=1000, help='Nombre de rappels à produire (défaut: 1000)')
+
+    def handle(self, *args, **options):
+        interventions = list(
+            Intervention.objects.select_related('client', 'technicien').exclude(client__email='')[:200]
+        )
+        if not interventions:
+            raise CommandError("Aucune intervention avec un client à notifier")
+        lot = list(islice(cycle(interventions), options['nombre']))
+
+        # Premier rendu hors mesure : compilation des templates, lecture du Site
+        InterventionEmailService._rappel_24h(lot[0])
+
+        debut = time.perf_counter()
+        for intervention in lot:
+            InterventionEmailService._rappel_24h(intervention)
+        self._afficher("Rendu (HTML + texte)", len(lot), time.perf_counter() - debut)
+
+        debut = time.perf_counter()
+        try:
+            with transaction.atomic():
+                rappelees = InterventionEmailService.envoyer_rappels_24h(lot)
+                raise Annulation
+        except Annulation:
+            pass
+        self._afficher("Rendu et mise en file", len(rappelees), time.perf_counter() - debut)
+
+    def _afficher(self, libelle, nombre, duree):
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {libelle} : {nombre} notifications en {duree:.2f} s, {nombre / duree:.0f} notifications/s"
+        ))
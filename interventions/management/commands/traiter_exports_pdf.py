@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from interventions.pdf_service import InterventionPDFService
+
+
+class Command(BaseCommand):
+    help = "Worker qui produit les exports PDF en lot demandés depuis l'admin"
+
+    # Fréquence (en secondes) de la purge des exports expirés
+    INTERVALLE_PURGE = 3600
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help="Traite les exports en attente puis s'arrête (utile en cron)"
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=3,
+            help='Secondes entre deux vérifications de la file (défaut: 3)'
+        )
+        parser.add_argument('--processus', type=int, help="Nombre de processus (par défaut : nombre de cœurs)")
+
+    def handle(self, *args, **options):
+        self.stdout.write("=== WORKER EXPORTS PDF ===")
+        derniere_purge = None
+
+        while True:
+            # Le worker tourne longtemps : ne pas garder de connexion périmée
+            close_old_connections()
+
+            if derniere_purge is None or time.monotonic() - derniere_purge > self.INTERVALLE_PURGE:
+                purges = InterventionPDFService.purger_exports()
+                if purges:
+                    self.stdout.write(f"{purges} export(s) expiré(s) supprimé(s)")
+                derniere_purge = time.monotonic()
+
+            relances, echecs = InterventionPDFService.recuperer_exports_abandonnes()
+            if relances or echecs:
+                self.stdout.write(self.style.WARNING(
+                    f"Exports abandonnés par un worker arrêté : {relances} remis en file, {echecs} en échec"
+                ))
+
+            export = InterventionPDFService.reserver_prochain_export()
+
+            if export is None:
+                if options['une_fois']:
+                    break
+                time.sleep(options['intervalle'])
+                continue
+
+            self.stdout.write(f"\n→ Export #{export.id} - {len(export.interventions)} rapport(s) ({export.format})")
+            debit = InterventionPDFService.traiter(export, processus=options['processus'])
+
+            if debit:
+                self.stdout.write(self.style.SUCCESS(f"   ✓ {InterventionPDFService.decrire_debit(debit)}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"   ✗ Erreur: {export.erreur}"))
+
+        self.stdout.write("\n=== FIN ===")
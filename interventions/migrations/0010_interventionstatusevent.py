@@ -0,0 +1,136 @@
+# Generated by Django 5.2.9 on 2026-10-17 20:45
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.dateparse import parse_duration
+
+
+# Statut d'origine des reprises, retrouvé à partir de la note de l'ancien JSON
+STATUT_DES_NOTES = {
+    'Reprise après statut Terminée': 'terminee',
+    'Reprise après statut Prévue': 'prevue',
+    'Reprise après statut Annulée': 'annulee',
+}
+
+
+def exploser_historique(apps, schema_editor):
+    """
+    Convertit chaque entrée du JSON historique_statuts en InterventionStatusEvent.
+
+    L'ancien JSON ne notait pas le statut atteint à la fin d'un comptage : il est
+    retrouvé dans l'entrée suivante (note d'une reprise) ou, pour la dernière
+    entrée, dans le statut actuel de l'intervention.
+    """
+    Intervention = apps.get_model('interventions', 'Intervention')
+    InterventionStatusEvent = apps.get_model('interventions', 'InterventionStatusEvent')
+
+    evenements = []
+    interventions = Intervention.objects.exclude(historique_statuts=[]).values_list(
+        'pk', 'statut', 'historique_statuts'
+    )
+
+    for pk, statut_actuel, historique in interventions.iterator(chunk_size=500):
+        entrees = []
+        for entree in historique or []:
+            try:
+                entrees.append((datetime.fromisoformat(entree['timestamp']), entree))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        statut_precedent = ''
+        for i, (timestamp, entree) in enumerate(entrees):
+            action = entree.get('action', '')
+            note = entree.get('note', '')
+
+            if action == 'fin':
+                if i + 1 < len(entrees):
+                    nouveau_statut = STATUT_DES_NOTES.get(entrees[i + 1][1].get('note', ''), '')
+                else:
+                    nouveau_statut = statut_actuel if statut_actuel != 'en_cours' else ''
+                ancien_statut = entree.get('statut', '')
+                duree = parse_duration(entree.get('duree_ecoulee') or '')
+            else:
+                ancien_statut = STATUT_DES_NOTES.get(note, statut_precedent)
+                nouveau_statut = entree.get('statut', '')
+                duree = None
+            statut_precedent = nouveau_statut
+
+            evenements.append(InterventionStatusEvent(
+                intervention_id=pk,
+                ancien_statut=ancien_statut,
+                nouveau_statut=nouveau_statut,
+                action=action,
+                timestamp=timestamp,
+                duree=duree,
+                note=note
+            ))
+
+        if len(evenements) >= 1000:
+            InterventionStatusEvent.objects.bulk_create(evenements)
+            evenements = []
+
+    InterventionStatusEvent.objects.bulk_create(evenements)
+
+
+def reconstruire_historique(apps, schema_editor):
+    """Retour arrière : regroupe les événements dans le champ JSON"""
+    Intervention = apps.get_model('interventions', 'Intervention')
+    InterventionStatusEvent = apps.get_model('interventions', 'InterventionStatusEvent')
+
+    historiques = {}
+    for evenement in InterventionStatusEvent.objects.order_by('timestamp', 'pk').iterator(chunk_size=1000):
+        if evenement.action == 'fin':
+            entree = {
+                'statut': evenement.ancien_statut,
+                'timestamp': evenement.timestamp.isoformat(),
+                'action': 'fin',
+                'duree_ecoulee': str(evenement.duree)
+            }
+        else:
+            entree = {
+                'statut': evenement.nouveau_statut,
+                'timestamp': evenement.timestamp.isoformat(),
+                'action': evenement.action
+            }
+        if evenement.note:
+            entree['note'] = evenement.note
+        historiques.setdefault(evenement.intervention_id, []).append(entree)
+
+    for pk, historique in historiques.items():
+        Intervention.objects.filter(pk=pk).update(historique_statuts=historique)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interventions', '0009_intervention_dernier_debut_en_cours_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterventionStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancien_statut', models.CharField(blank=True, choices=[('terminee', 'Terminée'), ('annulee', 'Annulée'), ('en_cours', 'En cours'), ('prevue', 'Prévue')], max_length=20)),
+                ('nouveau_statut', models.CharField(blank=True, choices=[('terminee', 'Terminée'), ('annulee', 'Annulée'), ('en_cours', 'En cours'), ('prevue', 'Prévue')], max_length=20)),
+                ('action', models.CharField(choices=[('debut', 'Début'), ('fin', 'Fin'), ('reprise', 'Reprise')], max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('duree', models.DurationField(blank=True, help_text="Durée écoulée en statut 'En cours' (événements de fin)", null=True)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('intervention', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evenements_statut', to='interventions.intervention')),
+            ],
+            options={
+                'verbose_name': 'Événement de statut',
+                'verbose_name_plural': 'Événements de statut',
+                'ordering': ['timestamp', 'pk'],
+                'indexes': [models.Index(fields=['intervention', 'timestamp'], name='intervention_evt_ts_idx'), models.Index(fields=['nouveau_statut', 'timestamp'], name='intervention_evt_statut_idx')],
+            },
+        ),
+        migrations.RunPython(exploser_historique, reconstruire_historique),
+        migrations.RemoveField(
+            model_name='intervention',
+            name='historique_statuts',
+        ),
+    ]
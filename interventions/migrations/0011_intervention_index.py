@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-17 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_client_kva_client_tranche_kva'),
+        ('interventions', '0010_interventionstatusevent'),
+        ('techniciens', '0005_alter_technicien_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(fields=['-date_intervention'], name='intervention_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(fields=['statut', '-date_intervention'], name='intervention_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(fields=['technicien', '-date_intervention'], name='intervention_tech_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(condition=models.Q(('rappel_envoye', False), ('statut', 'prevue')), fields=['date_intervention'], name='intervention_rappel_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-17 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0008_client_date_modification'),
+        ('interventions', '0011_intervention_index'),
+        ('techniciens', '0007_technicien_date_modification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterventionTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('intervention_pk', models.BigIntegerField()),
+                ('technicien_pk', models.BigIntegerField(blank=True, null=True)),
+                ('motif', models.CharField(choices=[('suppression', 'Suppression'), ('reaffectation', 'Réaffectation')], default='suppression', max_length=20)),
+                ('date_suppression', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Intervention retirée',
+                'verbose_name_plural': 'Interventions retirées',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='intervention',
+            index=models.Index(fields=['date_modification'], name='intervention_modif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interventiontombstone',
+            index=models.Index(fields=['date_suppression'], name='intervention_tombstone_idx'),
+        ),
+    ]
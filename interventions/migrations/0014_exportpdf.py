@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interventions', '0013_emailsortant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('zip', 'Archive zip (un PDF par intervention)'), ('pdf', 'PDF unique')], default='zip', max_length=3)),
+                ('interventions', models.JSONField(default=list)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], db_index=True, default='en_attente', max_length=20)),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('erreur', models.TextField(blank=True)),
+                ('fichier', models.CharField(blank=True, max_length=255)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('derniere_activite', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exports_pdf', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export PDF',
+                'verbose_name_plural': 'Exports PDF',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
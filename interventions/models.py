@@ -1,4 +1,10 @@
-from django.db import models
+from django.contrib.auth.models import User
+from django.core.mail import EmailMultiAlternatives
+from django.db import connections, models, transaction
+from django.db.models import (
+    Aggregate, Avg, Case, Count, DurationField, ExpressionWrapper, F, Max, Min, Q, Sum, Value, When,
+)
+from django.db.models.functions import Now, TruncWeek
 from clients.models import Client, Fournisseur
 from techniciens.models import Technicien
 from django.utils import timezone
@@ -7,7 +13,158 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import extraire_kva, calculer_prix_par_kva_et_type
+from utils import calculer_prix_par_kva_et_type
+from core.search import trier_par_pertinence
+
+
+class Percentile(Aggregate):
+    """percentile_cont de PostgreSQL (ex: Percentile('duree_totale', 0.5) pour la médiane)"""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def percentile(valeurs_triees, fraction):
+    """Percentile par interpolation linéaire, comme percentile_cont (valeurs déjà triées)"""
+    if not valeurs_triees:
+        return None
+    position = (len(valeurs_triees) - 1) * fraction
+    bas = int(position)
+    haut = min(bas + 1, len(valeurs_triees) - 1)
+    return valeurs_triees[bas] + (valeurs_triees[haut] - valeurs_triees[bas]) * (position - bas)
+
+
+class InterventionQuerySet(models.QuerySet):
+
+    def avec_duree_totale(self):
+        """
+        Annote `duree_totale` calculée en base, équivalent SQL de get_duree_totale() :
+        durée cumulée + temps écoulé depuis le dernier passage "En cours" si le comptage tourne.
+        """
+        temps_actuel = Case(
+            When(
+                temps_en_cours=True,
+                dernier_debut_en_cours__isnull=False,
+                then=ExpressionWrapper(Now() - F('dernier_debut_en_cours'), output_field=DurationField())
+            ),
+            default=Value(timedelta(0)),
+            output_field=DurationField()
+        )
+        return self.annotate(
+            duree_totale=ExpressionWrapper(F('duree_cumulee') + temps_actuel, output_field=DurationField())
+        )
+
+    def statistiques_durees(self):
+        """
+        Moyenne, minimum, maximum, médiane et 90e percentile des durées non nulles,
+        en une seule requête d'agrégat (les percentiles sont calculés par PostgreSQL ;
+        sur les autres bases, ils sont calculés à partir de la seule colonne des durées).
+        """
+        durees = self.avec_duree_totale().filter(duree_totale__gt=timedelta(0)).order_by()
+        agregats = {
+            'nombre': Count('pk'),
+            'moyenne': Avg('duree_totale'),
+            'minimum': Min('duree_totale'),
+            'maximum': Max('duree_totale'),
+        }
+
+        if connections[self.db].vendor == 'postgresql':
+            return durees.aggregate(
+                mediane=Percentile('duree_totale', 0.5, output_field=DurationField()),
+                p90=Percentile('duree_totale', 0.9, output_field=DurationField()),
+                **agregats
+            )
+
+        resultat = durees.aggregate(**agregats)
+        valeurs = sorted(durees.values_list('duree_totale', flat=True))
+        resultat['mediane'] = percentile(valeurs, 0.5)
+        resultat['p90'] = percentile(valeurs, 0.9)
+        return resultat
+
+    def compteurs(self):
+        """
+        Compteurs par statut et chiffres d'affaires en une seule requête
+        (agrégats conditionnels au lieu d'un count() par statut).
+        """
+        resultat = self.order_by().aggregate(
+            total=Count('pk'),
+            en_cours=Count('pk', filter=Q(statut='en_cours')),
+            terminee=Count('pk', filter=Q(statut='terminee')),
+            annulee=Count('pk', filter=Q(statut='annulee')),
+            prevue=Count('pk', filter=Q(statut='prevue')),
+            revenus_termines=Sum('prix_intervention', filter=Q(statut='terminee')),
+            revenus_total=Sum('prix_intervention'),
+        )
+        resultat['revenus_termines'] = resultat['revenus_termines'] or 0
+        resultat['revenus_total'] = resultat['revenus_total'] or 0
+        return resultat
+
+    # Noms parcourus par la recherche de la liste des interventions
+    CHAMPS_RECHERCHE = ('client__nom', 'technicien__nom', 'fournisseur__nom')
+
+    def rechercher(self, terme):
+        """
+        Recherche par nom de client, de technicien ou de fournisseur.
+        Chaque nom est cherché dans sa table (index trigram sur PostgreSQL) puis
+        relié par clé étrangère, au lieu d'un OR de LIKE sur les trois jointures.
+        Sur PostgreSQL, les résultats sont triés par pertinence.
+        """
+        terme = (terme or '').strip()
+        if not terme:
+            return self
+        resultats = self.filter(
+            Q(client__in=Client.objects.filter(nom__icontains=terme).values('pk')) |
+            Q(technicien__in=Technicien.objects.filter(nom__icontains=terme).values('pk')) |
+            Q(fournisseur__in=Fournisseur.objects.filter(nom__icontains=terme).values('pk'))
+        )
+        return trier_par_pertinence(resultats, terme, self.CHAMPS_RECHERCHE)
+
+    def transition(self, nouveau_statut, at=None, batch_size=500):
+        """
+        Passe toutes les interventions du queryset au statut `nouveau_statut`
+        en appliquant les règles de _gerer_temps_statut (durée cumulée, début
+        en cours, historique), par lots de bulk_update au lieu d'un save() chacune.
+        Retourne le nombre d'interventions modifiées.
+        """
+        from .signals import statuts_modifies
+
+        maintenant = timezone.now()
+        at = at or maintenant
+        champs = [
+            'statut', 'duree_cumulee', 'dernier_debut_en_cours',
+            'temps_en_cours', 'date_modification',
+        ]
+        modifiees = []
+
+        with transaction.atomic():
+            # of=('self',) : PostgreSQL refuse de verrouiller le côté nullable d'une jointure
+            # externe (recherche de l'admin sur client / technicien)
+            a_modifier = self.exclude(statut=nouveau_statut).select_for_update(of=('self',)).order_by('pk')
+
+            for intervention in a_modifier.iterator(chunk_size=batch_size):
+                ancien_statut = intervention.statut
+                intervention.statut = nouveau_statut
+                intervention._gerer_temps_statut(ancien_statut, now=at)
+                # auto_now n'est pas appliqué par bulk_update ; jamais `at`, qui peut être passé
+                # et ferait manquer la modification à la synchronisation du calendrier
+                intervention.date_modification = maintenant
+                modifiees.append(intervention)
+
+            for debut in range(0, len(modifiees), batch_size):
+                self.model.objects.bulk_update(modifiees[debut:debut + batch_size], champs)
+
+            evenements = []
+            for intervention in modifiees:
+                evenements.extend(intervention._evenements_en_attente())
+                intervention._memoriser_etat_initial()
+            InterventionStatusEvent.objects.bulk_create(evenements, batch_size=batch_size)
+
+            if modifiees:
+                statuts_modifies.send(sender=self.model, interventions=modifiees)
+
+        return len(modifiees)
 
 
 class Intervention(models.Model):
@@ -57,11 +214,6 @@ class Intervention(models.Model):
         default=False,
         help_text="Si l'intervention est actuellement en cours de comptage"
     )
-    historique_statuts = models.JSONField(
-        default=list,
-        blank=True,
-        help_text="Historique des changements de statut avec timestamps"
-    )
 
     # Relations avec autres tables
     client = models.ForeignKey(
@@ -89,13 +241,45 @@ class Intervention(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
 
+    objects = InterventionQuerySet.as_manager()
+
+    # Champs dont la valeur en base est mémorisée au chargement (statut précédent,
+    # ancienne ligne de statistiques) pour éviter de relire l'intervention avant chaque save()
+    CHAMPS_SUIVIS = (
+        'date_intervention', 'type_intervention', 'statut',
+        'technicien_id', 'client_id', 'prix_intervention',
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._memoriser_etat_initial()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._memoriser_etat_initial()
+
+    def _memoriser_etat_initial(self):
+        # Les champs différés (only/defer) ne sont pas dans __dict__ et ne sont pas suivis
+        self._etat_initial = {
+            champ: self.__dict__[champ]
+            for champ in self.CHAMPS_SUIVIS
+            if champ in self.__dict__
+        }
+
+    def get_valeur_initiale(self, champ):
+        """Valeur du champ lors du dernier chargement / enregistrement (None si inconnue)"""
+        return getattr(self, '_etat_initial', {}).get(champ)
+
     def save(self, *args, **kwargs):
-        # Récupérer l'ancien statut si l'objet existe
+        # Ancien statut : mémorisé au chargement, relu en base seulement s'il est inconnu
         ancien_statut = None
         if self.pk:
-            ancien_instance = Intervention.objects.filter(pk=self.pk).first()
-            if ancien_instance:
-                ancien_statut = ancien_instance.statut
+            if 'statut' in getattr(self, '_etat_initial', {}):
+                ancien_statut = self._etat_initial['statut']
+            else:
+                ancien_statut = Intervention.objects.filter(pk=self.pk).values_list('statut', flat=True).first()
 
         # Gestion du temps selon les changements de statut
         self._gerer_temps_statut(ancien_statut)
@@ -106,8 +290,7 @@ class Intervention(models.Model):
 
         # Règle 2 : Calcul automatique du prix basé sur l'extraction du KVA et du type d'intervention
         if self.client and not self.prix_intervention:
-            type_install = self.client.type_installation
-            kva = extraire_kva(type_install)
+            kva = self.client.kva
 
             if kva:
                 # Utiliser la nouvelle fonction qui prend en compte le type d'intervention
@@ -117,23 +300,47 @@ class Intervention(models.Model):
 
         super().save(*args, **kwargs)
 
-    def _gerer_temps_statut(self, ancien_statut):
+        # Historique : les événements ont besoin de la clé primaire (création)
+        InterventionStatusEvent.objects.bulk_create(self._evenements_en_attente())
+
+        # Réaffectation : l'intervention disparaît du calendrier de l'ancien technicien
+        ancien_technicien = self.get_valeur_initiale('technicien_id')
+        if ancien_technicien is not None and ancien_technicien != self.technicien_id:
+            InterventionTombstone.enregistrer(self.pk, ancien_technicien, motif='reaffectation')
+
+        # Le nouvel état enregistré devient l'état initial des prochaines modifications
+        self._memoriser_etat_initial()
+
+    def _ajouter_evenement(self, ancien_statut, action, now, duree=None, note=''):
+        """Prépare une ligne d'historique, enregistrée après la sauvegarde de l'intervention"""
+        if not hasattr(self, '_evenements'):
+            self._evenements = []
+        self._evenements.append(InterventionStatusEvent(
+            ancien_statut=ancien_statut or '',
+            nouveau_statut=self.statut,
+            action=action,
+            timestamp=now,
+            duree=duree,
+            note=note
+        ))
+
+    def _evenements_en_attente(self):
+        """Retourne (et vide) les événements préparés, rattachés à l'intervention"""
+        evenements = getattr(self, '_evenements', [])
+        self._evenements = []
+        for evenement in evenements:
+            evenement.intervention = self
+        return evenements
+
+    def _gerer_temps_statut(self, ancien_statut, now=None):
         """Gère le comptage du temps selon les changements de statut"""
-        now = timezone.now()
-
-        # Initialiser l'historique si vide
-        if not self.historique_statuts:
-            self.historique_statuts = []
+        now = now or timezone.now()
 
         # Cas 1: Passage à "En cours" depuis autre statut
         if self.statut == 'en_cours' and ancien_statut != 'en_cours':
             self.dernier_debut_en_cours = now
             self.temps_en_cours = True
-            self.historique_statuts.append({
-                'statut': 'en_cours',
-                'timestamp': now.isoformat(),
-                'action': 'debut'
-            })
+            self._ajouter_evenement(ancien_statut, 'debut', now)
 
         # Cas 2: Sortie de "En cours" vers autre statut
         elif ancien_statut == 'en_cours' and self.statut != 'en_cours':
@@ -142,48 +349,28 @@ class Intervention(models.Model):
                 self.duree_cumulee += duree_ecoulee
                 self.dernier_debut_en_cours = None
                 self.temps_en_cours = False
-                self.historique_statuts.append({
-                    'statut': ancien_statut,
-                    'timestamp': now.isoformat(),
-                    'action': 'fin',
-                    'duree_ecoulee': str(duree_ecoulee)
-                })
+                self._ajouter_evenement(ancien_statut, 'fin', now, duree=duree_ecoulee)
 
         # Cas 3: Passage de "Terminée" à "En cours" (reprise)
         elif self.statut == 'en_cours' and ancien_statut == 'terminee':
             # Le temps cumulé est conservé, on reprend le comptage
             self.dernier_debut_en_cours = now
             self.temps_en_cours = True
-            self.historique_statuts.append({
-                'statut': 'en_cours',
-                'timestamp': now.isoformat(),
-                'action': 'reprise',
-                'note': 'Reprise après statut Terminée'
-            })
+            self._ajouter_evenement(ancien_statut, 'reprise', now, note='Reprise après statut Terminée')
 
         # Cas 4: Passage de "Prévue" à "En cours" (reprise après pause)
         elif self.statut == 'en_cours' and ancien_statut == 'prevue':
             # Le temps cumulé est conservé, on reprend le comptage
             self.dernier_debut_en_cours = now
             self.temps_en_cours = True
-            self.historique_statuts.append({
-                'statut': 'en_cours',
-                'timestamp': now.isoformat(),
-                'action': 'reprise',
-                'note': 'Reprise après statut Prévue'
-            })
+            self._ajouter_evenement(ancien_statut, 'reprise', now, note='Reprise après statut Prévue')
 
         # Cas 5: Passage de "Annulée" à "En cours" (reprise)
         elif self.statut == 'en_cours' and ancien_statut == 'annulee':
             # Le temps cumulé est conservé, on reprend le comptage
             self.dernier_debut_en_cours = now
             self.temps_en_cours = True
-            self.historique_statuts.append({
-                'statut': 'en_cours',
-                'timestamp': now.isoformat(),
-                'action': 'reprise',
-                'note': 'Reprise après statut Annulée'
-            })
+            self._ajouter_evenement(ancien_statut, 'reprise', now, note='Reprise après statut Annulée')
 
     def get_duree_totale(self):
         """Retourne la durée totale en cours (cumulée + temps actuel si en cours)"""
@@ -195,9 +382,10 @@ class Intervention(models.Model):
 
         return duree_totale
 
-    def get_duree_formatee(self):
-        """Retourne la durée formatée en jours, heures, minutes"""
-        duree = self.get_duree_totale()
+    def get_duree_formatee(self, duree=None):
+        """Retourne la durée (totale par défaut) formatée en jours, heures, minutes"""
+        if duree is None:
+            duree = self.get_duree_totale()
 
         if not duree:
             return "0 min"
@@ -229,4 +417,252 @@ class Intervention(models.Model):
     class Meta:
         verbose_name = "Intervention"
         verbose_name_plural = "Interventions"
-        ordering = ['-date_intervention']
\ No newline at end of file
+        ordering = ['-date_intervention']
+        # Index alignés sur les requêtes réelles (plans vérifiés dans tests.py sur PostgreSQL)
+        indexes = [
+            # Listes, calendrier et statistiques : filtre sur une période / tri par date
+            models.Index(fields=['-date_intervention'], name='intervention_date_idx'),
+            # Listes et tableaux de bord filtrés par statut
+            models.Index(fields=['statut', '-date_intervention'], name='intervention_statut_date_idx'),
+            # Espace technicien, fiche technicien et calendrier d'un technicien
+            models.Index(fields=['technicien', '-date_intervention'], name='intervention_tech_date_idx'),
+            # Synchronisation incrémentale du calendrier (modifications depuis un curseur)
+            models.Index(fields=['date_modification'], name='intervention_modif_idx'),
+            # Commande envoyer_rappels : seules les interventions prévues sans rappel sont indexées
+            models.Index(
+                fields=['date_intervention'],
+                condition=Q(statut='prevue', rappel_envoye=False),
+                name='intervention_rappel_idx'
+            ),
+        ]
+
+
+class InterventionStatusEventQuerySet(models.QuerySet):
+
+    def temps_en_cours(self, periode=TruncWeek):
+        """
+        Temps passé "En cours" par technicien et par période (semaine par défaut),
+        calculé en SQL à partir des événements de fin de comptage.
+        """
+        return self.filter(action='fin').order_by().annotate(
+            periode=periode('timestamp')
+        ).values(
+            'periode', 'intervention__technicien_id', 'intervention__technicien__nom'
+        ).annotate(
+            duree_totale=Sum('duree'),
+            nombre=Count('pk')
+        ).order_by('periode', 'intervention__technicien__nom')
+
+
+class InterventionStatusEvent(models.Model):
+    """Historique des changements de statut (une ligne par événement, jamais modifiée)"""
+
+    ACTION_CHOICES = [
+        ('debut', 'Début'),
+        ('fin', 'Fin'),
+        ('reprise', 'Reprise'),
+    ]
+
+    intervention = models.ForeignKey(
+        Intervention,
+        on_delete=models.CASCADE,
+        related_name='evenements_statut'
+    )
+    ancien_statut = models.CharField(max_length=20, choices=Intervention.STATUT_CHOICES, blank=True)
+    nouveau_statut = models.CharField(max_length=20, choices=Intervention.STATUT_CHOICES, blank=True)
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    timestamp = models.DateTimeField()
+    duree = models.DurationField(
+        null=True,
+        blank=True,
+        help_text="Durée écoulée en statut 'En cours' (événements de fin)"
+    )
+    note = models.CharField(max_length=255, blank=True)
+
+    objects = InterventionStatusEventQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Intervention {self.intervention_id} - {self.action} ({self.timestamp:%d/%m/%Y %H:%M})"
+
+    class Meta:
+        verbose_name = "Événement de statut"
+        verbose_name_plural = "Événements de statut"
+        ordering = ['timestamp', 'pk']
+        indexes = [
+            models.Index(fields=['intervention', 'timestamp'], name='intervention_evt_ts_idx'),
+            models.Index(fields=['nouveau_statut', 'timestamp'], name='intervention_evt_statut_idx'),
+        ]
+
+
+class InterventionTombstone(models.Model):
+    """
+    Trace d'une intervention retirée d'un calendrier (suppression, ou réaffectation
+    pour le calendrier de l'ancien technicien). La synchronisation incrémentale
+    du calendrier transmet ces retraits ; les traces sont conservées RETENTION,
+    puis supprimées par la purge périodique du worker `envoyer_emails`.
+    """
+
+    MOTIF_CHOICES = [
+        ('suppression', 'Suppression'),
+        ('reaffectation', 'Réaffectation'),
+    ]
+
+    # Au-delà, un client dont le curseur est plus ancien recharge tout le calendrier
+    RETENTION = timedelta(days=30)
+
+    intervention_pk = models.BigIntegerField()
+    technicien_pk = models.BigIntegerField(null=True, blank=True)
+    motif = models.CharField(max_length=20, choices=MOTIF_CHOICES, default='suppression')
+    date_suppression = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def enregistrer(cls, intervention_pk, technicien_pk, motif='suppression'):
+        cls.objects.create(intervention_pk=intervention_pk, technicien_pk=technicien_pk, motif=motif)
+
+    @classmethod
+    def purger(cls):
+        """Supprime les traces plus anciennes que RETENTION ; retourne leur nombre"""
+        supprimees, _ = cls.objects.filter(date_suppression__lt=timezone.now() - cls.RETENTION).delete()
+        return supprimees
+
+    def __str__(self):
+        return f"Intervention {self.intervention_pk} - {self.get_motif_display()} ({self.date_suppression:%d/%m/%Y %H:%M})"
+
+    class Meta:
+        verbose_name = "Intervention retirée"
+        verbose_name_plural = "Interventions retirées"
+        indexes = [
+            models.Index(fields=['date_suppression'], name='intervention_tombstone_idx'),
+        ]
+
+
+class EmailSortant(models.Model):
+    """
+    Email en file d'attente (boîte d'envoi). Les vues n'enregistrent que le
+    message ; la commande `envoyer_emails` l'envoie par lots sur une seule
+    connexion SMTP, avec nouvelles tentatives espacées en cas d'échec.
+    """
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('envoye', 'Envoyé'),
+        ('echec', 'Échec'),
+    ]
+
+    # Au-delà, le message est abandonné (statut « échec »)
+    MAX_TENTATIVES = 5
+    # Délai avant la 2e tentative, doublé à chaque échec et plafonné
+    DELAI_INITIAL = timedelta(minutes=1)
+    DELAI_MAX = timedelta(hours=1)
+    # Les emails envoyés sont conservés RETENTION (consultation dans l'admin)
+    RETENTION = timedelta(days=30)
+
+    sujet = models.CharField(max_length=255)
+    corps_texte = models.TextField()
+    corps_html = models.TextField(blank=True)
+    expediteur = models.CharField(max_length=255)
+    destinataires = models.JSONField(default=list)
+    intervention = models.ForeignKey(
+        Intervention, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails'
+    )
+
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente')
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    prochaine_tentative = models.DateTimeField(default=timezone.now)
+    erreur = models.TextField(blank=True)
+
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_envoi = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.sujet} → {', '.join(self.destinataires)} ({self.get_statut_display()})"
+
+    class Meta:
+        ordering = ['-date_creation']
+        verbose_name = "Email sortant"
+        verbose_name_plural = "Emails sortants"
+        indexes = [
+            # Messages à envoyer (lecture de la file par le worker)
+            models.Index(fields=['statut', 'prochaine_tentative'], name='email_file_idx'),
+        ]
+
+    @classmethod
+    def delai_apres(cls, tentatives):
+        """Attente avant la tentative suivante, après `tentatives` échecs"""
+        return min(cls.DELAI_INITIAL * 2 ** (tentatives - 1), cls.DELAI_MAX)
+
+    def message(self, connexion=None):
+        """EmailMultiAlternatives prêt à envoyer (texte, et HTML en alternative)"""
+        email = EmailMultiAlternatives(
+            self.sujet, self.corps_texte, self.expediteur, self.destinataires, connection=connexion
+        )
+        if self.corps_html:
+            email.attach_alternative(self.corps_html, 'text/html')
+        return email
+
+
+class ExportPDF(models.Model):
+    """
+    Export en lot des rapports PDF demandé depuis l'admin, généré en arrière-plan
+    par `traiter_exports_pdf` (les requêtes web ne font qu'enregistrer la demande).
+    Le fichier produit est conservé RETENTION, puis supprimé par la purge du worker.
+    """
+
+    FORMAT_CHOICES = [
+        ('zip', 'Archive zip (un PDF par intervention)'),
+        ('pdf', 'PDF unique'),
+    ]
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('echec', 'Échec'),
+    ]
+
+    # Sans avancement pendant ce délai, le worker est considéré comme arrêté
+    DELAI_INACTIVITE = timedelta(minutes=10)
+    MAX_TENTATIVES = 2
+    RETENTION = timedelta(days=1)
+
+    format = models.CharField(max_length=3, choices=FORMAT_CHOICES, default='zip')
+    interventions = models.JSONField(default=list)  # Identifiants, dans l'ordre d'export
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente', db_index=True)
+
+    message = models.CharField(max_length=255, blank=True)
+    erreur = models.TextField(blank=True)
+    # Chemin relatif à MEDIA_ROOT du fichier produit
+    fichier = models.CharField(max_length=255, blank=True)
+
+    # Réservations par un worker ; au-delà de MAX_TENTATIVES, un export abandonné passe en échec
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    # Dernier signe de vie du worker (réservation, avancement)
+    derniere_activite = models.DateTimeField(null=True, blank=True)
+
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exports_pdf')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Export #{self.pk} - {len(self.interventions)} rapport(s) ({self.get_statut_display()})"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Export PDF"
+        verbose_name_plural = "Exports PDF"
+
+    @property
+    def est_termine(self):
+        return self.statut in ('termine', 'echec')
+
+    @property
+    def nom_fichier(self):
+        return f"rapports_interventions_{self.pk}.{self.format}"
+
+    def mettre_a_jour(self, message):
+        """Enregistre l'avancement sans écraser les autres champs de l'export"""
+        self.message = message[:255]
+        self.derniere_activite = timezone.now()
+        ExportPDF.objects.filter(pk=self.pk).update(message=self.message, derniere_activite=self.derniere_activite)
@@ -0,0 +1,508 @@
+import io
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+from pypdf import PdfWriter
+from core.pdf_cache import CachePDF
+from core.pdf_theme import theme_pdf
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Image, PageBreak
+
+from .models import ExportPDF, Intervention
+
+
+def initialiser_worker():
+    """Construit le thème (styles et images) une fois par processus du pool d'export"""
+    theme_pdf()
+
+
+def generer_fichier(contenu, chemin):
+    """Tâche du pool d'export : génère et enregistre le PDF d'une intervention"""
+    InterventionPDFService.ecrire(contenu, chemin)
+    return chemin
+
+
+class InterventionPDFService:
+    """
+    Rapports PDF d'intervention, mis en cache sous MEDIA_ROOT.
+
+    Le PDF est construit à partir d'un dictionnaire de textes (contenu()) ;
+    l'empreinte de ce dictionnaire nomme le fichier en cache. Tant que rien de
+    ce qui est imprimé ne change, le téléchargement sert le fichier existant.
+    Le document ne dépend que de l'intervention : le même fichier sert tous
+    les utilisateurs, quelle que soit l'adresse utilisée pour accéder au site.
+    """
+
+    # À incrémenter quand la mise en page change : invalide tous les PDF en cache
+    VERSION = 4
+    CACHE = CachePDF(os.path.join('pdf_cache', 'interventions'))
+
+    # Champs imprimés : un enregistrement qui n'en modifie aucun garde le PDF en cache
+    CHAMPS_IMPRIMES = {
+        'date_intervention', 'type_intervention', 'statut', 'prix_intervention',
+        'duree_cumulee', 'dernier_debut_en_cours', 'temps_en_cours',
+        'panne_constatee', 'pieces_remplacees', 'notes',
+        'client', 'technicien', 'fournisseur',
+    }
+
+    # ==================== CONTENU ====================
+
+    @staticmethod
+    def contenu(intervention):
+        """Textes imprimés dans le PDF (tout ce dont dépend le document)"""
+        client = intervention.client
+
+        personnes = [
+            ['Client:', client.nom],
+            ['Téléphone:', client.telephone if client.telephone else 'Non renseigné'],
+            ['Email:', client.email if client.email else 'Non renseigné'],
+            ['Adresse:', client.adresse if client.adresse else 'Non renseignée'],
+            ['Type installation:', client.type_installation],
+        ]
+
+        if intervention.technicien:
+            personnes.append(['Technicien assigné:', intervention.technicien.nom])
+            if intervention.technicien.telephone:
+                personnes.append(['Tel technicien:', intervention.technicien.telephone])
+
+        if intervention.fournisseur:
+            personnes.append(['Fournisseur:', intervention.fournisseur.nom])
+
+        if client.kva:
+            personnes.append(['Puissance (KVA):', f"{client.kva} KVA"])
+
+        return {
+            'version': InterventionPDFService.VERSION,
+            'id': intervention.id,
+            'date': intervention.date_intervention.strftime('%d/%m/%Y'),
+            'general': [
+                ['ID Intervention:', f"#{intervention.id}"],
+                ['Date d\'intervention:', intervention.date_intervention.strftime('%d/%m/%Y')],
+                ['Type d\'intervention:', intervention.get_type_intervention_display()],
+                ['Statut:', intervention.get_statut_display()],
+                ['Durée totale:', InterventionPDFService._duree(intervention)],
+                ['Prix total:', f"{intervention.prix_intervention:,.0f} FCFA".replace(',', ' ')],
+            ],
+            'personnes': personnes,
+            'details': [
+                [titre, texte] for titre, texte in (
+                    ("Panne constatée", intervention.panne_constatee),
+                    ("Pièces remplacées", intervention.pieces_remplacees),
+                    ("Notes", intervention.notes),
+                ) if texte
+            ],
+            # Adresse canonique du site (QR code), pas celle de la requête
+            'url': InterventionPDFService.url_intervention(intervention.pk),
+        }
+
+    @staticmethod
+    def _duree(intervention):
+        """
+        Durée imprimée. Pendant une intervention en cours, le temps écoulé
+        n'est pas imprimé (il changerait à chaque téléchargement, et le PDF
+        en cache avec lui) : durée cumulée et heure du dernier début.
+        """
+        if not (intervention.temps_en_cours and intervention.dernier_debut_en_cours):
+            return intervention.get_duree_formatee()
+
+        debut = timezone.localtime(intervention.dernier_debut_en_cours).strftime('%d/%m/%Y à %H:%M')
+        if not intervention.duree_cumulee:
+            return f"En cours depuis le {debut}"
+        return f"{intervention.get_duree_formatee(intervention.duree_cumulee)}, puis en cours depuis le {debut}"
+
+    # ==================== GÉNÉRATION ====================
+
+    @staticmethod
+    def _qr_code(url):
+        """QR code de l'URL, en PNG dans un buffer mémoire"""
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=8,
+            border=3,
+        )
+        qr.add_data(url)
+        qr.make(fit=True)
+
+        image = io.BytesIO()
+        qr.make_image(fill_color="black", back_color="white").save(image)
+        image.seek(0)
+        return image
+
+    @staticmethod
+    def _story(contenu):
+        """Éléments ReportLab du rapport d'une intervention"""
+        theme = theme_pdf()
+        styles, tableaux = theme.styles, theme.tableaux
+        story = []
+
+        # ==================== LOGO ====================
+        logo = theme.image('logo')
+        if logo:
+            story.append(logo)
+            story.append(Spacer(1, 0.1 * inch))
+        else:
+            # Logo de secours (texte)
+            story.append(Paragraph("SOLAR MAINTENANCE", styles['main_title']))
+            story.append(Paragraph("Gestion des interventions solaires", styles['main_subtitle']))
+
+        # Titre du document
+        story.append(Paragraph("RAPPORT D'INTERVENTION", styles['report_title']))
+        story.append(Spacer(1, 0.3 * inch))
+
+        # ==================== INFORMATIONS GÉNÉRALES ====================
+        story.append(Paragraph("INFORMATIONS GÉNÉRALES", styles['subtitle']))
+        table_general = Table(contenu['general'], colWidths=[2 * inch, 3.5 * inch])
+        table_general.setStyle(tableaux['cle_valeur'])
+        story.append(table_general)
+        story.append(Spacer(1, 0.4 * inch))
+
+        # ==================== PERSONNES CONCERNÉES ====================
+        story.append(Paragraph("PERSONNES CONCERNÉES", styles['subtitle']))
+        table_personnes = Table(contenu['personnes'], colWidths=[2 * inch, 3.5 * inch])
+        table_personnes.setStyle(tableaux['cle_valeur'])
+        story.append(table_personnes)
+        story.append(Spacer(1, 0.4 * inch))
+        story.append(PageBreak())  # Les détails techniques commencent une nouvelle page
+
+        # ==================== DÉTAILS TECHNIQUES ====================
+        story.append(Paragraph("DÉTAILS TECHNIQUES", styles['subtitle']))
+
+        for titre, texte in contenu['details']:
+            story.append(Paragraph(f"<b>{titre}:</b>", styles['normal']))
+            story.append(Paragraph(texte, styles['body']))
+
+        if not contenu['details']:
+            story.append(Paragraph("Aucun détail technique renseigné.", styles['normal']))
+
+        story.append(Spacer(1, 0.6 * inch))
+
+        # ==================== SIGNATURE ====================
+        signature = theme.image('signature')
+        if signature:
+            signature_table = Table([[signature]], colWidths=[7.5 * inch])
+            signature_table.setStyle(tableaux['aligne_droite'])
+            story.append(signature_table)
+        else:
+            # Ligne de signature textuelle
+            story.append(Paragraph("_____________________________", styles['signature_line']))
+        story.append(Spacer(1, 0.05 * inch))
+
+        story.append(Paragraph("<b>Administrateur Solar Maintenance</b>", styles['signature']))
+        # Pas de date de génération : le même fichier est servi tant que le contenu ne change pas
+        story.append(Spacer(1, 0.5 * inch))
+
+        # ==================== QR CODE ====================
+        try:
+            qr_image = Image(InterventionPDFService._qr_code(contenu['url']), width=1 * inch, height=1 * inch)
+        except Exception:
+            # Si le QR code échoue, afficher l'URL en texte
+            story.append(Paragraph(f"<i>URL de l'intervention:</i><br/>{contenu['url']}", styles['small']))
+        else:
+            qr_table = Table([[qr_image, Paragraph(
+                f"<b>Scanner pour voir les détails</b><br/>ID: #{contenu['id']}<br/>{contenu['date']}",
+                styles['small']
+            )]], colWidths=[1 * inch, 5.5 * inch])
+            qr_table.setStyle(tableaux['image_texte'])
+            story.append(qr_table)
+
+        return story
+
+    @staticmethod
+    def _document(buffer):
+        return SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=50,
+            leftMargin=50,
+            topMargin=30,
+            bottomMargin=50
+        )
+
+    @staticmethod
+    def generer(contenu):
+        """Construit le PDF (bytes) à partir du contenu ; n'accède pas à la base"""
+        buffer = io.BytesIO()
+        InterventionPDFService._document(buffer).build(InterventionPDFService._story(contenu))
+        return buffer.getvalue()
+
+    # ==================== CACHE ====================
+
+    @staticmethod
+    def chemin(intervention_pk, contenu):
+        return InterventionPDFService.CACHE.chemin(intervention_pk, contenu)
+
+    @staticmethod
+    def ecrire(contenu, chemin):
+        """Génère le PDF dans le cache"""
+        InterventionPDFService.CACHE.ecrire(chemin, InterventionPDFService.generer(contenu))
+
+    @staticmethod
+    def obtenir(intervention):
+        """Chemin du PDF à jour de l'intervention, généré seulement si son contenu a changé"""
+        contenu = InterventionPDFService.contenu(intervention)
+        return InterventionPDFService.CACHE.obtenir(intervention.pk, contenu, InterventionPDFService.generer)
+
+    @staticmethod
+    def invalider(intervention_pk):
+        """Supprime les PDF en cache de l'intervention"""
+        InterventionPDFService.CACHE.invalider(intervention_pk)
+
+    @staticmethod
+    def purger():
+        """Supprime les PDF qui ne servent plus (voir CachePDF.purger)"""
+        return InterventionPDFService.CACHE.purger()
+
+    @staticmethod
+    def reponse(intervention):
+        """Téléchargement du PDF à jour de l'intervention"""
+        return InterventionPDFService.CACHE.reponse(
+            intervention.pk, InterventionPDFService.contenu(intervention), InterventionPDFService.generer,
+            f"rapport_intervention_{intervention.id}.pdf"
+        )
+
+    # ==================== EXPORT EN LOT ====================
+
+    @staticmethod
+    def url_intervention(intervention_pk):
+        """Adresse de l'intervention sur le site (QR code), la même pour toutes les requêtes"""
+        try:
+            domaine = Site.objects.get_current().domain
+        except Site.DoesNotExist:
+            domaine = 'localhost:8000'
+        return f"http://{domaine}{reverse('interventions:detail', args=[intervention_pk])}"
+
+    @staticmethod
+    def _contenus(interventions):
+        interventions = interventions.select_related('client', 'technicien', 'fournisseur')
+        return [InterventionPDFService.contenu(intervention) for intervention in interventions]
+
+    @staticmethod
+    def exporter(interventions, processus=None, suivi=None):
+        """
+        Met en cache les PDF des interventions, les manquants étant générés en
+        parallèle (ProcessPoolExecutor, styles et images préparés une fois par
+        processus). suivi(generes, a_generer) est appelé après chaque PDF généré.
+        Renvoie la liste (contenu, chemin) et les statistiques de débit.
+        """
+        fichiers, a_generer = [], []
+        for contenu in InterventionPDFService._contenus(interventions):
+            chemin = InterventionPDFService.chemin(contenu['id'], contenu)
+            fichiers.append((contenu, chemin))
+            if not os.path.exists(chemin):
+                a_generer.append((contenu, chemin))
+
+        processus = max(1, min(processus or os.cpu_count() or 1, len(a_generer) or 1))
+        debut = time.perf_counter()
+
+        if processus == 1:
+            resultats = (generer_fichier(contenu, chemin) for contenu, chemin in a_generer)
+        else:
+            # Les processus fils ne doivent pas hériter des connexions à la base
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=processus, initializer=initialiser_worker)
+            resultats = pool.map(
+                generer_fichier,
+                [contenu for contenu, _ in a_generer],
+                [chemin for _, chemin in a_generer],
+                chunksize=max(1, len(a_generer) // (processus * 4))
+            )
+
+        try:
+            for generes, _ in enumerate(resultats, 1):
+                if suivi:
+                    suivi(generes, len(a_generer))
+        finally:
+            if processus > 1:
+                pool.shutdown()
+
+        return fichiers, InterventionPDFService._debit(len(fichiers), len(a_generer), processus, debut)
+
+    @staticmethod
+    def _debit(total, generes, processus, debut):
+        duree = time.perf_counter() - debut
+        par_seconde = generes / duree if generes and duree else 0
+        return {
+            'total': total,
+            'generes': generes,
+            'en_cache': total - generes,
+            'processus': processus,
+            'duree': duree,
+            'pdf_par_seconde': par_seconde,
+            'pdf_par_seconde_par_coeur': par_seconde / processus,
+        }
+
+    @staticmethod
+    def decrire_debit(debit):
+        return (
+            f"{debit['total']} PDF ({debit['generes']} générés, {debit['en_cache']} en cache) "
+            f"en {debit['duree']:.1f} s sur {debit['processus']} processus : "
+            f"{debit['pdf_par_seconde']:.1f} PDF/s, {debit['pdf_par_seconde_par_coeur']:.1f} PDF/s par cœur"
+        )
+
+    @staticmethod
+    def _lire(contenu, chemin):
+        """PDF en cache ; s'il a été invalidé pendant l'export (intervention modifiée), il est régénéré"""
+        try:
+            with open(chemin, 'rb') as fichier:
+                return fichier.read()
+        except FileNotFoundError:
+            return InterventionPDFService.generer(contenu)
+
+    @staticmethod
+    def ecrire_zip(fichiers, sortie):
+        """Archive zip des PDF (déjà compressés : stockés tels quels)"""
+        with zipfile.ZipFile(sortie, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for contenu, chemin in fichiers:
+                archive.writestr(f"rapport_intervention_{contenu['id']}.pdf", InterventionPDFService._lire(contenu, chemin))
+
+    @staticmethod
+    def ecrire_fusionne(fichiers, sortie):
+        """
+        PDF unique : pages des PDF en cache mises bout à bout (chaque rapport
+        commence sur une nouvelle page). Les rapports sont générés en parallèle
+        par exporter() ; la fusion ne fait que recopier les pages.
+        """
+        document = PdfWriter()
+        for contenu, chemin in fichiers:
+            document.append(io.BytesIO(InterventionPDFService._lire(contenu, chemin)))
+        document.write(sortie)
+
+    # ==================== EXPORT EN ARRIÈRE-PLAN ====================
+
+    DOSSIER_EXPORTS = os.path.join('exports', 'interventions')
+
+    @staticmethod
+    def mettre_en_file(interventions, format, user):
+        """Enregistre une demande d'export ; le worker `traiter_exports_pdf` s'occupe du reste"""
+        return ExportPDF.objects.create(
+            format=format,
+            interventions=list(interventions.order_by('date_intervention', 'pk').values_list('pk', flat=True)),
+            requested_by=user,
+            message="En attente d'un worker disponible"
+        )
+
+    @staticmethod
+    def reserver_prochain_export():
+        """Réserve le plus ancien export en attente (plusieurs workers peuvent tourner en parallèle)"""
+        with transaction.atomic():
+            export = ExportPDF.objects.select_for_update(skip_locked=True).filter(
+                statut='en_attente'
+            ).order_by('created_at').first()
+
+            if export is None:
+                return None
+
+            export.statut = 'en_cours'
+            export.started_at = export.derniere_activite = timezone.now()
+            export.tentatives += 1
+            export.message = "Préparation de l'export"
+            export.save(update_fields=['statut', 'started_at', 'derniere_activite', 'tentatives', 'message'])
+            return export
+
+    @staticmethod
+    def recuperer_exports_abandonnes():
+        """
+        Exports « en cours » sans activité depuis ExportPDF.DELAI_INACTIVITE (worker
+        arrêté ou tué) : remis en file, ou en échec après MAX_TENTATIVES.
+        Renvoie le nombre d'exports remis en file et passés en échec.
+        """
+        maintenant = timezone.now()
+        abandonnes = ExportPDF.objects.filter(
+            statut='en_cours', derniere_activite__lt=maintenant - ExportPDF.DELAI_INACTIVITE
+        )
+
+        relances = abandonnes.filter(tentatives__lt=ExportPDF.MAX_TENTATIVES).update(
+            statut='en_attente',
+            message="Relancé : le worker précédent s'est arrêté"
+        )
+        echecs = abandonnes.update(
+            statut='echec',
+            erreur=f"Worker arrêté pendant l'export ({ExportPDF.MAX_TENTATIVES} tentatives)",
+            message="L'export a échoué",
+            finished_at=maintenant
+        )
+        return relances, echecs
+
+    @staticmethod
+    def chemin_export(export):
+        return os.path.join(settings.MEDIA_ROOT, export.fichier)
+
+    @staticmethod
+    def traiter(export, processus=None):
+        """Produit le fichier d'un export réservé et enregistre son état final"""
+        try:
+            debit = InterventionPDFService._produire(export, processus)
+        except Exception as e:
+            export.statut = 'echec'
+            export.erreur = str(e)
+            export.message = "L'export a échoué"
+            export.finished_at = timezone.now()
+            export.save(update_fields=['statut', 'erreur', 'message', 'finished_at'])
+            return None
+
+        export.statut = 'termine'
+        export.message = InterventionPDFService.decrire_debit(debit)[:255]
+        export.finished_at = timezone.now()
+        export.save(update_fields=['statut', 'fichier', 'message', 'finished_at'])
+        return debit
+
+    @staticmethod
+    def _produire(export, processus):
+        dernier_enregistrement = [0.0]
+
+        def suivi(generes, a_generer):
+            # Signe de vie du worker, au plus une fois par seconde
+            if time.monotonic() - dernier_enregistrement[0] >= 1 or generes == a_generer:
+                export.mettre_a_jour(f"{generes} / {a_generer} PDF générés")
+                dernier_enregistrement[0] = time.monotonic()
+
+        # Ordre de la demande (les identifiants des interventions supprimées depuis sont ignorés)
+        rang = {pk: i for i, pk in enumerate(export.interventions)}
+        fichiers, debit = InterventionPDFService.exporter(
+            Intervention.objects.filter(pk__in=export.interventions), processus=processus, suivi=suivi
+        )
+        fichiers.sort(key=lambda fichier: rang[fichier[0]['id']])
+        if not fichiers:
+            raise ValueError("Aucune des interventions demandées n'existe encore")
+
+        export.mettre_a_jour(f"Assemblage de {len(fichiers)} rapport(s)")
+        export.fichier = os.path.join(InterventionPDFService.DOSSIER_EXPORTS, export.nom_fichier)
+        chemin = InterventionPDFService.chemin_export(export)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+
+        # Écriture atomique : le lien de téléchargement ne sert jamais un fichier partiel
+        descripteur, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix='.tmp')
+        try:
+            with os.fdopen(descripteur, 'wb') as sortie:
+                if export.format == 'zip':
+                    InterventionPDFService.ecrire_zip(fichiers, sortie)
+                else:
+                    InterventionPDFService.ecrire_fusionne(fichiers, sortie)
+            os.replace(temporaire, chemin)
+        except BaseException:
+            os.unlink(temporaire)
+            raise
+        return debit
+
+    @staticmethod
+    def purger_exports():
+        """Supprime les exports terminés depuis plus de RETENTION, et leur fichier ; retourne leur nombre"""
+        expires = ExportPDF.objects.filter(finished_at__lt=timezone.now() - ExportPDF.RETENTION)
+        for export in expires.exclude(fichier=''):
+            try:
+                os.unlink(InterventionPDFService.chemin_export(export))
+            except FileNotFoundError:
+                pass
+        supprimes, _ = expires.delete()
+        return supprimes
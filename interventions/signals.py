@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+
+# Envoyé après InterventionQuerySet.transition() : les bulk_update ne déclenchent
+# pas post_save, les applications dépendantes (statistiques...) s'y abonnent.
+# Argument : interventions (liste des instances modifiées)
+statuts_modifies = Signal()
+
+
+@receiver(post_delete, sender='interventions.Intervention')
+def enregistrer_tombstone(sender, instance, **kwargs):
+    """Trace la suppression pour la synchronisation incrémentale du calendrier"""
+    from .models import InterventionTombstone
+    InterventionTombstone.enregistrer(instance.pk, instance.technicien_id)
+
+
+@receiver(post_save, sender='interventions.Intervention')
+def invalider_pdf(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    """Les PDF en cache de l'intervention ne correspondent plus à son contenu (champs imprimés modifiés)"""
+    from .pdf_service import InterventionPDFService
+    if created or raw:
+        return
+    if update_fields is not None and not InterventionPDFService.CHAMPS_IMPRIMES & set(update_fields):
+        return
+    InterventionPDFService.invalider(instance.pk)
+
+
+@receiver(post_delete, sender='interventions.Intervention')
+def supprimer_pdf(sender, instance, **kwargs):
+    from .pdf_service import InterventionPDFService
+    InterventionPDFService.invalider(instance.pk)
+
+
+@receiver(statuts_modifies)
+def invalider_pdf_statuts(sender, interventions, **kwargs):
+    from .pdf_service import InterventionPDFService
+    for intervention in interventions:
+        InterventionPDFService.invalider(intervention.pk)
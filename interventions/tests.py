@@ -1,3 +1,1097 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
 
-# Create your tests here.
+import io
+import os
+import tempfile
+import zipfile
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sites.models import Site
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.template.loader import get_template
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from clients.models import Client, Fournisseur
+from core.testing import creer_client, creer_intervention, creer_technicien
+from pypdf import PdfReader
+
+from .email_service import FileEmailsService, InterventionEmailService
+from stats.models import MonthlyInterventionStat
+from techniciens.models import Technicien
+from .models import (
+    EmailSortant, ExportPDF, Intervention, InterventionStatusEvent, InterventionTombstone, percentile,
+)
+from .pdf_service import InterventionPDFService
+
+
+class InterventionSaveRequetesTests(TestCase):
+    """
+    Nombre de requêtes d'un save() sur une intervention chargée depuis la base.
+    Avant le suivi de l'état initial : 4 requêtes sans changement de statut,
+    12 à 13 avec (relecture de l'intervention, de la ligne de statistiques...).
+    """
+
+    def setUp(self):
+        client = creer_client()
+        # Les lignes de statistiques des deux statuts existent déjà (cas courant)
+        creer_intervention(client, statut='terminee')
+        self.intervention = Intervention.objects.select_related('client').get(
+            pk=creer_intervention(client, statut='en_cours').pk
+        )
+
+    def test_save_sans_changement_de_statut(self):
+        self.intervention.notes = 'RAS'
+        # UPDATE de l'intervention, génération du cache statistique
+        with self.assertNumQueries(2):
+            self.intervention.save()
+
+    def test_save_avec_changement_de_statut(self):
+        self.intervention.statut = 'terminee'
+        # UPDATE de l'intervention, agrégats (retrait, lignes vides, ajout),
+        # génération du cache statistique, événement d'historique
+        with self.assertNumQueries(6):
+            self.intervention.save()
+
+        self.assertEqual(
+            list(self.intervention.evenements_statut.values_list('ancien_statut', 'nouveau_statut')),
+            [('', 'en_cours'), ('en_cours', 'terminee')]
+        )
+
+    def test_statut_precedent_sans_relecture(self):
+        """L'ancien statut vient de l'état mémorisé, même si la base a changé depuis le chargement"""
+        Intervention.objects.filter(pk=self.intervention.pk).update(statut='prevue')
+        self.intervention.statut = 'terminee'
+        self.intervention.save()
+
+        self.assertFalse(self.intervention.temps_en_cours)
+        self.assertEqual(self.intervention.evenements_statut.latest('timestamp').action, 'fin')
+
+    def test_instance_sans_etat_initial(self):
+        """Instance construite à la main : le statut précédent est relu en base"""
+        intervention = Intervention.objects.get(pk=self.intervention.pk)
+        del intervention._etat_initial
+        intervention.statut = 'terminee'
+        intervention.save()
+
+        self.assertEqual(intervention.evenements_statut.latest('timestamp').action, 'fin')
+
+
+class InterventionTombstoneTests(TestCase):
+
+    def setUp(self):
+        self.expiree = InterventionTombstone.objects.create(intervention_pk=1, technicien_pk=None)
+        InterventionTombstone.objects.filter(pk=self.expiree.pk).update(
+            date_suppression=timezone.now() - InterventionTombstone.RETENTION - timedelta(days=1)
+        )
+
+    def test_enregistrer_ne_purge_pas(self):
+        with self.assertNumQueries(1):
+            InterventionTombstone.enregistrer(2, None)
+        self.assertTrue(InterventionTombstone.objects.filter(pk=self.expiree.pk).exists())
+
+    def test_suppression_trace_le_retrait(self):
+        intervention = creer_intervention()
+        pk = intervention.pk
+        intervention.delete()
+
+        self.assertTrue(InterventionTombstone.objects.filter(intervention_pk=pk, motif='suppression').exists())
+
+    def test_purge_par_le_worker(self):
+        recente = InterventionTombstone.objects.create(intervention_pk=3, technicien_pk=None)
+
+        call_command('envoyer_emails', '--une-fois', stdout=StringIO())
+
+        self.assertEqual(list(InterventionTombstone.objects.values_list('pk', flat=True)), [recente.pk])
+
+
+class InterventionTransitionTests(TestCase):
+    """Changements de statut en masse : InterventionQuerySet.transition, actions d'admin, commande"""
+
+    def setUp(self):
+        self.client_solaire = creer_client()
+        self.debut = timezone.now() - timedelta(hours=3)
+
+    def creer(self, nombre, statut='en_cours', **kwargs):
+        interventions = [
+            creer_intervention(self.client_solaire, statut=statut, **kwargs) for _ in range(nombre)
+        ]
+        if statut == 'en_cours':
+            Intervention.objects.filter(pk__in=[i.pk for i in interventions]).update(
+                dernier_debut_en_cours=self.debut, duree_cumulee=timedelta(hours=1)
+            )
+        return interventions
+
+    def test_sortie_de_en_cours_cumule_la_duree(self):
+        interventions = self.creer(3)
+        fin = self.debut + timedelta(hours=2)
+
+        Intervention.objects.filter(pk__in=[i.pk for i in interventions]).transition('terminee', at=fin)
+
+        for intervention in Intervention.objects.filter(pk__in=[i.pk for i in interventions]):
+            self.assertEqual(intervention.statut, 'terminee')
+            self.assertEqual(intervention.duree_cumulee, timedelta(hours=3))
+            self.assertIsNone(intervention.dernier_debut_en_cours)
+            self.assertFalse(intervention.temps_en_cours)
+
+    def test_un_evenement_par_intervention(self):
+        interventions = self.creer(3)
+        InterventionStatusEvent.objects.all().delete()
+        fin = self.debut + timedelta(hours=2)
+
+        Intervention.objects.all().transition('terminee', at=fin)
+
+        evenements = InterventionStatusEvent.objects.order_by('intervention_id')
+        self.assertEqual([e.intervention_id for e in evenements], [i.pk for i in interventions])
+        for evenement in evenements:
+            self.assertEqual((evenement.action, evenement.ancien_statut, evenement.nouveau_statut),
+                             ('fin', 'en_cours', 'terminee'))
+            self.assertEqual(evenement.timestamp, fin)
+            self.assertEqual(evenement.duree, timedelta(hours=2))
+
+    def test_passage_en_cours_demarre_le_comptage(self):
+        self.creer(2, statut='prevue')
+        debut = timezone.now() - timedelta(minutes=10)
+
+        Intervention.objects.transition('en_cours', at=debut)
+
+        for intervention in Intervention.objects.all():
+            self.assertTrue(intervention.temps_en_cours)
+            self.assertEqual(intervention.dernier_debut_en_cours, debut)
+
+    def test_interventions_deja_au_statut_ignorees(self):
+        deja_terminee = self.creer(1, statut='terminee')[0]
+        self.creer(2)
+        InterventionStatusEvent.objects.all().delete()
+        date_modification = Intervention.objects.get(pk=deja_terminee.pk).date_modification
+
+        self.assertEqual(Intervention.objects.transition('terminee'), 2)
+        self.assertEqual(Intervention.objects.get(pk=deja_terminee.pk).date_modification, date_modification)
+        self.assertFalse(InterventionStatusEvent.objects.filter(intervention=deja_terminee).exists())
+        self.assertEqual(Intervention.objects.transition('terminee'), 0)
+
+    def test_date_modification_reste_l_heure_reelle(self):
+        """Un `at` passé ne doit pas antidater la modification (synchronisation du calendrier)"""
+        self.creer(2)
+        avant = timezone.now()
+
+        Intervention.objects.transition('terminee', at=self.debut + timedelta(hours=1))
+
+        for intervention in Intervention.objects.all():
+            self.assertGreaterEqual(intervention.date_modification, avant)
+
+    def test_nombre_de_requetes_independant_du_nombre_d_interventions(self):
+        self.creer(2)
+        with CaptureQueriesContext(connection) as peu:
+            Intervention.objects.transition('terminee')
+
+        self.creer(8)
+        with CaptureQueriesContext(connection) as beaucoup:
+            Intervention.objects.transition('terminee')
+
+        self.assertEqual(len(beaucoup), len(peu))
+
+    def test_statistiques_mensuelles_recalculees(self):
+        self.creer(3)
+
+        Intervention.objects.transition('terminee')
+
+        lignes = MonthlyInterventionStat.objects.filter(intervention_count__gt=0)
+        self.assertEqual([(l.statut, l.intervention_count) for l in lignes], [('terminee', 3)])
+
+    def test_pdf_en_cache_invalides(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        intervention = self.creer(1)[0]
+
+        with override_settings(MEDIA_ROOT=media.name):
+            InterventionPDFService.obtenir(intervention)
+            dossier = InterventionPDFService.CACHE.dossier(intervention.pk)
+            self.assertEqual(len(os.listdir(dossier)), 1)
+
+            Intervention.objects.transition('terminee')
+
+            self.assertFalse(os.path.isdir(dossier) and os.listdir(dossier))
+
+    def test_actions_d_admin(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.sn', 'x'))
+        interventions = self.creer(2, statut='prevue')
+        # Recherche : jointure externe sur client / technicien (voir select_for_update(of=...))
+        url = reverse('admin:interventions_intervention_changelist') + '?q=Client'
+
+        for action, statut in [('marquer_en_cours', 'en_cours'), ('marquer_terminees', 'terminee'),
+                               ('marquer_prevues', 'prevue'), ('marquer_annulees', 'annulee')]:
+            with self.subTest(action=action):
+                reponse = self.client.post(url, {
+                    'action': action,
+                    '_selected_action': [i.pk for i in interventions],
+                }, follow=True)
+
+                self.assertEqual(reponse.status_code, 200)
+                self.assertEqual(
+                    set(Intervention.objects.values_list('statut', flat=True)), {statut}
+                )
+                self.assertIn('2 intervention(s) passée(s)', str(list(reponse.context['messages'])[0]))
+
+        self.assertEqual(Intervention.objects.get(pk=interventions[0].pk).evenements_statut.count(), 2)
+
+    def test_commande(self):
+        interventions = self.creer(2)
+        autre = self.creer(1, statut='prevue')[0]
+        sortie = StringIO()
+
+        call_command('changer_statut_interventions', 'terminee', '--depuis', 'en_cours', stdout=sortie)
+
+        self.assertIn('2 intervention(s)', sortie.getvalue())
+        self.assertEqual(
+            set(Intervention.objects.filter(pk__in=[i.pk for i in interventions]).values_list('statut', flat=True)),
+            {'terminee'}
+        )
+        self.assertEqual(Intervention.objects.get(pk=autre.pk).statut, 'prevue')
+
+    def test_commande_dry_run(self):
+        self.creer(2)
+        sortie = StringIO()
+
+        call_command('changer_statut_interventions', 'terminee', '--ids',
+                     *[str(pk) for pk in Intervention.objects.values_list('pk', flat=True)],
+                     '--dry-run', stdout=sortie)
+
+        self.assertIn('2 intervention(s) seraient passées', sortie.getvalue())
+        self.assertFalse(Intervention.objects.filter(statut='terminee').exists())
+
+    def test_commande_sans_filtre(self):
+        with self.assertRaises(CommandError):
+            call_command('changer_statut_interventions', 'terminee', stdout=StringIO())
+
+
+class InterventionDureesTests(TestCase):
+    """Durées calculées en base : avec_duree_totale et statistiques_durees"""
+
+    def setUp(self):
+        self.client_solaire = creer_client()
+
+    def creer(self, heures, statut='terminee', **kwargs):
+        intervention = creer_intervention(self.client_solaire, statut=statut)
+        Intervention.objects.filter(pk=intervention.pk).update(duree_cumulee=timedelta(hours=heures), **kwargs)
+        return intervention
+
+    def creer_en_cours(self, heures_cumulees, depuis_heures):
+        return self.creer(
+            heures_cumulees, statut='en_cours', temps_en_cours=True,
+            dernier_debut_en_cours=timezone.now() - timedelta(hours=depuis_heures)
+        )
+
+    def test_duree_totale_compte_le_temps_en_cours(self):
+        en_cours = self.creer_en_cours(1, depuis_heures=2)
+        terminee = self.creer(4)
+
+        durees = dict(Intervention.objects.avec_duree_totale().values_list('pk', 'duree_totale'))
+
+        self.assertAlmostEqual(durees[en_cours.pk], timedelta(hours=3), delta=timedelta(minutes=1))
+        self.assertEqual(durees[terminee.pk], timedelta(hours=4))
+        self.assertAlmostEqual(
+            durees[en_cours.pk], Intervention.objects.get(pk=en_cours.pk).get_duree_totale(),
+            delta=timedelta(minutes=1)
+        )
+
+    def test_comptage_arrete_ignore_le_dernier_debut(self):
+        intervention = self.creer(2, temps_en_cours=False, dernier_debut_en_cours=timezone.now() - timedelta(hours=5))
+
+        self.assertEqual(
+            Intervention.objects.avec_duree_totale().get(pk=intervention.pk).duree_totale, timedelta(hours=2)
+        )
+
+    def test_statistiques(self):
+        for heures in range(1, 11):
+            self.creer(heures)
+        self.creer(0)  # durée nulle : exclue
+
+        stats = Intervention.objects.statistiques_durees()
+
+        self.assertEqual(stats['nombre'], 10)
+        self.assertEqual(stats['minimum'], timedelta(hours=1))
+        self.assertEqual(stats['maximum'], timedelta(hours=10))
+        self.assertEqual(stats['moyenne'], timedelta(hours=5, minutes=30))
+        self.assertEqual(stats['mediane'], timedelta(hours=5, minutes=30))
+        self.assertEqual(stats['p90'], timedelta(hours=9, minutes=6))
+
+    def test_statistiques_avec_intervention_en_cours(self):
+        self.creer(1)
+        self.creer_en_cours(0, depuis_heures=5)
+
+        stats = Intervention.objects.statistiques_durees()
+
+        self.assertEqual(stats['nombre'], 2)
+        self.assertAlmostEqual(stats['maximum'], timedelta(hours=5), delta=timedelta(minutes=1))
+        self.assertAlmostEqual(stats['mediane'], timedelta(hours=3), delta=timedelta(minutes=1))
+
+    def test_statistiques_sans_duree(self):
+        self.creer(0)
+
+        stats = Intervention.objects.statistiques_durees()
+
+        self.assertEqual(stats['nombre'], 0)
+        self.assertIsNone(stats['mediane'])
+        self.assertIsNone(stats['p90'])
+
+    @skipUnless(connection.vendor == 'postgresql', "percentile_cont : PostgreSQL uniquement")
+    def test_percentiles_en_une_requete(self):
+        for heures in (1, 2, 4):
+            self.creer(heures)
+
+        with self.assertNumQueries(1):
+            stats = Intervention.objects.statistiques_durees()
+
+        self.assertEqual(stats['mediane'], timedelta(hours=2))
+        self.assertEqual(stats['p90'], percentile([timedelta(hours=h) for h in (1, 2, 4)], 0.9))
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([3], 0.9), 3)
+        self.assertEqual(percentile([1, 2, 3, 4], 0.5), 2.5)
+        self.assertAlmostEqual(percentile(list(range(1, 11)), 0.9), 9.1)
+
+
+class CalendarEventsTests(TestCase):
+    """Revalidation des événements du calendrier (ETag / Last-Modified)"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.sn', 'x'))
+        self.intervention = creer_intervention(statut='prevue')
+        self.url = reverse('interventions:calendar_events')
+
+    def test_304_sur_le_meme_etag(self):
+        premiere = self.client.get(self.url)
+        self.assertEqual(premiere.status_code, 200)
+        self.assertEqual([e['id'] for e in premiere.json()], [self.intervention.pk])
+        self.assertIn('Last-Modified', premiere)
+
+        seconde = self.client.get(self.url, HTTP_IF_NONE_MATCH=premiere['ETag'])
+
+        self.assertEqual(seconde.status_code, 304)
+        self.assertEqual(seconde.content, b'')
+        self.assertEqual(seconde['ETag'], premiere['ETag'])
+
+    def test_etag_change_apres_modification(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.intervention.statut = 'en_cours'
+        self.intervention.save()
+        reponse = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertNotEqual(reponse['ETag'], etag)
+        self.assertEqual(reponse.json()[0]['extendedProps']['statut'], 'En cours')
+
+    def test_etag_change_apres_suppression(self):
+        creer_intervention(self.intervention.client)
+        etag = self.client.get(self.url)['ETag']
+
+        self.intervention.delete()
+        reponse = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(len(reponse.json()), 1)
+
+
+class CalendarDeltaTests(TestCase):
+    """Synchronisation incrémentale du calendrier (curseur, rechargement, retraits)"""
+
+    def setUp(self):
+        self.url = reverse('interventions:calendar_delta')
+        self.admin = User.objects.create_superuser('admin', 'admin@test.sn', 'x')
+        self.techniciens = [
+            creer_technicien(numero, user=User.objects.create_user(f'tech{numero}'))
+            for numero in (1, 2)
+        ]
+        self.client_solaire = creer_client()
+        self.interventions = [
+            creer_intervention(self.client_solaire, statut='prevue', technicien=technicien)
+            for technicien in self.techniciens
+        ]
+        self.vieillir()
+
+    def vieillir(self, il_y_a=timedelta(hours=2)):
+        """Antidate toutes les modifications : seules les suivantes seront synchronisées"""
+        date = timezone.now() - il_y_a
+        for modele in (Intervention, Client, Technicien):
+            modele.objects.update(date_modification=date)
+
+    def delta(self, utilisateur, curseur=None):
+        self.client.force_login(utilisateur)
+        parametres = {'curseur': curseur.isoformat()} if curseur else {}
+        reponse = self.client.get(self.url, parametres)
+        self.assertEqual(reponse.status_code, 200)
+        return reponse.json()
+
+    def ids(self, reponse):
+        return sorted(e['id'] for e in reponse['evenements'])
+
+    def test_sans_curseur(self):
+        reponse = self.delta(self.admin)
+
+        self.assertFalse(reponse['reinitialiser'])
+        self.assertEqual(reponse['evenements'], [])
+        self.assertTrue(reponse['curseur'])
+
+    def test_progression_du_curseur(self):
+        premiere, seconde = self.interventions
+        Intervention.objects.filter(pk=seconde.pk).update(date_modification=timezone.now() - timedelta(minutes=10))
+
+        reponse = self.delta(self.admin, timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.ids(reponse), [seconde.pk])
+
+        curseur = datetime.fromisoformat(reponse['curseur'])
+        self.assertEqual(self.ids(self.delta(self.admin, curseur)), [])
+
+        premiere.notes = 'Batterie à contrôler'
+        premiere.save()
+        self.assertEqual(self.ids(self.delta(self.admin, curseur)), [premiere.pk])
+
+    def test_changement_de_nom_du_client(self):
+        curseur = timezone.now() - timedelta(hours=1)
+        self.client_solaire.nom = 'Client renommé'
+        self.client_solaire.save()
+
+        reponse = self.delta(self.admin, curseur)
+
+        self.assertEqual(self.ids(reponse), [i.pk for i in self.interventions])
+        self.assertTrue(all(e['extendedProps']['client'] == 'Client renommé' for e in reponse['evenements']))
+
+    def test_reinitialiser(self):
+        for curseur in [(timezone.now() - InterventionTombstone.RETENTION - timedelta(hours=1)).isoformat(),
+                        'pas-une-date']:
+            with self.subTest(curseur=curseur):
+                self.client.force_login(self.admin)
+                reponse = self.client.get(self.url, {'curseur': curseur}).json()
+
+                self.assertTrue(reponse['reinitialiser'])
+                self.assertEqual(reponse['evenements'], [])
+                self.assertEqual(reponse['supprimes'], [])
+
+    def test_technicien_ne_voit_que_ses_interventions(self):
+        self.vieillir(il_y_a=timedelta(0))
+        curseur = timezone.now() - timedelta(hours=1)
+
+        for technicien, intervention in zip(self.techniciens, self.interventions):
+            with self.subTest(technicien=technicien.nom):
+                self.assertEqual(self.ids(self.delta(technicien.user, curseur)), [intervention.pk])
+        self.assertEqual(self.ids(self.delta(self.admin, curseur)), [i.pk for i in self.interventions])
+
+    def test_reaffectation_retiree_du_calendrier_de_l_ancien_technicien(self):
+        ancien, nouveau = self.techniciens
+        intervention = self.interventions[0]
+        curseur = timezone.now() - timedelta(hours=1)
+
+        intervention = Intervention.objects.get(pk=intervention.pk)
+        intervention.technicien = nouveau
+        intervention.save()
+
+        reponse = self.delta(ancien.user, curseur)
+        self.assertEqual(reponse['evenements'], [])
+        self.assertEqual(reponse['supprimes'], [intervention.pk])
+
+        reponse = self.delta(nouveau.user, curseur)
+        self.assertEqual(self.ids(reponse), [intervention.pk])
+        self.assertEqual(reponse['supprimes'], [])
+
+        # L'administrateur voit toujours l'intervention : la réaffectation n'est pas un retrait
+        reponse = self.delta(self.admin, curseur)
+        self.assertEqual(self.ids(reponse), [intervention.pk])
+        self.assertEqual(reponse['supprimes'], [])
+
+
+class RefusBackend(EmailBackend):
+    """Boîte locmem qui refuse les messages destinés à refus@test.sn"""
+
+    def send_messages(self, messages):
+        if any('refus@test.sn' in message.to for message in messages):
+            raise ConnectionResetError("Destinataire refusé")
+        return super().send_messages(messages)
+
+
+class ServeurInjoignableBackend(EmailBackend):
+
+    def open(self):
+        raise ConnectionRefusedError("Serveur d'envoi injoignable")
+
+
+class FileEmailsTests(TestCase):
+    """Boîte d'envoi : un lot par connexion, nouvelles tentatives espacées, abandon après MAX_TENTATIVES"""
+
+    def mettre_en_file(self, destinataire='client@test.sn'):
+        return FileEmailsService.mettre_en_file('Sujet', ('<p>Bonjour</p>', 'Bonjour'), [destinataire])
+
+    def envoyer(self):
+        return FileEmailsService.envoyer_lot(FileEmailsService.reserver_lot())
+
+    def test_lot_envoye(self):
+        for _ in range(3):
+            self.mettre_en_file()
+
+        self.assertEqual(self.envoyer(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0].content, '<p>Bonjour</p>')
+        self.assertEqual(
+            set(EmailSortant.objects.values_list('statut', 'tentatives')), {('envoye', 1)}
+        )
+
+    @override_settings(EMAIL_BACKEND='interventions.tests.RefusBackend')
+    def test_echec_n_interrompt_pas_le_lot(self):
+        self.mettre_en_file()
+        refuse = self.mettre_en_file('refus@test.sn')
+        self.mettre_en_file()
+        avant = timezone.now()
+
+        self.assertEqual(self.envoyer(), (2, 1))
+
+        refuse.refresh_from_db()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual((refuse.statut, refuse.tentatives), ('en_attente', 1))
+        self.assertEqual(refuse.erreur, 'ConnectionResetError: Destinataire refusé')
+        self.assertGreaterEqual(refuse.prochaine_tentative, avant + EmailSortant.DELAI_INITIAL)
+
+    def test_delai_double_et_plafonne(self):
+        self.assertEqual(
+            [EmailSortant.delai_apres(tentatives) for tentatives in range(1, 9)],
+            [timedelta(minutes=minutes) for minutes in (1, 2, 4, 8, 16, 32, 60, 60)]
+        )
+
+    @override_settings(EMAIL_BACKEND='interventions.tests.ServeurInjoignableBackend')
+    def test_nouvelle_tentative_apres_le_delai(self):
+        email = self.mettre_en_file()
+
+        self.assertEqual(self.envoyer(), (0, 1))
+        # Pas de nouvelle tentative avant le délai
+        self.assertEqual(FileEmailsService.reserver_lot(), [])
+
+        EmailSortant.objects.filter(pk=email.pk).update(prochaine_tentative=timezone.now())
+        self.assertEqual([e.pk for e in FileEmailsService.reserver_lot()], [email.pk])
+
+    @override_settings(EMAIL_BACKEND='interventions.tests.ServeurInjoignableBackend')
+    def test_abandon_apres_max_tentatives(self):
+        email = self.mettre_en_file()
+
+        for tentative in range(1, EmailSortant.MAX_TENTATIVES + 1):
+            self.assertEqual(self.envoyer(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.tentatives, tentative)
+            # Le délai est écoulé
+            EmailSortant.objects.filter(pk=email.pk).update(prochaine_tentative=timezone.now())
+
+        self.assertEqual(email.statut, 'echec')
+        self.assertEqual(email.erreur, "ConnectionRefusedError: Serveur d'envoi injoignable")
+        self.assertEqual(FileEmailsService.reserver_lot(), [])
+
+    def test_reservation_par_un_worker_arrete(self):
+        """Un message réservé n'est repris qu'après DUREE_RESERVATION"""
+        email = self.mettre_en_file()
+        FileEmailsService.reserver_lot()
+
+        self.assertEqual(FileEmailsService.reserver_lot(), [])
+        EmailSortant.objects.filter(pk=email.pk).update(
+            prochaine_tentative=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual([e.tentatives for e in FileEmailsService.reserver_lot()], [2])
+
+
+class NotificationsTests(TestCase):
+
+    # Assez peu pour une seule insertion groupée, quelle que soit la base
+    NOMBRE = 20
+
+    def setUp(self):
+        client = creer_client()
+        technicien = creer_technicien(nom='Moussa Sall')
+        for _ in range(self.NOMBRE):
+            creer_intervention(client, technicien=technicien, statut='prevue')
+        self.interventions = list(Intervention.objects.select_related('client', 'technicien'))
+
+    def test_domaine_du_site_courant(self):
+        """Domaine lu via le cache de Django, vidé par Django quand le Site change"""
+        Site.objects.update_or_create(pk=settings.SITE_ID, defaults={'domain': 'ancien.sn', 'name': 'Solar'})
+        Site.objects.get_current()  # En cache
+        site = Site.objects.get(pk=settings.SITE_ID)
+        site.domain = 'solar.sn'
+        site.save()
+        intervention = self.interventions[0]
+
+        self.assertEqual(InterventionEmailService.get_base_context(intervention)['domain'], 'solar.sn')
+        self.assertTrue(InterventionPDFService.url_intervention(intervention.pk).startswith('http://solar.sn/'))
+
+        site.delete()
+        self.assertEqual(InterventionEmailService.get_base_context(intervention)['domain'], 'localhost:8000')
+
+    def requetes_des_rappels(self):
+        """Requêtes SQL de envoyer_rappels_24h, hors points de sauvegarde de la transaction"""
+        with CaptureQueriesContext(connection) as requetes:
+            rappelees = InterventionEmailService.envoyer_rappels_24h(self.interventions)
+        self.assertEqual(len(rappelees), self.NOMBRE)
+        return [
+            requete['sql'] for requete in requetes
+            if not requete['sql'].upper().startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+        ]
+
+    def test_rappels_24h_une_insertion_et_une_mise_a_jour(self):
+        Site.objects.get_current()  # En cache
+
+        requetes = self.requetes_des_rappels()
+
+        self.assertEqual(len(requetes), 2, requetes)
+        self.assertTrue(requetes[0].startswith('INSERT INTO "interventions_emailsortant"'))
+        self.assertTrue(requetes[1].startswith('UPDATE "interventions_intervention"'))
+        self.assertEqual(EmailSortant.objects.count(), self.NOMBRE)
+        self.assertFalse(Intervention.objects.filter(rappel_envoye=False).exists())
+
+    def test_rappels_24h_site_lu_une_fois(self):
+        Site.objects.clear_cache()
+
+        requetes = self.requetes_des_rappels()
+
+        self.assertEqual(len(requetes), 3, requetes)
+        self.assertIn('django_site', requetes[0])
+
+    @override_settings(DEBUG=False)
+    def test_templates_compiles_une_fois(self):
+        """Template compilé une fois par processus (le débit se mesure avec mesurer_notifications)"""
+        with mock.patch.dict(InterventionEmailService._templates, clear=True), \
+                mock.patch('interventions.email_service.get_template', wraps=get_template) as charger:
+            InterventionEmailService.envoyer_rappels_24h(self.interventions)
+            InterventionEmailService.envoyer_rappels_24h(self.interventions)
+
+        self.assertEqual([appel.args[0] for appel in charger.call_args_list], ['interventions/emails/rappel_24h.html'])
+
+
+@override_settings(ALLOWED_HOSTS=['localhost', '127.0.0.1'])
+class InterventionPDFCacheTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        reglages = override_settings(MEDIA_ROOT=media.name, PDF_SENDFILE_HEADER='')
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.intervention = creer_intervention(statut='terminee')
+
+    def fichiers_en_cache(self):
+        dossier = InterventionPDFService.CACHE.dossier(self.intervention.pk)
+        return sorted(os.listdir(dossier)) if os.path.isdir(dossier) else []
+
+    def telecharger(self, utilisateur, hote):
+        self.client.force_login(utilisateur)
+        reponse = self.client.get(reverse('interventions:pdf', args=[self.intervention.pk]), HTTP_HOST=hote)
+        self.assertEqual(reponse.status_code, 200)
+        return b''.join(reponse.streaming_content)
+
+    def test_meme_pdf_pour_tous_les_utilisateurs_et_hotes(self):
+        premier = self.telecharger(User.objects.create_superuser('a', 'a@test.sn', 'x'), 'localhost')
+        second = self.telecharger(User.objects.create_superuser('b', 'b@test.sn', 'x'), '127.0.0.1')
+
+        self.assertEqual(premier, second)
+        self.assertEqual(len(self.fichiers_en_cache()), 1)
+
+    def test_intervention_en_cours_meme_pdf_dans_le_temps(self):
+        """Le temps écoulé n'est pas imprimé : pas de nouveau PDF à chaque téléchargement"""
+        intervention = creer_intervention(creer_client(1), statut='en_cours')
+        premier = InterventionPDFService.obtenir(intervention)
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(hours=2)):
+            second = InterventionPDFService.obtenir(intervention)
+
+        self.assertEqual(premier, second)
+        self.assertEqual(len(os.listdir(InterventionPDFService.CACHE.dossier(intervention.pk))), 1)
+
+    def test_enregistrement_sans_champ_imprime(self):
+        InterventionPDFService.obtenir(self.intervention)
+        self.intervention.rappel_envoye = True
+        self.intervention.save(update_fields=['rappel_envoye'])
+
+        self.assertEqual(len(self.fichiers_en_cache()), 1)
+
+    def test_modification_imprimee_invalide(self):
+        InterventionPDFService.obtenir(self.intervention)
+        self.intervention.notes = 'Onduleur remplacé'
+        self.intervention.save()
+
+        self.assertEqual(self.fichiers_en_cache(), [])
+
+
+class ExportPDFTests(TestCase):
+    """Exports en lot : l'action d'admin met en file, le worker produit le fichier"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        reglages = override_settings(MEDIA_ROOT=media.name)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.admin = User.objects.create_superuser('admin', 'admin@test.sn', 'x')
+        self.client.force_login(self.admin)
+        client = creer_client()
+        self.interventions = [
+            creer_intervention(client, statut='terminee', date_intervention=timezone.now() - timedelta(days=i))
+            for i in range(3)
+        ]
+
+    def exporter(self, format):
+        return self.client.post(reverse('admin:interventions_intervention_changelist'), {
+            'action': 'exporter_pdf_zip' if format == 'zip' else 'exporter_pdf_fusionne',
+            '_selected_action': [intervention.pk for intervention in self.interventions],
+        })
+
+    def traiter(self):
+        call_command('traiter_exports_pdf', '--une-fois', '--processus', '1', stdout=StringIO())
+
+    def telecharger(self, export):
+        reponse = self.client.get(reverse('interventions:export_pdf_telecharger', args=[export.pk]))
+        self.assertEqual(reponse.status_code, 200)
+        return b''.join(reponse.streaming_content)
+
+    def test_action_admin_met_en_file_sans_generer(self):
+        reponse = self.exporter('zip')
+
+        export = ExportPDF.objects.get()
+        self.assertRedirects(reponse, reverse('interventions:export_pdf', args=[export.pk]))
+        self.assertEqual(export.statut, 'en_attente')
+        # Ordre chronologique, comme la commande exporter_pdf_interventions
+        self.assertEqual(export.interventions, [intervention.pk for intervention in reversed(self.interventions)])
+        self.assertFalse(os.path.exists(InterventionPDFService.CACHE.dossier(self.interventions[0].pk)))
+
+    def test_export_zip(self):
+        self.exporter('zip')
+        self.traiter()
+
+        export = ExportPDF.objects.get()
+        self.assertEqual(export.statut, 'termine')
+        self.assertContains(
+            self.client.get(reverse('interventions:export_pdf', args=[export.pk])),
+            reverse('interventions:export_pdf_telecharger', args=[export.pk])
+        )
+        archive = zipfile.ZipFile(io.BytesIO(self.telecharger(export)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted(f"rapport_intervention_{intervention.pk}.pdf" for intervention in self.interventions)
+        )
+
+    def test_export_fusionne(self):
+        pages = sum(
+            len(PdfReader(io.BytesIO(InterventionPDFService.generer(InterventionPDFService.contenu(intervention)))).pages)
+            for intervention in self.interventions
+        )
+        self.exporter('pdf')
+        self.traiter()
+
+        document = PdfReader(io.BytesIO(self.telecharger(ExportPDF.objects.get())))
+        self.assertEqual(len(document.pages), pages)
+
+    def test_intervention_modifiee_pendant_l_export(self):
+        """Cache invalidé entre la génération et l'assemblage : le PDF est régénéré"""
+        fichiers, _ = InterventionPDFService.exporter(Intervention.objects.all(), processus=1)
+        InterventionPDFService.invalider(self.interventions[0].pk)
+
+        sortie = io.BytesIO()
+        InterventionPDFService.ecrire_zip(fichiers, sortie)
+
+        self.assertEqual(len(zipfile.ZipFile(sortie).namelist()), 3)
+
+    def test_export_reserve_a_son_auteur(self):
+        self.exporter('zip')
+        export = ExportPDF.objects.get()
+        autre = User.objects.create_user('autre', 'autre@test.sn', 'x', is_staff=True)
+        self.client.force_login(autre)
+
+        self.assertEqual(self.client.get(reverse('interventions:export_pdf', args=[export.pk])).status_code, 404)
+
+    def test_export_non_termine(self):
+        self.exporter('zip')
+        reponse = self.client.get(reverse('interventions:export_pdf_telecharger', args=[ExportPDF.objects.get().pk]))
+        self.assertEqual(reponse.status_code, 404)
+
+    def test_export_abandonne_relance_puis_en_echec(self):
+        self.exporter('zip')
+        export = InterventionPDFService.reserver_prochain_export()
+        inactif = timezone.now() - ExportPDF.DELAI_INACTIVITE - timedelta(minutes=1)
+        ExportPDF.objects.filter(pk=export.pk).update(derniere_activite=inactif)
+
+        self.assertEqual(InterventionPDFService.recuperer_exports_abandonnes(), (1, 0))
+
+        InterventionPDFService.reserver_prochain_export()
+        ExportPDF.objects.filter(pk=export.pk).update(derniere_activite=inactif)
+
+        self.assertEqual(InterventionPDFService.recuperer_exports_abandonnes(), (0, 1))
+        self.assertEqual(ExportPDF.objects.get(pk=export.pk).statut, 'echec')
+
+    def test_purge_des_exports_expires(self):
+        self.exporter('zip')
+        self.traiter()
+        export = ExportPDF.objects.get()
+        chemin = InterventionPDFService.chemin_export(export)
+        ExportPDF.objects.filter(pk=export.pk).update(
+            finished_at=timezone.now() - ExportPDF.RETENTION - timedelta(hours=1)
+        )
+
+        self.assertEqual(InterventionPDFService.purger_exports(), 1)
+        self.assertFalse(os.path.exists(chemin))
+
+
+class ExportPDFEnLotTests(TestCase):
+    """
+    Export en lot : PDF générés une seule fois puis servis par le cache, archive
+    zip et PDF fusionné (le débit est affiché par `exporter_pdf_interventions`).
+    """
+
+    NOMBRE = 5
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        reglages = override_settings(MEDIA_ROOT=media.name)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        client = creer_client()
+        for _ in range(self.NOMBRE):
+            creer_intervention(client, statut='terminee')
+        self.interventions = Intervention.objects.order_by('pk')
+
+    def lire(self, chemin):
+        with open(chemin, 'rb') as fichier:
+            return fichier.read()
+
+    def ecrire_zip(self, fichiers):
+        sortie = io.BytesIO()
+        InterventionPDFService.ecrire_zip(fichiers, sortie)
+        return sortie
+
+    def test_premier_export_genere_chaque_pdf(self):
+        suivi = mock.Mock()
+
+        fichiers, debit = InterventionPDFService.exporter(self.interventions, processus=1, suivi=suivi)
+
+        self.assertEqual((debit['total'], debit['generes'], debit['en_cache']), (self.NOMBRE, self.NOMBRE, 0))
+        self.assertEqual([contenu['id'] for contenu, _ in fichiers], [i.pk for i in self.interventions])
+        self.assertTrue(all(os.path.exists(chemin) for _, chemin in fichiers))
+        self.assertEqual(suivi.call_args_list, [mock.call(n, self.NOMBRE) for n in range(1, self.NOMBRE + 1)])
+
+    def test_second_export_servi_par_le_cache(self):
+        premiers, _ = InterventionPDFService.exporter(self.interventions, processus=1)
+
+        with mock.patch('interventions.pdf_service.generer_fichier') as generer:
+            seconds, debit = InterventionPDFService.exporter(self.interventions, processus=1)
+
+        generer.assert_not_called()
+        self.assertEqual((debit['generes'], debit['en_cache']), (0, self.NOMBRE))
+        self.assertEqual([chemin for _, chemin in seconds], [chemin for _, chemin in premiers])
+
+    def test_seule_l_intervention_modifiee_est_regeneree(self):
+        InterventionPDFService.exporter(self.interventions, processus=1)
+        intervention = self.interventions.first()
+        intervention.notes = 'Onduleur remplacé'
+        intervention.save()
+
+        _, debit = InterventionPDFService.exporter(self.interventions, processus=1)
+
+        self.assertEqual((debit['generes'], debit['en_cache']), (1, self.NOMBRE - 1))
+
+    def test_archive_zip(self):
+        fichiers, _ = InterventionPDFService.exporter(self.interventions, processus=1)
+
+        with zipfile.ZipFile(self.ecrire_zip(fichiers)) as archive:
+            self.assertEqual(
+                archive.namelist(), [f'rapport_intervention_{i.pk}.pdf' for i in self.interventions]
+            )
+            for (_, chemin), nom in zip(fichiers, archive.namelist()):
+                self.assertEqual(archive.read(nom), self.lire(chemin))
+
+    def test_pdf_fusionne(self):
+        fichiers, _ = InterventionPDFService.exporter(self.interventions, processus=1)
+        sortie = io.BytesIO()
+
+        InterventionPDFService.ecrire_fusionne(fichiers, sortie)
+
+        pages = [len(PdfReader(chemin).pages) for _, chemin in fichiers]
+        fusionne = PdfReader(io.BytesIO(sortie.getvalue()))
+        self.assertEqual(len(fusionne.pages), sum(pages))
+        # Chaque rapport commence sur sa propre page, dans l'ordre des interventions
+        debut = 0
+        for intervention, nombre in zip(self.interventions, pages):
+            self.assertIn(f'#{intervention.pk}', fusionne.pages[debut].extract_text())
+            debut += nombre
+
+    def test_pdf_invalide_pendant_l_export_regenere(self):
+        fichiers, _ = InterventionPDFService.exporter(self.interventions, processus=1)
+        InterventionPDFService.invalider(self.interventions.first().pk)
+
+        with zipfile.ZipFile(self.ecrire_zip(fichiers)) as archive:
+            self.assertEqual(len(archive.namelist()), self.NOMBRE)
+            self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+    def test_generation_parallele(self):
+        # Les processus fils ne lisent pas la base : la connexion (et la transaction) du test est gardée
+        with mock.patch('interventions.pdf_service.connections.close_all'):
+            _, debit = InterventionPDFService.exporter(self.interventions, processus=2)
+
+        self.assertEqual((debit['processus'], debit['generes']), (2, self.NOMBRE))
+        with mock.patch('interventions.pdf_service.generer_fichier') as generer:
+            _, debit = InterventionPDFService.exporter(self.interventions, processus=1)
+        generer.assert_not_called()
+        self.assertEqual(debit['en_cache'], self.NOMBRE)
+
+
+class InterventionRechercheTests(TestCase):
+
+    def setUp(self):
+        fournisseur = Fournisseur.objects.create(nom='Sahel Énergie')
+        self.par_client = creer_intervention(creer_client(1))
+        self.par_fournisseur = creer_intervention(
+            creer_client(9, nom='Awa', adresse='Thiès', type_installation='3KVA', fournisseur=fournisseur)
+        )
+        self.par_technicien = creer_intervention(
+            creer_client(2), technicien=creer_technicien(nom='Client Sall')
+        )
+
+    def test_recherche_par_nom_lie(self):
+        self.assertEqual(set(Intervention.objects.rechercher('sahel')), {self.par_fournisseur})
+        self.assertEqual(set(Intervention.objects.rechercher('CLIENT')), {
+            self.par_client, self.par_technicien
+        })
+
+    @skipUnless(connection.vendor != 'postgresql', "Repli des bases sans pg_trgm")
+    def test_ordre_conserve_hors_postgresql(self):
+        resultats = Intervention.objects.order_by('pk').rechercher('client')
+
+        self.assertEqual(list(resultats), [self.par_client, self.par_technicien])
+        self.assertNotIn('pertinence', resultats.query.annotations)
+
+    @skipUnless(connection.vendor == 'postgresql', "Similarité trigramme (PostgreSQL)")
+    def test_tri_par_pertinence(self):
+        """Technicien facultatif : GREATEST ignore la similarité NULL des interventions sans technicien"""
+        self.assertEqual(
+            list(Intervention.objects.order_by('pk').rechercher('sall')),
+            [self.par_technicien]
+        )
+        self.assertEqual(
+            list(Intervention.objects.order_by('-pk').rechercher('client 1'))[0],
+            self.par_client
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', "Plans d'exécution vérifiés sur PostgreSQL (base de production)")
+class InterventionIndexTests(TestCase):
+    """Les requêtes critiques (mêmes filtres que les vues) utilisent leur index"""
+
+    def setUp(self):
+        # Sur une petite table, PostgreSQL préfère un parcours séquentiel :
+        # on vérifie que l'index est utilisable, pas le choix du planificateur
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        self.maintenant = timezone.now()
+
+    def assertIndexUtilise(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan, plan)
+
+    def test_liste_triee_par_date(self):
+        self.assertIndexUtilise(Intervention.objects.order_by('-date_intervention')[:10], 'intervention_date_idx')
+
+    def test_liste_filtree_par_statut(self):
+        self.assertIndexUtilise(
+            Intervention.objects.filter(statut='en_cours').order_by('-date_intervention')[:10],
+            'intervention_statut_date_idx'
+        )
+
+    def test_interventions_d_un_technicien(self):
+        self.assertIndexUtilise(
+            Intervention.objects.filter(technicien_id=1).order_by('-date_intervention')[:10],
+            'intervention_tech_date_idx'
+        )
+
+    def test_calendrier_sur_une_periode(self):
+        self.assertIndexUtilise(
+            Intervention.objects.filter(
+                date_intervention__gte=self.maintenant,
+                date_intervention__lt=self.maintenant + timedelta(days=31)
+            ),
+            'intervention_date_idx'
+        )
+
+    def test_synchronisation_calendrier(self):
+        self.assertIndexUtilise(
+            Intervention.objects.filter(date_modification__gte=self.maintenant).order_by('date_modification'),
+            'intervention_modif_idx'
+        )
+
+    def test_rappels_24h(self):
+        """Index partiel : seules les interventions prévues sans rappel (commande envoyer_rappels)"""
+        self.assertIndexUtilise(
+            Intervention.objects.filter(
+                date_intervention__gte=self.maintenant,
+                date_intervention__lte=self.maintenant + timedelta(hours=25),
+                statut='prevue',
+                rappel_envoye=False
+            ),
+            'intervention_rappel_idx'
+        )
+
+
+class MigrationHistoriqueTests(TransactionTestCase):
+    """Conversion du JSON historique_statuts en événements (migration 0010)"""
+
+    avant = [('interventions', '0009_intervention_dernier_debut_en_cours_and_more')]
+    apres = [('interventions', '0010_interventionstatusevent')]
+
+    def migrer(self, cible):
+        executor = MigrationExecutor(connection)
+        # Les autres applications restent à leur dernière migration
+        cible = cible + [noeud for noeud in executor.loader.graph.leaf_nodes() if noeud[0] != 'interventions']
+        executor.migrate(cible)
+        executor.loader.build_graph()
+        return executor.loader.project_state(cible).apps
+
+    def tearDown(self):
+        self.migrer(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_statut_atteint_en_fin_de_comptage(self):
+        anciennes_apps = self.migrer(self.avant)
+        Client = anciennes_apps.get_model('clients', 'Client')
+        Intervention = anciennes_apps.get_model('interventions', 'Intervention')
+
+        t0 = timezone.now() - timedelta(hours=3)
+        client = Client.objects.create(nom='Client', adresse='Dakar', telephone='770000000', email='c@test.sn',
+                                       date_installation=date(2024, 1, 1), type_installation='5KVA')
+        intervention = Intervention.objects.create(
+            client=client, date_intervention=t0, type_intervention='entretien', statut='terminee',
+            historique_statuts=[
+                {'statut': 'en_cours', 'timestamp': t0.isoformat(), 'action': 'debut'},
+                {'statut': 'en_cours', 'timestamp': (t0 + timedelta(hours=1)).isoformat(), 'action': 'fin',
+                 'duree_ecoulee': '1:00:00'},
+                {'statut': 'en_cours', 'timestamp': (t0 + timedelta(hours=2)).isoformat(), 'action': 'reprise',
+                 'note': 'Reprise après statut Prévue'},
+                {'statut': 'en_cours', 'timestamp': (t0 + timedelta(hours=3)).isoformat(), 'action': 'fin',
+                 'duree_ecoulee': '1:00:00'},
+            ]
+        )
+
+        nouvelles_apps = self.migrer(self.apres)
+        evenements = nouvelles_apps.get_model('interventions', 'InterventionStatusEvent').objects.filter(
+            intervention_id=intervention.pk
+        ).order_by('timestamp')
+
+        self.assertEqual(list(evenements.values_list('action', 'ancien_statut', 'nouveau_statut', 'duree')), [
+            ('debut', '', 'en_cours', None),
+            ('fin', 'en_cours', 'prevue', timedelta(hours=1)),
+            ('reprise', 'prevue', 'en_cours', None),
+            ('fin', 'en_cours', 'terminee', timedelta(hours=1)),
+        ])
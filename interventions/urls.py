@@ -17,9 +17,13 @@ urlpatterns = [
     # Nouvelles URLs pour le calendrier
     path('calendar/', views_calendar.calendar_view, name='calendar'),
     path('calendar/events/', views_calendar.calendar_events, name='calendar_events'),
+    path('calendar/delta/', views_calendar.calendar_delta, name='calendar_delta'),
 
     # Ajouter cette ligne :
     path('<int:pk>/pdf/', views_pdf.intervention_pdf, name='pdf'),
+    # Exports PDF en lot (demandés depuis l'admin, produits par le worker)
+    path('exports/<int:pk>/', views_pdf.export_pdf, name='export_pdf'),
+    path('exports/<int:pk>/telecharger/', views_pdf.export_pdf_telecharger, name='export_pdf_telecharger'),
 
     # ... autres URLs ...
     path('api/client/<int:client_id>/prix/', views.get_prix_intervention_api, name='prix_intervention_api'),
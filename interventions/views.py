@@ -1,14 +1,13 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 
 from .email_service import InterventionEmailService
 from .models import Intervention
 from .forms import InterventionAdminForm, InterventionTechnicienForm
 from clients.models import Client
+from core.pagination import PaginationCurseur
 from techniciens.models import Technicien
 from .email_service import InterventionEmailService
 
@@ -31,11 +30,7 @@ def intervention_list(request):
     # Recherche
     search_query = request.GET.get('search', '')
     if search_query:
-        interventions = interventions.filter(
-            Q(client__nom__icontains=search_query) |
-            Q(technicien__nom__icontains=search_query) |
-            Q(fournisseur__nom__icontains=search_query)
-        )
+        interventions = interventions.rechercher(search_query)
 
     # Filtres
     type_filter = request.GET.get('type')
@@ -46,13 +41,16 @@ def intervention_list(request):
     if statut_filter:
         interventions = interventions.filter(statut=statut_filter)
 
-    # Pagination
-    paginator = Paginator(interventions, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur (date, id) : pas d'OFFSET ; le nombre de pages vient
+    # d'une estimation sur les grandes tables PostgreSQL
+    paginator = PaginationCurseur(interventions, 10)
+    page_obj = paginator.page(request.GET)
+    _, total_estime = paginator.compte_estime()
 
     context = {
         'interventions': page_obj,
+        'total_estime': total_estime,
+        'nombre_pages': paginator.nombre_pages(),
         'search_query': search_query,
         'type_filter': type_filter,
         'statut_filter': statut_filter,
@@ -207,7 +205,7 @@ def get_client_fournisseur(request, client_id):
             'success': True,
             'fournisseur_nom': fournisseur.nom if fournisseur else 'Non spécifié',
             'fournisseur_id': fournisseur.id if fournisseur else None,
-            'client_kva': client.extraire_kva() if hasattr(client, 'extraire_kva') else None
+            'client_kva': client.kva
         })
     except Client.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Client non trouvé'}, status=404)
@@ -220,7 +218,7 @@ def get_prix_intervention_api(request, client_id):
         client = Client.objects.get(id=client_id)
         type_intervention = request.GET.get('type', '')
 
-        kva = client.extraire_kva() if hasattr(client, 'extraire_kva') else None
+        kva = client.kva
 
         if kva:
             from utils import calculer_prix_par_kva_et_type
@@ -2,9 +2,31 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from .models import Intervention
-from django.db.models import Q
-from datetime import datetime
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .models import Intervention, InterventionTombstone
+from clients.models import Client
+from techniciens.models import Technicien
+from datetime import datetime, timedelta
+
+
+# Couleur des événements selon le statut
+COULEURS_STATUT = {
+    'terminee': '#28a745',  # Vert
+    'en_cours': '#ffc107',  # Jaune
+    'annulee': '#dc3545',  # Rouge
+    'prevue': '#6c757d',  # Gris
+}
+COULEUR_DEFAUT = '#3788d8'  # Bleu
+
+TYPES_AFFICHES = dict(Intervention.TYPE_INTERVENTION_CHOICES)
+STATUTS_AFFICHES = dict(Intervention.STATUT_CHOICES)
+
+# Recouvrement entre deux synchronisations : une modification horodatée juste
+# avant le curseur mais validée après lui est renvoyée (la fusion est idempotente)
+MARGE_SYNCHRO = timedelta(seconds=30)
 
 
 @login_required
@@ -16,67 +38,161 @@ def calendar_view(request):
     return render(request, 'interventions/calendar.html', context)
 
 
+def _interventions_visibles(user):
+    """Interventions du calendrier de l'utilisateur et identifiant de ce périmètre"""
+    if hasattr(user, 'technicien'):
+        # Technicien : seulement ses interventions
+        return Intervention.objects.filter(technicien=user.technicien), f"t{user.technicien.pk}"
+    # Admin : toutes les interventions
+    return Intervention.objects.all(), "a"
+
+
+def _evenements(interventions):
+    """Événements FullCalendar construits à partir des seules colonnes affichées"""
+    lignes = interventions.order_by().values_list(
+        'id', 'date_intervention', 'type_intervention', 'statut', 'prix_intervention',
+        'client__nom', 'technicien__nom'
+    )
+    events = []
+    for pk, date_intervention, type_intervention, statut, prix, client, technicien in lignes:
+        type_affiche = TYPES_AFFICHES.get(type_intervention, type_intervention)
+        events.append({
+            'id': pk,
+            'title': f"{client} - {type_affiche}",
+            'start': date_intervention.isoformat(),
+            'color': COULEURS_STATUT.get(statut, COULEUR_DEFAUT),
+            'textColor': '#ffffff',
+            'borderColor': '#ffffff',
+            'extendedProps': {
+                'client': client,
+                'technicien': technicien or 'Non assigné',
+                'type': type_affiche,
+                'statut': STATUTS_AFFICHES.get(statut, statut),
+                'prix': str(prix),
+                'url': f'/interventions/{pk}/',
+            }
+        })
+    return events
+
+
+def _borne(valeur):
+    """Date/heure envoyée par FullCalendar (ISO 8601, avec ou sans fuseau)"""
+    borne = datetime.fromisoformat(valeur.replace('Z', '+00:00'))
+    if timezone.is_naive(borne):
+        borne = timezone.make_aware(borne)
+    return borne
+
+
 @login_required
 def calendar_events(request):
-    """API qui retourne les événements au format JSON pour FullCalendar"""
+    """
+    API qui retourne les événements au format JSON pour FullCalendar.
+
+    La période est filtrée sur des bornes datetime (index sur
+    date_intervention) et seules les colonnes affichées sont lues. La
+    réponse porte un ETag et un Last-Modified : tant que rien n'a changé
+    dans la période, le navigateur reçoit un 304 sans corps.
+    """
 
     # Récupérer les dates de début et fin depuis la requête
     start_str = request.GET.get('start', '')
     end_str = request.GET.get('end', '')
 
-    # Convertir les dates
-    start_date = datetime.fromisoformat(start_str.replace('Z', '+00:00')) if start_str else None
-    end_date = datetime.fromisoformat(end_str.replace('Z', '+00:00')) if end_str else None
+    try:
+        start_date = _borne(start_str) if start_str else None
+        end_date = _borne(end_str) if end_str else None
+    except ValueError:
+        return JsonResponse({'error': 'Paramètres start/end invalides'}, status=400)
 
     # Filtrer les interventions
-    if hasattr(request.user, 'technicien'):
-        # Technicien : seulement ses interventions
-        interventions = Intervention.objects.filter(
-            technicien=request.user.technicien
-        )
-    else:
-        # Admin : toutes les interventions
-        interventions = Intervention.objects.all()
+    interventions, perimetre = _interventions_visibles(request.user)
 
-    # Filtrer par période si spécifiée
+    # Filtrer par période si spécifiée (fin exclusive, comme FullCalendar)
     if start_date and end_date:
         interventions = interventions.filter(
-            date_intervention__gte=start_date.date(),
-            date_intervention__lte=end_date.date()
+            date_intervention__gte=start_date,
+            date_intervention__lt=end_date
         )
 
-    # Préparer les événements au format FullCalendar
-    events = []
-    for intervention in interventions:
-        # Définir la couleur selon le statut
-        color = '#3788d8'  # Bleu par défaut
-
-        if intervention.statut == 'terminee':
-            color = '#28a745'  # Vert
-        elif intervention.statut == 'en_cours':
-            color = '#ffc107'  # Jaune
-        elif intervention.statut == 'annulee':
-            color = '#dc3545'  # Rouge
-        elif intervention.statut == 'prevue':
-            color = '#6c757d'  # Gris
-
-        # Créer l'événement
-        event = {
-            'id': intervention.id,
-            'title': f"{intervention.client.nom} - {intervention.get_type_intervention_display()}",
-            'start': intervention.date_intervention.isoformat(),
-            'color': color,
-            'textColor': '#ffffff',
-            'borderColor': '#ffffff',
-            'extendedProps': {
-                'client': intervention.client.nom,
-                'technicien': intervention.technicien.nom if intervention.technicien else 'Non assigné',
-                'type': intervention.get_type_intervention_display(),
-                'statut': intervention.get_statut_display(),
-                'prix': str(intervention.prix_intervention),
-                'url': f'/interventions/{intervention.id}/',
-            }
-        }
-        events.append(event)
+    # Version de la période : dernière modification (intervention, client,
+    # technicien) et nombre d'événements, qui change aussi sur suppression
+    version = interventions.order_by().aggregate(
+        nombre=Count('id'),
+        modification=Max('date_modification'),
+        modification_client=Max('client__date_modification'),
+        modification_technicien=Max('technicien__date_modification'),
+    )
+    dates = [d for d in (version['modification'], version['modification_client'],
+                         version['modification_technicien']) if d is not None]
+    derniere_modification = max(dates) if dates else None
+
+    etag = '"{}-{}-{}"'.format(
+        perimetre,
+        version['nombre'],
+        int(derniere_modification.timestamp() * 1_000_000) if derniere_modification else 0
+    )
+    last_modified = int(derniere_modification.timestamp()) if derniere_modification else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        # Préparer les événements au format FullCalendar
+        events = _evenements(interventions)
+        response = JsonResponse(events, safe=False)
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Le navigateur garde la réponse mais la revalide à chaque navigation
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def calendar_delta(request):
+    """
+    Synchronisation incrémentale du calendrier : interventions créées ou
+    modifiées et interventions retirées depuis le curseur fourni.
+
+    Sans curseur, seul le curseur courant est renvoyé (à demander avant le
+    premier chargement complet). Un curseur invalide ou plus ancien que la
+    conservation des traces demande au client de tout recharger.
+    """
+    maintenant = timezone.now()
+    interventions, perimetre = _interventions_visibles(request.user)
+
+    reponse = {
+        'curseur': maintenant.isoformat(),
+        'reinitialiser': False,
+        'evenements': [],
+        'supprimes': [],
+    }
+
+    curseur = request.GET.get('curseur', '')
+    if not curseur:
+        return JsonResponse(reponse)
+
+    try:
+        depuis = _borne(curseur) - MARGE_SYNCHRO
+    except ValueError:
+        depuis = None
+    if depuis is None or depuis < maintenant - InterventionTombstone.RETENTION:
+        reponse['reinitialiser'] = True
+        return JsonResponse(reponse)
+
+    # Modifiées depuis le curseur, y compris par un changement de nom du client ou du technicien
+    reponse['evenements'] = _evenements(interventions.filter(
+        Q(date_modification__gte=depuis) |
+        Q(client__in=Client.objects.filter(date_modification__gte=depuis).values('pk')) |
+        Q(technicien__in=Technicien.objects.filter(date_modification__gte=depuis).values('pk'))
+    ))
+
+    retraits = InterventionTombstone.objects.filter(date_suppression__gte=depuis)
+    if hasattr(request.user, 'technicien'):
+        retraits = retraits.filter(technicien_pk=request.user.technicien.pk)
+    else:
+        retraits = retraits.filter(motif='suppression')
+    reponse['supprimes'] = list(retraits.values_list('intervention_pk', flat=True).distinct())
 
-    return JsonResponse(events, safe=False)
\ No newline at end of file
+    response = JsonResponse(reponse)
+    patch_cache_control(response, private=True, no_store=True)
+    return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Report
+from .models import Report, ReportJob, AIAnalysisCache
 
 
 @admin.register(Report)
@@ -136,4 +136,19 @@ class ReportAdmin(admin.ModelAdmin):
                                            'total_revenue', 'success_rate', 'customer_satisfaction_score',
                                            'avg_intervention_duration', 'summary', 'recommendations',
                                            'technical_analysis', 'predictive_maintenance')
-        return self.readonly_fields
\ No newline at end of file
+        return self.readonly_fields
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'month', 'year', 'statut', 'progression', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('statut',)
+    readonly_fields = ('report', 'created_at', 'started_at', 'finished_at')
+
+
+
+@admin.register(AIAnalysisCache)
+class AIAnalysisCacheAdmin(admin.ModelAdmin):
+    list_display = ('fingerprint', 'model_name', 'prompt_version', 'hits', 'created_at', 'last_used_at')
+    list_filter = ('model_name', 'prompt_version')
+    readonly_fields = ('fingerprint', 'model_name', 'prompt_version', 'ai_result', 'hits', 'created_at', 'last_used_at')
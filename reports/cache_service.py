@@ -0,0 +1,77 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AIAnalysisCache
+
+
+class AnalysisCacheService:
+    """Cache des analyses IA, adressé par l'empreinte des statistiques envoyées au modèle"""
+
+    @staticmethod
+    def taille_max():
+        return getattr(settings, 'REPORT_AI_CACHE_MAX_ENTRIES', 200)
+
+    @staticmethod
+    def _normaliser(valeur):
+        """Arrondit les flottants pour qu'un bruit de calcul ne change pas l'empreinte"""
+        if isinstance(valeur, float):
+            return round(valeur, 4)
+        if isinstance(valeur, dict):
+            return {str(cle): AnalysisCacheService._normaliser(v) for cle, v in valeur.items()}
+        if isinstance(valeur, (list, tuple)):
+            return [AnalysisCacheService._normaliser(v) for v in valeur]
+        return valeur
+
+    @staticmethod
+    def empreinte(model_name, prompt_version, stats):
+        payload = json.dumps(
+            AnalysisCacheService._normaliser(stats),
+            sort_keys=True,
+            default=str,
+            ensure_ascii=False
+        )
+        contenu = f"{model_name}|{prompt_version}|{payload}"
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def lire(fingerprint):
+        """Retourne l'analyse en cache (ou None) et la marque comme récemment utilisée"""
+        ai_result = AIAnalysisCache.objects.filter(
+            fingerprint=fingerprint
+        ).values_list('ai_result', flat=True).first()
+
+        if ai_result is not None:
+            AIAnalysisCache.objects.filter(fingerprint=fingerprint).update(
+                hits=F('hits') + 1,
+                last_used_at=timezone.now()
+            )
+        return ai_result
+
+    @staticmethod
+    def enregistrer(fingerprint, model_name, prompt_version, ai_result):
+        """Mémorise une analyse réussie puis évince les entrées les moins récemment utilisées"""
+        if not ai_result.get('success', False):
+            return
+
+        AIAnalysisCache.objects.update_or_create(
+            fingerprint=fingerprint,
+            defaults={
+                'model_name': model_name,
+                'prompt_version': prompt_version,
+                'ai_result': ai_result,
+                'last_used_at': timezone.now(),
+            }
+        )
+        AnalysisCacheService.evincer()
+
+    @staticmethod
+    def evincer(taille_max=None):
+        """Supprime les entrées au-delà de la taille maximale (politique LRU)"""
+        taille_max = AnalysisCacheService.taille_max() if taille_max is None else taille_max
+
+        a_garder = AIAnalysisCache.objects.order_by('-last_used_at').values_list('pk', flat=True)[:taille_max]
+        return AIAnalysisCache.objects.exclude(pk__in=list(a_garder)).delete()[0]
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.pdf_service import ReportPDFService
+from reports.report_service import ReportGenerationService
+
+
+class Command(BaseCommand):
+    help = 'Worker qui traite la file des rapports IA en attente'
+
+    # Fréquence (en secondes) de la purge des PDF de rapports inutilisés
+    INTERVALLE_PURGE = 3600
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help="Traite les jobs en attente puis s'arrête (utile en cron)"
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=3,
+            help='Secondes entre deux vérifications de la file (défaut: 3)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("=== WORKER RAPPORTS IA ===")
+        derniere_purge = None
+
+        while True:
+            # Le worker tourne longtemps : ne pas garder de connexion périmée
+            close_old_connections()
+
+            if derniere_purge is None or time.monotonic() - derniere_purge > self.INTERVALLE_PURGE:
+                purges = ReportPDFService.purger()
+                if purges:
+                    self.stdout.write(f"{purges} PDF de rapport inutilisé(s) supprimé(s)")
+                derniere_purge = time.monotonic()
+
+            relances, echecs = ReportGenerationService.recuperer_jobs_abandonnes()
+            if relances or echecs:
+                self.stdout.write(self.style.WARNING(
+                    f"Jobs abandonnés par un worker arrêté : {relances} remis en file, {echecs} en échec"
+                ))
+
+            job = ReportGenerationService.reserver_prochain_job()
+
+            if job is None:
+                if options['une_fois']:
+                    break
+                time.sleep(options['intervalle'])
+                continue
+
+            self.stdout.write(f"\n→ Job #{job.id} - Rapport {job.month:02d}/{job.year}")
+            report = ReportGenerationService.traiter(job)
+
+            if report:
+                self.stdout.write(self.style.SUCCESS(f"   ✓ Rapport #{report.id} généré"))
+            else:
+                self.stdout.write(self.style.ERROR(f"   ✗ Erreur: {job.erreur}"))
+
+        self.stdout.write("\n=== FIN ===")
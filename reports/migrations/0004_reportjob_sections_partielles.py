@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='sections_partielles',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
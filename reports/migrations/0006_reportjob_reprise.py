@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_aianalysiscache_reportjob_forcer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='derniere_activite',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='tentatives',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
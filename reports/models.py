@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from datetime import timedelta
 import json
 
 
@@ -81,4 +82,91 @@ class Report(models.Model):
 
     def get_performance_score_display(self):
         """Retourne le score de performance formaté (pas satisfaction client!)"""
-        return f"{self.customer_satisfaction_score:.1f}/10"
\ No newline at end of file
+        return f"{self.customer_satisfaction_score:.1f}/10"
+
+class ReportJob(models.Model):
+    """Demande de génération de rapport IA traitée en arrière-plan par `traiter_rapports`"""
+
+    # Sans avancement pendant ce délai, le worker est considéré comme arrêté
+    DELAI_INACTIVITE = timedelta(minutes=10)
+    MAX_TENTATIVES = 2
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('echec', 'Échec'),
+    ]
+
+    month = models.PositiveSmallIntegerField()
+    year = models.PositiveSmallIntegerField()
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente', db_index=True)
+    forcer = models.BooleanField(default=False)  # Ignorer le cache des analyses IA
+
+    # Suivi de l'avancement affiché à l'utilisateur
+    progression = models.PositiveSmallIntegerField(default=0)  # en pourcentage
+    message = models.CharField(max_length=255, blank=True)
+    erreur = models.TextField(blank=True)
+
+    # Sections de l'analyse IA reçues pendant le streaming
+    sections_partielles = models.JSONField(default=dict, blank=True)
+
+    # Réservations par un worker ; au-delà de MAX_TENTATIVES, un job abandonné passe en échec
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    # Dernier signe de vie du worker (réservation, avancement)
+    derniere_activite = models.DateTimeField(null=True, blank=True)
+
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    report = models.ForeignKey(Report, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job #{self.pk} - {self.month:02d}/{self.year} ({self.get_statut_display()})"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Génération de rapport"
+        verbose_name_plural = "Générations de rapports"
+
+    @property
+    def est_termine(self):
+        return self.statut in ('termine', 'echec')
+
+    def mettre_a_jour(self, progression=None, message=None, sections=None):
+        """Enregistre l'avancement sans écraser les autres champs du job"""
+        champs = {}
+        if sections is not None:
+            self.sections_partielles = champs['sections_partielles'] = sections
+        if progression is not None:
+            self.progression = champs['progression'] = progression
+        if message is not None:
+            self.message = champs['message'] = message[:255]
+        if champs:
+            self.derniere_activite = champs['derniere_activite'] = timezone.now()
+            ReportJob.objects.filter(pk=self.pk).update(**champs)
+
+
+
+class AIAnalysisCache(models.Model):
+    """Analyse IA déjà obtenue pour un jeu de statistiques identique"""
+
+    # sha256 du modèle, de la version du prompt et des statistiques normalisées
+    fingerprint = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    prompt_version = models.PositiveSmallIntegerField()
+    ai_result = models.JSONField(default=dict)
+
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name} v{self.prompt_version} - {self.fingerprint[:12]}"
+
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name = "Analyse IA en cache"
+        verbose_name_plural = "Analyses IA en cache"
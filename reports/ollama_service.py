@@ -1,24 +1,129 @@
 import requests
 import json
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
 from datetime import datetime, timedelta
 from django.utils import timezone
 from interventions.models import Intervention
 from django.db.models import Count, Avg, Q
 
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Session HTTP partagée par tout le processus (keep-alive, pool de connexions, retries)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=getattr(settings, 'OLLAMA_MAX_RETRIES', 3),
+                    read=0,  # Ne jamais relancer une génération qui a déjà commencé
+                    backoff_factor=getattr(settings, 'OLLAMA_RETRY_BACKOFF', 0.5),
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(['GET']),
+                    raise_on_status=False
+                )
+                pool_size = getattr(settings, 'OLLAMA_POOL_SIZE', 10)
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+class AnalyseIncrementale:
+    """Découpe la réponse de l'IA en sections, ligne par ligne, au fur et à mesure de sa réception"""
+
+    SECTIONS = ('summary', 'recommendations', 'technical_analysis', 'predictive_maintenance')
+
+    def __init__(self):
+        self.sections = {nom: '' for nom in self.SECTIONS}
+        self._section = None
+        self._reste = ''
+
+    def ajouter(self, texte):
+        """Ajoute un morceau de texte ; retourne True si au moins une ligne complète a été traitée"""
+        lignes = (self._reste + texte).split('\n')
+        self._reste = lignes.pop()
+
+        for ligne in lignes:
+            self._traiter_ligne(ligne)
+        return bool(lignes)
+
+    def terminer(self):
+        """Traite la dernière ligne (sans retour à la ligne final) et retourne les sections"""
+        if self._reste:
+            self._traiter_ligne(self._reste)
+            self._reste = ''
+        return self.sections
+
+    def sections_courantes(self):
+        return dict(self.sections)
+
+    def _traiter_ligne(self, line):
+        # Retirer les éventuels marqueurs de code
+        line = line.replace("```html", "").replace("```", "")
+        line_lower = line.lower()
+
+        if 'résumé' in line_lower or 'executif' in line_lower:
+            self._section = 'summary'
+        elif 'recommandation' in line_lower:
+            self._section = 'recommendations'
+        elif 'technique' in line_lower:
+            self._section = 'technical_analysis'
+        elif 'prédictive' in line_lower:
+            self._section = 'predictive_maintenance'
+
+        if self._section and line.strip():
+            self.sections[self._section] += line + '\n'
+
+
 class OllamaService:
     """Service pour interagir avec l'API Ollama"""
 
+    # Nombre maximal de tokens générés pour un rapport
+    NUM_PREDICT = 800
+
+    # À incrémenter à chaque modification de _create_report_prompt (invalide le cache des analyses)
+    PROMPT_VERSION = 2
+
     def __init__(self, base_url="http://localhost:11434"):
         self.base_url = base_url
         self.model_name = "gemma3:4b"  # ou "gemma3:4b" selon votre configuration
+        self.session = get_session()
+
+    def _timeout(self, lecture):
+        """Timeout (connexion, lecture) : un serveur éteint est détecté en quelques secondes"""
+        return (getattr(settings, 'OLLAMA_CONNECT_TIMEOUT', 3), lecture)
 
-    def check_connection(self):
-        """Vérifie si Ollama est accessible et quels modèles sont disponibles"""
+    def check_connection(self, use_cache=True):
+        """Vérifie si Ollama est accessible et quels modèles sont disponibles
+
+        Le résultat est mis en cache quelques secondes (OLLAMA_STATUS_CACHE_SECONDS)
+        pour que l'affichage des pages ne déclenche pas un appel réseau à chaque fois.
+        """
+        cache_key = f"ollama:status:{self.base_url}:{self.model_name}"
+        if use_cache:
+            result = cache.get(cache_key)
+            if result is not None:
+                return result
+
+        result = self._check_connection()
+        cache.set(cache_key, result, getattr(settings, 'OLLAMA_STATUS_CACHE_SECONDS', 30))
+        return result
+
+    def _check_connection(self):
         try:
             # Essayer d'accéder à l'API
-            response = requests.get(f"{self.base_url}/api/tags", timeout=20)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=self._timeout(20))
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 available_models = [model.get("name") for model in models]
@@ -64,7 +169,7 @@ class OllamaService:
     def test_model(self):
         """Teste si le modèle peut générer une réponse simple"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model_name,
@@ -72,7 +177,7 @@ class OllamaService:
                     "stream": False,
                     "options": {"temperature": 0.1}
                 },
-                timeout=60
+                timeout=self._timeout(60)
             )
 
             if response.status_code == 200:
@@ -94,8 +199,13 @@ class OllamaService:
                 'message': f"Erreur lors du test: {str(e)}"
             }
 
-    def generate_report_analysis(self, month, year, stats):
-        """Génère une analyse IA basée sur les données fournies"""
+    def generate_report_analysis(self, month, year, stats, on_sections=None):
+        """Génère une analyse IA basée sur les données fournies
+
+        Si `on_sections` est fourni, la réponse est lue en streaming et la
+        fonction est appelée avec les sections partielles (et le nombre de
+        morceaux reçus) à chaque ligne complète.
+        """
         try:
             # Préparer le prompt avec le contexte
             prompt = self._create_report_prompt(month, year, stats)
@@ -103,36 +213,40 @@ class OllamaService:
             print(f"🔍 Envoi du prompt à Ollama ({len(prompt)} caractères)...")
 
             # Appeler l'API Ollama
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model_name,
                     "prompt": prompt,
-                    "stream": False,
+                    "stream": on_sections is not None,
                     "options": {
                         "temperature": 0.3,
-                        "num_predict": 800,  # Réduire la longueur de réponse
+                        "num_predict": self.NUM_PREDICT,  # Réduire la longueur de réponse
                         "num_ctx": 2048  # Réduire le contexte
                     }
                 },
-                timeout=180
+                stream=on_sections is not None,
+                # En streaming, le timeout de lecture s'applique entre deux morceaux
+                timeout=self._timeout(180)
             )
 
-            print("✅ Réponse reçue d'Ollama")
+            with response:
+                if response.status_code != 200:
+                    return {
+                        'success': False,
+                        'error': f"Erreur API Ollama: {response.status_code}",
+                        'analysis': "Impossible de générer l'analyse IA."
+                    }
 
-            if response.status_code == 200:
-                result = response.json()
-                analysis = result.get('response', '')
+                if on_sections is None:
+                    analysis = response.json().get('response', '')
+                else:
+                    analysis = self._lire_flux(response, on_sections)
 
-                # Nettoyer et structurer la réponse
-                return self._parse_ai_response(analysis, stats)
-            else:
-                return {
-                    'success': False,
-                    'error': f"Erreur API Ollama: {response.status_code}",
-                    'analysis': "Impossible de générer l'analyse IA."
-                }
+            print("✅ Réponse reçue d'Ollama")
 
+            # Nettoyer et structurer la réponse
+            return self._parse_ai_response(analysis, stats)
 
         except requests.exceptions.Timeout:
             print("⏰ Timeout Ollama - La réponse prend trop de temps")
@@ -150,6 +264,30 @@ class OllamaService:
                 'analysis': "Erreur lors de la génération de l'analyse."
             }
 
+    def _lire_flux(self, response, on_sections):
+        """Consomme le flux NDJSON d'Ollama et découpe les sections au fil de l'eau"""
+        analyse = AnalyseIncrementale()
+        morceaux = []
+
+        for ligne in response.iter_lines():
+            if not ligne:
+                continue
+
+            chunk = json.loads(ligne)
+            if chunk.get('error'):
+                raise ValueError(chunk['error'])
+
+            texte = chunk.get('response', '')
+            morceaux.append(texte)
+
+            if analyse.ajouter(texte):
+                on_sections(analyse.sections_courantes(), len(morceaux))
+
+            if chunk.get('done'):
+                break
+
+        return ''.join(morceaux)
+
     def _create_report_prompt(self, month, year, stats):
         """Crée le prompt pour l'analyse du rapport"""
 
@@ -166,7 +304,7 @@ class OllamaService:
     - Interventions en cours: {stats.get('ongoing_interventions', 0)}
     - Taux de réussite: {stats.get('success_rate', 0):.1f}%
     - Indice de performance interne (basé sur le taux de réussite): {stats.get('performance_score', 0):.1f}/10
-    - Durée moyenne: {stats.get('avg_duration', 'N/A')}
+    - Durée moyenne: {stats.get('avg_duration', 'N/A')} (médiane: {stats.get('median_duration', 'N/A')}, min: {stats.get('min_duration', 'N/A')}, max: {stats.get('max_duration', 'N/A')})
     - Chiffre d'affaires total: {stats.get('total_revenue', 0):,.0f} FCFA
 
     ## IMPORTANT:
@@ -219,31 +357,10 @@ class OllamaService:
         # Retirer les éventuels marqueurs de code
         response = response.replace("```html", "").replace("```", "").strip()
 
-        # Séparer les sections
-        sections = {
-            'summary': '',
-            'recommendations': '',
-            'technical_analysis': '',
-            'predictive_maintenance': ''
-        }
-
-        # Simple parsing par sections (améliorable)
-        lines = response.split('\n')
-        current_section = None
-
-        for line in lines:
-            line_lower = line.lower()
-            if 'résumé' in line_lower or 'executif' in line_lower:
-                current_section = 'summary'
-            elif 'recommandation' in line_lower:
-                current_section = 'recommendations'
-            elif 'technique' in line_lower:
-                current_section = 'technical_analysis'
-            elif 'prédictive' in line_lower:
-                current_section = 'predictive_maintenance'
-
-            if current_section and line.strip():
-                sections[current_section] += line + '\n'
+        # Séparer les sections (même découpage que pendant le streaming)
+        analyse = AnalyseIncrementale()
+        analyse.ajouter(response)
+        sections = analyse.terminer()
 
         # Si le parsing a échoué, mettre tout dans le résumé
         if not any(sections.values()):
@@ -0,0 +1,313 @@
+import io
+import math
+import os
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+from django.utils.formats import date_format
+from core.pdf_cache import CachePDF
+from core.pdf_theme import theme_pdf
+from interventions.models import Intervention
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak
+
+
+# Couleurs des graphiques (charte de l'application)
+COULEURS = [
+    colors.HexColor('#2FD1FA'),
+    colors.HexColor('#2c3e50'),
+    colors.HexColor('#f6c23e'),
+    colors.HexColor('#1cc88a'),
+    colors.HexColor('#e74a3b'),
+    colors.HexColor('#858796'),
+]
+
+# Taille d'un graphique (en points) : deux par ligne sur une page A4
+LARGEUR_GRAPHIQUE = 3.2 * inch
+HAUTEUR_GRAPHIQUE = 2.2 * inch
+
+
+class ReportPDFService:
+    """
+    Export PDF des rapports IA, mis en cache sous MEDIA_ROOT.
+
+    Comme pour les interventions, le PDF est construit à partir d'un
+    dictionnaire (contenu()) dont l'empreinte nomme le fichier en cache : il
+    n'est reconstruit que si le rapport enregistré change. Les graphiques sont
+    dessinés en vectoriel par ReportLab à partir de statistics_data.
+    """
+
+    # À incrémenter quand la mise en page change : invalide tous les PDF en cache
+    VERSION = 1
+    CACHE = CachePDF(os.path.join('pdf_cache', 'reports'))
+
+    # Champs imprimés : un enregistrement qui n'en modifie aucun garde le PDF en cache
+    CHAMPS_IMPRIMES = {
+        'title', 'month', 'total_interventions', 'total_revenue', 'success_rate', 'customer_satisfaction_score',
+        'avg_intervention_duration', 'summary', 'recommendations', 'technical_analysis',
+        'predictive_maintenance', 'generated_by', 'generated_at', 'statistics_data',
+    }
+
+    SECTIONS = (
+        ('summary', "RÉSUMÉ"),
+        ('recommendations', "RECOMMANDATIONS"),
+        ('technical_analysis', "ANALYSE TECHNIQUE"),
+        ('predictive_maintenance', "MAINTENANCE PRÉDICTIVE"),
+    )
+
+    # ==================== CONTENU ====================
+
+    @staticmethod
+    def contenu(report):
+        """Textes et données des graphiques imprimés dans le PDF (tout ce dont dépend le document)"""
+        stats = report.get_statistics()
+        auteur = report.generated_by
+
+        chiffres = [
+            ['Période:', date_format(report.month, 'F Y')],
+            ['Interventions:', str(report.total_interventions)],
+            ['Taux de réussite:', report.get_success_rate_display()],
+            ['Chiffre d\'affaires:', f"{report.total_revenue:,.0f} FCFA".replace(',', ' ')],
+            ['Durée moyenne:', report.get_avg_duration_display()],
+            ['Indice de performance:', report.get_performance_score_display()],
+        ]
+        for cle, libelle in (('min_duration', 'Durée minimale:'),
+                             ('median_duration', 'Durée médiane:'),
+                             ('max_duration', 'Durée maximale:')):
+            if stats.get(cle) and stats[cle] != 'N/A':
+                chiffres.append([libelle, stats[cle]])
+
+        return {
+            'version': ReportPDFService.VERSION,
+            'id': report.id,
+            'titre': report.title,
+            'chiffres': chiffres,
+            'sections': [
+                [titre, getattr(report, champ)] for champ, titre in ReportPDFService.SECTIONS
+                if getattr(report, champ)
+            ],
+            'graphiques': ReportPDFService._donnees_graphiques(stats),
+            'auteur': auteur.get_full_name() or auteur.username,
+            'date_generation': timezone.localtime(report.generated_at).strftime("%d/%m/%Y à %H:%M"),
+        }
+
+    @staticmethod
+    def _donnees_graphiques(stats):
+        """Séries [libellé, nombre] des graphiques, sans les valeurs nulles"""
+        total = stats.get('total_interventions') or 0
+        terminees = stats.get('completed_interventions') or 0
+        en_cours = stats.get('ongoing_interventions') or 0
+        statuts = [
+            ['Terminées', terminees],
+            ['En cours', en_cours],
+            ['Prévues / annulées', max(0, total - terminees - en_cours)],
+        ]
+
+        libelles_types = dict(Intervention.TYPE_INTERVENTION_CHOICES)
+        types = [
+            [libelles_types.get(ligne.get('type_intervention'), ligne.get('type_intervention') or '?'),
+             ligne.get('count') or 0]
+            for ligne in stats.get('interventions_by_type') or []
+        ]
+
+        techniciens = [
+            [ligne.get('technicien__nom') or '?', ligne.get('intervention_count') or 0]
+            for ligne in stats.get('top_technicians') or []
+        ]
+
+        return {
+            'statuts': [serie for serie in statuts if serie[1]],
+            'types': [serie for serie in types if serie[1]],
+            'techniciens': [serie for serie in techniciens if serie[1]],
+        }
+
+    # ==================== GRAPHIQUES ====================
+
+    @staticmethod
+    def _dessin(titre):
+        dessin = Drawing(LARGEUR_GRAPHIQUE, HAUTEUR_GRAPHIQUE)
+        dessin.add(String(
+            LARGEUR_GRAPHIQUE / 2, HAUTEUR_GRAPHIQUE - 12, titre,
+            fontName='Helvetica-Bold', fontSize=9,
+            fillColor=colors.HexColor('#2c3e50'), textAnchor='middle'
+        ))
+        return dessin
+
+    @staticmethod
+    def _barres(series, titre, horizontal=False):
+        """Diagramme en barres d'une série de comptages"""
+        dessin = ReportPDFService._dessin(titre)
+        graphique = HorizontalBarChart() if horizontal else VerticalBarChart()
+
+        # Marge gauche plus large pour les noms en ordonnée
+        graphique.x = 85 if horizontal else 30
+        graphique.y = 15 if horizontal else 25
+        graphique.width = LARGEUR_GRAPHIQUE - graphique.x - 10
+        graphique.height = HAUTEUR_GRAPHIQUE - graphique.y - 25
+
+        if horizontal:
+            # Le premier (le plus actif) en haut
+            series = series[::-1]
+        graphique.data = [[nombre for _, nombre in series]]
+        graphique.categoryAxis.categoryNames = [libelle[:18] for libelle, _ in series]
+        graphique.categoryAxis.labels.fontSize = 7
+        graphique.bars[0].fillColor = COULEURS[0]
+        graphique.bars[0].strokeColor = None
+
+        # Graduations entières (ce sont des nombres d'interventions)
+        maximum = max(nombre for _, nombre in series)
+        graphique.valueAxis.valueMin = 0
+        graphique.valueAxis.valueStep = max(1, math.ceil(maximum / 5))
+        graphique.valueAxis.valueMax = graphique.valueAxis.valueStep * math.ceil(maximum / graphique.valueAxis.valueStep)
+        graphique.valueAxis.labels.fontSize = 7
+        graphique.valueAxis.labelTextFormat = '%d'
+
+        dessin.add(graphique)
+        return dessin
+
+    @staticmethod
+    def _camembert(series, titre):
+        """Répartition d'une série de comptages"""
+        dessin = ReportPDFService._dessin(titre)
+        graphique = Pie()
+        # Petit disque : les libellés sont placés de part et d'autre
+        diametre = HAUTEUR_GRAPHIQUE - 70
+        graphique.x = (LARGEUR_GRAPHIQUE - diametre) / 2
+        graphique.y = 25
+        graphique.width = graphique.height = diametre
+
+        graphique.data = [nombre for _, nombre in series]
+        graphique.labels = [f"{libelle} ({nombre})" for libelle, nombre in series]
+        graphique.sideLabels = True
+        graphique.slices.fontSize = 7
+        graphique.slices.strokeColor = colors.white
+        for i in range(len(series)):
+            graphique.slices[i].fillColor = COULEURS[i % len(COULEURS)]
+
+        dessin.add(graphique)
+        return dessin
+
+    @staticmethod
+    def _graphiques(donnees):
+        """Graphiques disponibles, dans l'ordre d'affichage"""
+        graphiques = []
+        if donnees['statuts']:
+            graphiques.append(ReportPDFService._camembert(donnees['statuts'], "Interventions par statut"))
+        if donnees['types']:
+            graphiques.append(ReportPDFService._barres(donnees['types'], "Interventions par type"))
+        if donnees['techniciens']:
+            graphiques.append(ReportPDFService._barres(
+                donnees['techniciens'], "Techniciens les plus sollicités", horizontal=True
+            ))
+        return graphiques
+
+    # ==================== GÉNÉRATION ====================
+
+    @staticmethod
+    def _paragraphes(texte, style):
+        """Texte libre de l'IA : une ligne par paragraphe, échappé pour ReportLab"""
+        paragraphes = []
+        for ligne in texte.splitlines():
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            if ligne[:2] in ('- ', '* '):
+                ligne = f"• {ligne[2:]}"
+            paragraphes.append(Paragraph(escape(ligne), style))
+        return paragraphes
+
+    @staticmethod
+    def _story(contenu):
+        """Éléments ReportLab du rapport IA"""
+        theme = theme_pdf()
+        styles, tableaux = theme.styles, theme.tableaux
+        story = []
+
+        # ==================== LOGO ====================
+        logo = theme.image('logo')
+        if logo:
+            story.append(logo)
+            story.append(Spacer(1, 0.1 * inch))
+        else:
+            # Logo de secours (texte)
+            story.append(Paragraph("SOLAR MAINTENANCE", styles['main_title']))
+            story.append(Paragraph("Gestion des interventions solaires", styles['main_subtitle']))
+
+        # Titre du document
+        story.append(Paragraph(escape(contenu['titre'].upper()), styles['report_title']))
+        story.append(Spacer(1, 0.2 * inch))
+
+        # ==================== CHIFFRES CLÉS ====================
+        story.append(Paragraph("CHIFFRES CLÉS", styles['subtitle']))
+        table_chiffres = Table(contenu['chiffres'], colWidths=[2 * inch, 3.5 * inch])
+        table_chiffres.setStyle(tableaux['cle_valeur'])
+        story.append(table_chiffres)
+
+        # ==================== GRAPHIQUES ====================
+        graphiques = ReportPDFService._graphiques(contenu['graphiques'])
+        if graphiques:
+            story.append(Paragraph("RÉPARTITION", styles['subtitle']))
+            lignes = [graphiques[i:i + 2] for i in range(0, len(graphiques), 2)]
+            if len(lignes[-1]) == 1:
+                lignes[-1].append('')
+            table_graphiques = Table(lignes, colWidths=[LARGEUR_GRAPHIQUE] * 2)
+            table_graphiques.setStyle(tableaux['image_texte'])
+            story.append(table_graphiques)
+
+        story.append(PageBreak())  # L'analyse commence une nouvelle page
+
+        # ==================== ANALYSE ====================
+        for titre, texte in contenu['sections']:
+            story.append(Paragraph(titre, styles['subtitle']))
+            story.extend(ReportPDFService._paragraphes(texte, styles['body']))
+
+        story.append(Spacer(1, 0.4 * inch))
+        story.append(Paragraph(
+            f"Rapport généré le {contenu['date_generation']} par {escape(contenu['auteur'])}",
+            styles['date']
+        ))
+        return story
+
+    @staticmethod
+    def generer(contenu):
+        """Construit le PDF (bytes) à partir du contenu ; n'accède pas à la base"""
+        buffer = io.BytesIO()
+        SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=50,
+            leftMargin=50,
+            topMargin=30,
+            bottomMargin=50,
+            title=contenu['titre']
+        ).build(ReportPDFService._story(contenu))
+        return buffer.getvalue()
+
+    # ==================== CACHE ====================
+
+    @staticmethod
+    def obtenir(report):
+        """Chemin du PDF à jour du rapport, généré au premier téléchargement après chaque modification"""
+        return ReportPDFService.CACHE.obtenir(report.pk, ReportPDFService.contenu(report), ReportPDFService.generer)
+
+    @staticmethod
+    def invalider(report_pk):
+        """Supprime les PDF en cache du rapport"""
+        ReportPDFService.CACHE.invalider(report_pk)
+
+    @staticmethod
+    def purger():
+        """Supprime les PDF qui ne servent plus (voir CachePDF.purger)"""
+        return ReportPDFService.CACHE.purger()
+
+    @staticmethod
+    def reponse(report):
+        """Téléchargement du PDF à jour du rapport"""
+        return ReportPDFService.CACHE.reponse(
+            report.pk, ReportPDFService.contenu(report), ReportPDFService.generer, f"rapport_ia_{report.id}.pdf"
+        )
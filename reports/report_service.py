@@ -0,0 +1,335 @@
+import calendar
+import json
+import time
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from interventions.models import Intervention
+from .cache_service import AnalysisCacheService
+from .models import Report, ReportJob
+from .ollama_service import OllamaService
+
+
+class ReportGenerationError(Exception):
+    """Erreur empêchant la génération d'un rapport (Ollama indisponible, aucune donnée...)"""
+
+
+def generate_manual_recommendations(stats):
+    """Génère des recommandations manuelles basées sur les statistiques"""
+    recommendations = []
+
+    # Basé sur le taux de réussite
+    success_rate = stats.get('success_rate', 0)
+    if success_rate < 70:
+        recommendations.append("Améliorer le taux de réussite en formant les techniciens sur les pannes fréquentes.")
+    elif success_rate > 90:
+        recommendations.append("Maintenir l'excellence opérationnelle actuelle.")
+
+    # Basé sur la durée moyenne
+    avg_duration = stats.get('avg_duration_hours')
+    if avg_duration and avg_duration > 4:
+        recommendations.append("Optimiser les temps d'intervention en standardisant les procédures.")
+
+    # Basé sur le nombre d'interventions
+    total_interventions = stats.get('total_interventions', 0)
+    if total_interventions > 50:
+        recommendations.append("Considérer l'embauche d'un technicien supplémentaire pour gérer la charge.")
+
+    # Recommandations par défaut
+    if not recommendations:
+        recommendations = [
+            "Maintenir un stock suffisant de pièces de rechange courantes.",
+            "Planifier des maintenances préventives pour les installations de plus de 2 ans.",
+            "Former régulièrement les techniciens sur les nouvelles technologies solaires."
+        ]
+
+    return "\n".join([f"- {rec}" for rec in recommendations])
+
+
+def format_duration(hours_float):
+    """Formate une durée en heures décimales en format lisible"""
+    if hours_float is None:
+        return "N/A"
+
+    total_seconds = int(hours_float * 3600)
+
+    # Si c'est moins d'une minute, afficher en secondes
+    if total_seconds < 60:
+        return f"{total_seconds} secondes"
+
+    # Si c'est moins d'une heure, afficher en minutes
+    if total_seconds < 3600:
+        minutes = total_seconds // 60
+        seconds = total_seconds % 60
+        if seconds > 0:
+            return f"{minutes} minutes {seconds} secondes"
+        return f"{minutes} minutes"
+
+    # Pour les durées plus longues, afficher en heures et minutes
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+
+    if minutes > 0:
+        return f"{hours} heures {minutes} minutes"
+    return f"{hours} heures"
+
+
+class ReportGenerationService:
+    """File d'attente des rapports IA : la vue enregistre un job, le worker le traite"""
+
+    # Fréquence maximale (en secondes) d'enregistrement des sections en streaming
+    INTERVALLE_STREAMING = 1
+
+    @staticmethod
+    def interventions_du_mois(month, year):
+        """Interventions dont la date tombe dans le mois demandé"""
+        start_date = datetime(year, month, 1)
+        end_date = datetime(year, month, calendar.monthrange(year, month)[1])
+
+        return Intervention.objects.filter(
+            date_intervention__date__gte=start_date.date(),
+            date_intervention__date__lte=end_date.date()
+        )
+
+    @staticmethod
+    def calculer_statistiques(month, year):
+        """Calcule les statistiques du mois envoyées à l'IA (None si aucune intervention)"""
+        interventions = ReportGenerationService.interventions_du_mois(month, year)
+
+        # Compteurs par statut et chiffre d'affaires en une seule requête
+        compteurs = interventions.compteurs()
+
+        total_interventions = compteurs['total']
+        if total_interventions == 0:
+            return None
+
+        # Interventions terminées et taux de réussite
+        completed_interventions = compteurs['terminee']
+        success_rate = (completed_interventions / total_interventions) * 100
+
+        # Score de performance interne (sur 10) - PAS satisfaction client!
+        performance_score = round(success_rate / 10, 1)
+
+        # Durées (moyenne, min, max, percentiles) calculées en base
+        durees = interventions.filter(statut='terminee').statistiques_durees()
+
+        def en_heures(duree):
+            return duree.total_seconds() / 3600 if duree is not None else None
+
+        avg_duration_hours = en_heures(durees['moyenne'])
+
+        # Répartition par type
+        interventions_by_type = interventions.values('type_intervention').annotate(
+            count=Count('id')
+        ).order_by('-count')
+
+        # Top techniciens
+        top_technicians = interventions.exclude(technicien=None).values(
+            'technicien__nom', 'technicien__id'
+        ).annotate(
+            intervention_count=Count('id')
+        ).order_by('-intervention_count')[:5]
+
+        return {
+            'total_interventions': total_interventions,
+            'completed_interventions': completed_interventions,
+            'ongoing_interventions': compteurs['en_cours'],
+            'success_rate': success_rate,
+            'performance_score': performance_score,
+            'avg_duration': format_duration(avg_duration_hours),
+            'avg_duration_hours': avg_duration_hours,
+            'min_duration': format_duration(en_heures(durees['minimum'])),
+            'max_duration': format_duration(en_heures(durees['maximum'])),
+            'median_duration': format_duration(en_heures(durees['mediane'])),
+            'total_revenue': float(compteurs['revenus_total']),
+            'interventions_by_type': list(interventions_by_type),
+            'top_technicians': list(top_technicians),
+            'month': month,
+            'year': year
+        }
+
+    @staticmethod
+    def creer_rapport(month, year, stats, ai_result, user):
+        """Enregistre le rapport, avec l'analyse IA ou des recommandations manuelles"""
+        month_label = f"{calendar.month_name[month]} {year}"
+        champs = {
+            'month': datetime(year, month, 1).date(),
+            'generated_by': user,
+            'total_interventions': stats['total_interventions'],
+            'total_revenue': stats['total_revenue'],
+            'success_rate': stats['success_rate'],
+            'customer_satisfaction_score': stats['performance_score'],
+            'avg_intervention_duration': stats['avg_duration_hours'],
+            'statistics_data': json.dumps(stats, default=str),
+            'ai_raw_response': json.dumps(ai_result, default=str),
+        }
+
+        if ai_result.get('success', False):
+            sections = ai_result.get('sections', {})
+            return Report.objects.create(
+                title=f"Rapport {month_label}",
+                summary=sections.get('summary', 'Analyse IA non disponible.'),
+                recommendations=sections.get('recommendations', ''),
+                technical_analysis=sections.get('technical_analysis', ''),
+                predictive_maintenance=sections.get('predictive_maintenance', ''),
+                **champs
+            )
+
+        error_msg = ai_result.get('error', 'Erreur inconnue')
+        return Report.objects.create(
+            title=f"Rapport {month_label} (sans IA)",
+            summary=f"Rapport statistique pour {month_label}. Analyse IA indisponible: {error_msg}",
+            recommendations=generate_manual_recommendations(stats),
+            technical_analysis="Analyse technique non disponible (erreur IA).",
+            predictive_maintenance="Prédictions non disponibles (erreur IA).",
+            **champs
+        )
+
+    # ==================== FILE D'ATTENTE ====================
+
+    @staticmethod
+    def mettre_en_file(month, year, user, forcer=False):
+        """Enregistre une demande de rapport ; le worker s'occupe du reste"""
+        return ReportJob.objects.create(
+            month=month,
+            year=year,
+            forcer=forcer,
+            requested_by=user,
+            message="En attente d'un worker disponible"
+        )
+
+    @staticmethod
+    def reserver_prochain_job():
+        """Réserve le plus ancien job en attente (plusieurs workers peuvent tourner en parallèle)"""
+        with transaction.atomic():
+            job = ReportJob.objects.select_for_update(skip_locked=True).filter(
+                statut='en_attente'
+            ).order_by('created_at').first()
+
+            if job is None:
+                return None
+
+            job.statut = 'en_cours'
+            job.started_at = job.derniere_activite = timezone.now()
+            job.tentatives += 1
+            job.progression = 5
+            job.message = "Préparation du rapport"
+            job.save(update_fields=['statut', 'started_at', 'derniere_activite', 'tentatives', 'progression', 'message'])
+            return job
+
+    @staticmethod
+    def recuperer_jobs_abandonnes():
+        """
+        Jobs « en cours » sans activité depuis ReportJob.DELAI_INACTIVITE (worker
+        arrêté ou tué) : remis en file, ou en échec après MAX_TENTATIVES.
+        Renvoie le nombre de jobs remis en file et passés en échec.
+        """
+        maintenant = timezone.now()
+        limite = maintenant - ReportJob.DELAI_INACTIVITE
+        abandonnes = ReportJob.objects.filter(statut='en_cours').filter(
+            Q(derniere_activite__lt=limite) | Q(derniere_activite__isnull=True, started_at__lt=limite)
+        )
+
+        relances = abandonnes.filter(tentatives__lt=ReportJob.MAX_TENTATIVES).update(
+            statut='en_attente',
+            progression=0,
+            sections_partielles={},
+            message="Relancé : le worker précédent s'est arrêté"
+        )
+        echecs = abandonnes.update(
+            statut='echec',
+            erreur=f"Worker arrêté pendant la génération ({ReportJob.MAX_TENTATIVES} tentatives)",
+            message="La génération du rapport a échoué",
+            finished_at=maintenant
+        )
+        return relances, echecs
+
+    @staticmethod
+    def traiter(job):
+        """Génère le rapport d'un job réservé et enregistre son état final"""
+        try:
+            report = ReportGenerationService._generer(job)
+        except Exception as e:
+            job.statut = 'echec'
+            job.erreur = str(e)
+            job.message = "La génération du rapport a échoué"
+            job.finished_at = timezone.now()
+            job.save(update_fields=['statut', 'erreur', 'message', 'finished_at'])
+            return None
+
+        job.statut = 'termine'
+        job.report = report
+        job.progression = 100
+        job.message = f"Rapport #{report.id} généré avec succès!"
+        job.finished_at = timezone.now()
+        job.save(update_fields=['statut', 'report', 'progression', 'message', 'finished_at'])
+        return report
+
+    @staticmethod
+    def _suivi_streaming(job, tokens_attendus):
+        """Callback qui enregistre les sections partielles, au plus une fois par seconde"""
+        dernier_enregistrement = [0.0]
+
+        def enregistrer(sections, morceaux_recus):
+            maintenant = time.monotonic()
+            if maintenant - dernier_enregistrement[0] < ReportGenerationService.INTERVALLE_STREAMING:
+                return
+            dernier_enregistrement[0] = maintenant
+
+            # La progression avance de 30 à 85% au fil des tokens reçus
+            progression = 30 + min(55, morceaux_recus * 55 // tokens_attendus)
+            job.mettre_a_jour(progression=progression, message="Rédaction de l'analyse IA", sections=sections)
+
+        return enregistrer
+
+    @staticmethod
+    def _generer(job):
+        job.mettre_a_jour(progression=10, message="Calcul des statistiques du mois")
+        stats = ReportGenerationService.calculer_statistiques(job.month, job.year)
+        if stats is None:
+            raise ReportGenerationError(
+                f"Aucune intervention trouvée pour {calendar.month_name[job.month]} {job.year}"
+            )
+
+        ollama = OllamaService()
+        fingerprint = AnalysisCacheService.empreinte(ollama.model_name, ollama.PROMPT_VERSION, stats)
+
+        # Statistiques inchangées : réutiliser l'analyse déjà produite par le modèle
+        ai_result = None if job.forcer else AnalysisCacheService.lire(fingerprint)
+
+        if ai_result is None:
+            job.mettre_a_jour(progression=20, message="Vérification de la connexion Ollama")
+            connection = ollama.check_connection(use_cache=False)
+
+            if not connection.get('available', False):
+                raise ReportGenerationError(
+                    "Ollama n'est pas connecté. "
+                    "Vérifiez que le serveur Ollama est en cours d'exécution: ollama serve"
+                )
+
+            if not connection.get('model_available', False):
+                raise ReportGenerationError(
+                    f"Le modèle '{ollama.model_name}' n'est pas disponible. "
+                    "Essayez un modèle plus léger: ollama pull phi3 ou ollama pull gemma3:4b"
+                )
+
+            job.mettre_a_jour(progression=30, message="Analyse IA en cours")
+            ai_result = ollama.generate_report_analysis(
+                job.month, job.year, stats,
+                on_sections=ReportGenerationService._suivi_streaming(job, ollama.NUM_PREDICT)
+            )
+            AnalysisCacheService.enregistrer(fingerprint, ollama.model_name, ollama.PROMPT_VERSION, ai_result)
+        else:
+            job.mettre_a_jour(
+                progression=80,
+                message="Analyse IA reprise du cache (statistiques inchangées)",
+                sections=ai_result.get('sections', {})
+            )
+
+        job.mettre_a_jour(progression=90, message="Enregistrement du rapport")
+        return ReportGenerationService.creer_rapport(
+            job.month, job.year, stats, ai_result, job.requested_by
+        )
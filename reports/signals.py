@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender='reports.Report')
+def invalider_pdf(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    """Le PDF en cache du rapport ne correspond plus à son contenu (champs imprimés modifiés)"""
+    from .pdf_service import ReportPDFService
+    if created or raw:
+        return  # Rien en cache pour un nouveau rapport
+    if update_fields is not None and not ReportPDFService.CHAMPS_IMPRIMES & set(update_fields):
+        return
+    ReportPDFService.invalider(instance.pk)
+
+
+@receiver(post_delete, sender='reports.Report')
+def supprimer_pdf(sender, instance, **kwargs):
+    from .pdf_service import ReportPDFService
+    ReportPDFService.invalider(instance.pk)
@@ -1,3 +1,342 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import creer_intervention
+from .cache_service import AnalysisCacheService
+from .models import AIAnalysisCache, Report, ReportJob
+from .ollama_service import OllamaService, get_session
+from .pdf_service import ReportPDFService
+from .report_service import ReportGenerationService
+
+
+# Réponse de l'IA découpée en morceaux qui coupent les lignes n'importe où, comme les tokens d'Ollama
+REPONSE_IA = (
+    "**RÉSUMÉ EXÉCUTIF**\nMois stable.\n"
+    "**RECOMMANDATIONS CLÉS**\n1. Former les techniciens\n"
+    "**ANALYSE TECHNIQUE**\nPeu de pannes.\n"
+    "**MAINTENANCE PRÉDICTIVE**\nPrévoir les batteries."
+)
+MORCEAUX_IA = [REPONSE_IA[i:i + 7] for i in range(0, len(REPONSE_IA), 7)]
+
+
+class FauxOllama(BaseHTTPRequestHandler):
+    """Serveur Ollama minimal : /api/generate en NDJSON (stream) ou en JSON"""
+
+    # Réponse suivante forcée par le test : None, 'erreur_http' ou 'erreur_flux'
+    incident = None
+    requetes = []
+
+    def do_POST(self):
+        corps = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        FauxOllama.requetes.append(corps)
+
+        if self.incident == 'erreur_http':
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson' if corps['stream'] else 'application/json')
+        self.end_headers()
+
+        if not corps['stream']:
+            self.wfile.write(json.dumps({'response': REPONSE_IA, 'done': True}).encode())
+            return
+
+        for morceau in MORCEAUX_IA:
+            self.wfile.write(json.dumps({'response': morceau, 'done': False}).encode() + b'\n')
+            self.wfile.flush()
+            if self.incident == 'erreur_flux':
+                self.wfile.write(json.dumps({'error': 'modèle déchargé'}).encode() + b'\n')
+                return
+        self.wfile.write(json.dumps({'response': '', 'done': True}).encode() + b'\n')
+
+    def log_message(self, *args):
+        pass
+
+
+STATS = {
+    'total_interventions': 3, 'completed_interventions': 2, 'ongoing_interventions': 1,
+    'success_rate': 66.7, 'performance_score': 6.7, 'total_revenue': 60000,
+    'interventions_by_type': [], 'top_technicians': [],
+}
+
+
+class OllamaStreamingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.serveur = ThreadingHTTPServer(('127.0.0.1', 0), FauxOllama)
+        threading.Thread(target=cls.serveur.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.serveur.shutdown()
+        cls.serveur.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FauxOllama.incident = None
+        FauxOllama.requetes = []
+        self.ollama = OllamaService(base_url=f"http://127.0.0.1:{self.serveur.server_port}")
+        self.appels = []
+
+    def suivre(self, sections, morceaux_recus):
+        self.appels.append((sections, morceaux_recus))
+
+    def test_sections_recues_au_fil_du_flux(self):
+        resultat = self.ollama.generate_report_analysis(1, 2025, STATS, on_sections=self.suivre)
+
+        self.assertTrue(resultat['success'])
+        self.assertTrue(FauxOllama.requetes[0]['stream'])
+        self.assertEqual(resultat['sections']['predictive_maintenance'], "**MAINTENANCE PRÉDICTIVE**\nPrévoir les batteries.\n")
+
+        # Une notification par ligne complète, sections partielles de plus en plus longues
+        self.assertEqual(len(self.appels), REPONSE_IA.count('\n'))
+        self.assertEqual(self.appels[0][0]['summary'], "**RÉSUMÉ EXÉCUTIF**\n")
+        self.assertEqual(self.appels[-1][0]['predictive_maintenance'], "**MAINTENANCE PRÉDICTIVE**\n")
+        self.assertLess(self.appels[-1][1], len(MORCEAUX_IA))
+
+    def test_flux_et_reponse_complete_identiques(self):
+        flux = self.ollama.generate_report_analysis(1, 2025, STATS, on_sections=self.suivre)
+        complete = self.ollama.generate_report_analysis(1, 2025, STATS)
+
+        self.assertFalse(FauxOllama.requetes[1]['stream'])
+        self.assertEqual(flux['sections'], complete['sections'])
+
+    def test_erreur_dans_le_flux(self):
+        FauxOllama.incident = 'erreur_flux'
+        resultat = self.ollama.generate_report_analysis(1, 2025, STATS, on_sections=self.suivre)
+
+        self.assertEqual((resultat['success'], resultat['error']), (False, 'modèle déchargé'))
+
+    def test_erreur_http(self):
+        FauxOllama.incident = 'erreur_http'
+        resultat = self.ollama.generate_report_analysis(1, 2025, STATS, on_sections=self.suivre)
+
+        self.assertFalse(resultat['success'])
+        self.assertEqual(self.appels, [])
+
+
+class OllamaSessionTests(TestCase):
+    """Session HTTP partagée et statut de connexion mis en cache (requests simulé)"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        reponse = mock.Mock(status_code=200)
+        reponse.json.return_value = {'models': [{'name': 'gemma3:4b'}]}
+        patch = mock.patch.object(get_session(), 'get', return_value=reponse)
+        self.get = patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_une_session_pour_tout_le_processus(self):
+        self.assertIs(OllamaService().session, OllamaService().session)
+        self.assertIs(OllamaService(base_url='http://ollama:11434').session, get_session())
+        self.assertIsInstance(get_session(), requests.Session)
+
+    def test_statut_en_cache(self):
+        premier = OllamaService().check_connection()
+        second = OllamaService().check_connection()
+
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(premier, second)
+        self.assertTrue(premier['model_available'])
+
+    def test_verification_sans_cache(self):
+        OllamaService().check_connection()
+        OllamaService().check_connection(use_cache=False)
+
+        self.assertEqual(self.get.call_count, 2)
+
+    @override_settings(OLLAMA_STATUS_CACHE_SECONDS=0)
+    def test_statut_expire_apres_sa_duree(self):
+        OllamaService().check_connection()
+        OllamaService().check_connection()
+
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_serveur_injoignable_mis_en_cache(self):
+        self.get.side_effect = requests.exceptions.ConnectionError
+
+        self.assertFalse(OllamaService().check_connection()['available'])
+        self.assertFalse(OllamaService().check_connection()['available'])
+        self.assertEqual(self.get.call_count, 1)
+
+
+class AnalysisCacheTests(TestCase):
+    """Analyses IA réutilisées tant que les statistiques du mois ne changent pas"""
+
+    RESULTAT_IA = {'success': True, 'sections': {'summary': 'Mois calme.'}, 'model': 'gemma3:4b'}
+    CONNEXION = {'available': True, 'model_available': True}
+
+    def setUp(self):
+        self.user = User.objects.create_user('gestionnaire')
+        self.intervention = creer_intervention(statut='terminee')
+        self.maintenant = timezone.now()
+
+    def generer(self, forcer=False):
+        """Génère le rapport du mois ; renvoie le nombre d'appels au modèle"""
+        job = ReportGenerationService.mettre_en_file(self.maintenant.month, self.maintenant.year, self.user, forcer)
+        job = ReportGenerationService.reserver_prochain_job()
+        with mock.patch.object(OllamaService, 'check_connection', return_value=self.CONNEXION), \
+                mock.patch.object(OllamaService, 'generate_report_analysis', return_value=self.RESULTAT_IA) as appel:
+            self.assertIsNotNone(ReportGenerationService.traiter(job))
+        return appel.call_count
+
+    def test_statistiques_identiques_servies_par_le_cache(self):
+        self.assertEqual(self.generer(), 1)
+        self.assertEqual(self.generer(), 0)
+
+        self.assertEqual(AIAnalysisCache.objects.get().hits, 1)
+        self.assertEqual(Report.objects.latest('pk').summary, 'Mois calme.')
+
+    def test_forcer_ignore_le_cache(self):
+        self.generer()
+        self.assertEqual(self.generer(forcer=True), 1)
+
+    def test_statistiques_modifiees(self):
+        self.generer()
+        creer_intervention(self.intervention.client, statut='en_cours')
+
+        self.assertEqual(self.generer(), 1)
+        self.assertEqual(AIAnalysisCache.objects.count(), 2)
+
+    def test_empreinte_insensible_au_bruit_de_calcul(self):
+        self.assertEqual(
+            AnalysisCacheService.empreinte('m', 1, {'taux': 66.66666661}),
+            AnalysisCacheService.empreinte('m', 1, {'taux': 66.66666659})
+        )
+        self.assertNotEqual(
+            AnalysisCacheService.empreinte('m', 1, STATS), AnalysisCacheService.empreinte('m', 2, STATS)
+        )
+
+    def test_echec_non_memorise(self):
+        AnalysisCacheService.enregistrer('e', 'm', 1, {'success': False, 'error': 'timeout'})
+        self.assertFalse(AIAnalysisCache.objects.exists())
+
+    @override_settings(REPORT_AI_CACHE_MAX_ENTRIES=2)
+    def test_eviction_des_moins_recemment_utilisees(self):
+        for empreinte in ('a', 'b'):
+            AnalysisCacheService.enregistrer(empreinte, 'm', 1, self.RESULTAT_IA)
+        AIAnalysisCache.objects.filter(fingerprint='a').update(last_used_at=timezone.now() - timedelta(hours=1))
+        AIAnalysisCache.objects.filter(fingerprint='b').update(last_used_at=timezone.now() - timedelta(hours=2))
+        AnalysisCacheService.lire('b')  # « b » redevient la plus récente
+
+        AnalysisCacheService.enregistrer('c', 'm', 1, self.RESULTAT_IA)
+
+        self.assertEqual(sorted(AIAnalysisCache.objects.values_list('fingerprint', flat=True)), ['b', 'c'])
+
+
+class ReportJobRepriseTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('gestionnaire')
+
+    def creer_job(self, **kwargs):
+        return ReportJob.objects.create(month=1, year=2025, requested_by=self.user, **kwargs)
+
+    def job_abandonne(self, tentatives=1):
+        """Job réservé par un worker qui ne donne plus signe de vie"""
+        il_y_a = timezone.now() - ReportJob.DELAI_INACTIVITE - timedelta(minutes=1)
+        return self.creer_job(statut='en_cours', tentatives=tentatives, progression=40,
+                              started_at=il_y_a, derniere_activite=il_y_a,
+                              sections_partielles={'summary': '...'})
+
+    def test_reservation_compte_les_tentatives(self):
+        job = self.creer_job()
+        reserve = ReportGenerationService.reserver_prochain_job()
+
+        self.assertEqual(reserve.pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.statut, job.tentatives), ('en_cours', 1))
+        self.assertIsNotNone(job.derniere_activite)
+
+    def test_avancement_entretient_la_reservation(self):
+        job = self.job_abandonne()
+        job.mettre_a_jour(progression=50)
+
+        self.assertEqual(ReportGenerationService.recuperer_jobs_abandonnes(), (0, 0))
+
+    def test_job_abandonne_remis_en_file(self):
+        job = self.job_abandonne()
+
+        self.assertEqual(ReportGenerationService.recuperer_jobs_abandonnes(), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual((job.statut, job.progression, job.sections_partielles), ('en_attente', 0, {}))
+        self.assertEqual(ReportGenerationService.reserver_prochain_job().pk, job.pk)
+
+    def test_job_abandonne_trop_souvent_en_echec(self):
+        job = self.job_abandonne(tentatives=ReportJob.MAX_TENTATIVES)
+
+        self.assertEqual(ReportGenerationService.recuperer_jobs_abandonnes(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.statut, 'echec')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_actif_et_job_en_attente_inchanges(self):
+        self.creer_job(statut='en_cours', tentatives=1, started_at=timezone.now(), derniere_activite=timezone.now())
+        self.creer_job()
+
+        self.assertEqual(ReportGenerationService.recuperer_jobs_abandonnes(), (0, 0))
+
+
+class ReportJobStatusTests(TestCase):
+
+    def test_etat_du_job_en_json(self):
+        user = User.objects.create_user('gestionnaire', password='x')
+        job = ReportJob.objects.create(month=1, year=2025, requested_by=user, statut='en_cours',
+                                       progression=40, sections_partielles={'summary': 'Mois stable.'})
+        self.client.force_login(user)
+
+        etat = self.client.get(reverse('reports:report_job_status', args=[job.pk])).json()
+
+        self.assertEqual((etat['progression'], etat['termine']), (40, False))
+        self.assertEqual(etat['sections'], {'summary': 'Mois stable.'})
+
+
+class ReportPDFCacheTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        reglages = override_settings(MEDIA_ROOT=media.name)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.report = Report.objects.create(
+            title='Rapport janvier', month=date(2025, 1, 1), summary='Mois stable.', recommendations='',
+            technical_analysis='', predictive_maintenance='', generated_by=User.objects.create_user('gestionnaire')
+        )
+        self.chemin = ReportPDFService.obtenir(self.report)
+
+    def test_enregistrement_sans_champ_imprime(self):
+        self.report.ai_raw_response = {'sections': {}}
+        self.report.save(update_fields=['ai_raw_response'])
+
+        self.assertTrue(os.path.exists(self.chemin))
+
+    def test_modification_imprimee_invalide(self):
+        self.report.summary = 'Mois agité.'
+        self.report.save()
+
+        self.assertFalse(os.path.exists(self.chemin))
+        self.assertNotEqual(ReportPDFService.obtenir(self.report), self.chemin)
+
+    def test_suppression(self):
+        self.report.delete()
+
+        self.assertFalse(os.path.exists(self.chemin))
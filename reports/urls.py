@@ -7,8 +7,13 @@ urlpatterns = [
     path('', views.report_list, name='report_list'),
     path('generate/', views.generate_report, name='generate_report'),
     path('<int:pk>/', views.report_detail, name='report_detail'),
+    path('<int:pk>/pdf/', views.report_pdf, name='report_pdf'),
     path('<int:pk>/delete/', views.report_delete, name='report_delete'),
 
+    # Suivi des générations en arrière-plan
+    path('jobs/<int:pk>/', views.report_job, name='report_job'),
+    path('jobs/<int:pk>/status/', views.report_job_status, name='report_job_status'),
+
     # URLs pour la connexion Ollama
     path('check-ollama/', views.check_ollama_status, name='check_ollama_status'),
     path('test-connection/', views.test_ollama_connection, name='test_connection'),
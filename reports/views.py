@@ -2,79 +2,16 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
-from django.db.models import Count, Sum, Avg, Q
 from django.core.paginator import Paginator
-from django.utils import timezone
-from datetime import datetime, timedelta
-import json
+from django.urls import reverse
+from datetime import datetime
 import calendar
+import json
 
-from interventions.models import Intervention
-from techniciens.models import Technicien
-from .models import Report
+from .models import Report, ReportJob
 from .ollama_service import OllamaService
-
-
-# ==================== FONCTIONS UTILITAIRES ====================
-
-def generate_manual_recommendations(stats):
-    """Génère des recommandations manuelles basées sur les statistiques"""
-    recommendations = []
-
-    # Basé sur le taux de réussite
-    success_rate = stats.get('success_rate', 0)
-    if success_rate < 70:
-        recommendations.append("Améliorer le taux de réussite en formant les techniciens sur les pannes fréquentes.")
-    elif success_rate > 90:
-        recommendations.append("Maintenir l'excellence opérationnelle actuelle.")
-
-    # Basé sur la durée moyenne
-    avg_duration = stats.get('avg_duration_hours')
-    if avg_duration and avg_duration > 4:
-        recommendations.append("Optimiser les temps d'intervention en standardisant les procédures.")
-
-    # Basé sur le nombre d'interventions
-    total_interventions = stats.get('total_interventions', 0)
-    if total_interventions > 50:
-        recommendations.append("Considérer l'embauche d'un technicien supplémentaire pour gérer la charge.")
-
-    # Recommandations par défaut
-    if not recommendations:
-        recommendations = [
-            "Maintenir un stock suffisant de pièces de rechange courantes.",
-            "Planifier des maintenances préventives pour les installations de plus de 2 ans.",
-            "Former régulièrement les techniciens sur les nouvelles technologies solaires."
-        ]
-
-    return "\n".join([f"- {rec}" for rec in recommendations])
-
-
-def format_duration(hours_float):
-    """Formate une durée en heures décimales en format lisible"""
-    if hours_float is None:
-        return "N/A"
-
-    total_seconds = int(hours_float * 3600)
-
-    # Si c'est moins d'une minute, afficher en secondes
-    if total_seconds < 60:
-        return f"{total_seconds} secondes"
-
-    # Si c'est moins d'une heure, afficher en minutes
-    if total_seconds < 3600:
-        minutes = total_seconds // 60
-        seconds = total_seconds % 60
-        if seconds > 0:
-            return f"{minutes} minutes {seconds} secondes"
-        return f"{minutes} minutes"
-
-    # Pour les durées plus longues, afficher en heures et minutes
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-
-    if minutes > 0:
-        return f"{hours} heures {minutes} minutes"
-    return f"{hours} heures"
+from .pdf_service import ReportPDFService
+from .report_service import ReportGenerationService
 
 
 # ==================== VUES PRINCIPALES ====================
@@ -93,9 +30,15 @@ def report_list(request):
     ollama = OllamaService()
     connection_result = ollama.check_connection()
 
+    # Générations encore en file ou en cours de traitement
+    jobs_en_cours = ReportJob.objects.filter(
+        statut__in=['en_attente', 'en_cours']
+    ).select_related('requested_by').order_by('created_at')
+
     context = {
         'page_title': 'Rapports IA',
         'reports': page_obj,
+        'jobs_en_cours': jobs_en_cours,
         'ollama_available': connection_result.get('available', False)
     }
     return render(request, 'reports/report_list.html', context)
@@ -103,7 +46,7 @@ def report_list(request):
 
 @login_required
 def generate_report(request):
-    """Génère un rapport IA pour un mois donné"""
+    """Met en file la génération d'un rapport IA pour un mois donné"""
 
     # Générer les listes de mois et années
     months = [(i, calendar.month_name[i]) for i in range(1, 13)]
@@ -114,192 +57,20 @@ def generate_report(request):
         month = int(request.POST.get('month'))
         year = int(request.POST.get('year'))
 
-        # Vérifier la connexion Ollama d'abord
-        ollama = OllamaService()
-        connection = ollama.check_connection()
-
-        if not connection.get('available', False):
-            messages.error(request,
-                           "Ollama n'est pas connecté. "
-                           "Vérifiez que le serveur Ollama est en cours d'exécution: "
-                           "<code>ollama serve</code>"
-                           )
-            return render(request, 'reports/generate_report.html', {
-                'page_title': 'Générer un rapport IA',
-                'months': months,
-                'years': years,
-                'current_month': month,
-                'current_year': year
-            })
-
-        # Vérifier que le modèle est disponible
-        if not connection.get('model_available', False):
-            # Recommander un modèle léger
-            messages.warning(request,
-                             f"Le modèle '{ollama.model_name}' n'est pas disponible. "
-                             "Essayez un modèle plus léger: "
-                             "<code>ollama pull phi3</code> ou <code>ollama pull gemma3:4b</code>"
-                             )
-            return render(request, 'reports/generate_report.html', {
-                'page_title': 'Générer un rapport IA',
-                'months': months,
-                'years': years,
-                'current_month': month,
-                'current_year': year
-            })
-
-        # Filtrer les interventions pour le mois et l'année sélectionnés
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+        # Vérification rapide avant de solliciter le worker
+        if not ReportGenerationService.interventions_du_mois(month, year).exists():
+            messages.warning(request, f"Aucune intervention trouvée pour {calendar.month_name[month]} {year}")
+            return redirect('reports:report_list')
 
-        interventions = Intervention.objects.filter(
-            date_intervention__date__gte=start_date.date(),
-            date_intervention__date__lte=end_date.date()
+        # La génération (Ollama peut prendre plusieurs minutes) est faite par
+        # la commande `traiter_rapports`, jamais par le worker web
+        job = ReportGenerationService.mettre_en_file(
+            month, year, request.user,
+            forcer=request.POST.get('forcer') == 'on'
         )
 
-        # ==================== CALCULS STATISTIQUES ====================
-        total_interventions = interventions.count()
-
-        # Si pas d'interventions, on peut arrêter ici
-        if total_interventions == 0:
-            messages.warning(request, f"Aucune intervention trouvée pour {start_date.strftime('%B %Y')}")
-            return redirect('reports:report_list')
-
-        # Interventions terminées
-        completed_interventions = interventions.filter(statut='terminee').count()
-
-        # Taux de réussite
-        success_rate = 0
-        if total_interventions > 0:
-            success_rate = (completed_interventions / total_interventions) * 100
-
-        # Score de performance interne (sur 10) - PAS satisfaction client!
-        performance_score = round(success_rate / 10, 1)
-
-        # Durée moyenne (avec la nouvelle méthode get_duree_totale)
-        interventions_completed = interventions.filter(statut='terminee')
-        total_duration = timedelta()
-        count_with_duration = 0
-
-        for intervention in interventions_completed:
-            duree = intervention.get_duree_totale() if hasattr(intervention, 'get_duree_totale') else None
-            if duree:
-                total_duration += duree
-                count_with_duration += 1
-
-        avg_duration_display = "N/A"
-        avg_duration_hours = None
-        if count_with_duration > 0:
-            avg_duration_seconds = total_duration.total_seconds() / count_with_duration
-            avg_duration_hours = avg_duration_seconds / 3600
-            avg_duration_display = format_duration(avg_duration_hours)
-
-        # Chiffre d'affaires total
-        total_revenue = interventions.aggregate(
-            total=Sum('prix_intervention')
-        )['total'] or 0
-
-        # Répartition par type
-        interventions_by_type = interventions.values('type_intervention').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        # Top techniciens
-        top_technicians = interventions.exclude(technicien=None).values(
-            'technicien__nom', 'technicien__id'
-        ).annotate(
-            intervention_count=Count('id')
-        ).order_by('-intervention_count')[:5]
-
-        # Préparer les statistiques pour l'IA
-        stats = {
-            'total_interventions': total_interventions,
-            'completed_interventions': completed_interventions,
-            'ongoing_interventions': interventions.filter(statut='en_cours').count(),
-            'success_rate': success_rate,
-            'performance_score': performance_score,  # CHANGÉ DE satisfaction_score À performance_score
-            'avg_duration': avg_duration_display,
-            'avg_duration_hours': avg_duration_hours,
-            'total_revenue': float(total_revenue),
-            'interventions_by_type': list(interventions_by_type),
-            'top_technicians': list(top_technicians),
-            'month': month,
-            'year': year
-        }
-
-        # Générer l'analyse IA
-        try:
-            ai_result = ollama.generate_report_analysis(month, year, stats)
-
-            if ai_result.get('success', False):
-                sections = ai_result.get('sections', {})
-
-                # Créer le rapport
-                report = Report(
-                    title=f"Rapport {calendar.month_name[month]} {year}",
-                    month=start_date.date(),
-                    generated_by=request.user,
-                    total_interventions=total_interventions,
-                    total_revenue=total_revenue,
-                    success_rate=success_rate,
-                    customer_satisfaction_score=performance_score,  # Garder le même nom dans le modèle
-                    avg_intervention_duration=avg_duration_hours,
-                    summary=sections.get('summary', 'Analyse IA non disponible.'),
-                    recommendations=sections.get('recommendations', ''),
-                    technical_analysis=sections.get('technical_analysis', ''),
-                    predictive_maintenance=sections.get('predictive_maintenance', ''),
-                    statistics_data=json.dumps(stats, default=str),
-                    ai_raw_response=json.dumps(ai_result, default=str)
-                )
-
-                report.save()
-
-                messages.success(request, f"Rapport #{report.id} généré avec succès!")
-                return redirect('reports:report_detail', pk=report.id)
-            else:
-                # Créer un rapport avec analyse manuelle
-                error_msg = ai_result.get('error', 'Erreur inconnue')
-                messages.warning(request,
-                                 f"Rapport généré avec des statistiques, mais l'IA a échoué: {error_msg}. "
-                                 "Les recommandations ont été générées manuellement."
-                                 )
-
-                # Générer des recommandations manuelles basées sur les stats
-                manual_recommendations = generate_manual_recommendations(stats)  # CORRIGÉ: plus de self
-
-                report = Report(
-                    title=f"Rapport {calendar.month_name[month]} {year} (sans IA)",
-                    month=start_date.date(),
-                    generated_by=request.user,
-                    total_interventions=total_interventions,
-                    total_revenue=total_revenue,
-                    success_rate=success_rate,
-                    customer_satisfaction_score=performance_score,
-                    avg_intervention_duration=avg_duration_hours,
-                    summary=f"Rapport statistique pour {calendar.month_name[month]} {year}. "
-                            f"Analyse IA indisponible: {error_msg}",
-                    recommendations=manual_recommendations,
-                    technical_analysis="Analyse technique non disponible (erreur IA).",
-                    predictive_maintenance="Prédictions non disponibles (erreur IA).",
-                    statistics_data=json.dumps(stats, default=str),
-                    ai_raw_response=json.dumps(ai_result, default=str)
-                )
-
-                report.save()
-                return redirect('reports:report_detail', pk=report.id)
-
-        except Exception as e:
-            messages.error(request, f"Erreur lors de la génération du rapport: {str(e)}")
-            return render(request, 'reports/generate_report.html', {
-                'page_title': 'Générer un rapport IA',
-                'months': months,
-                'years': years,
-                'current_month': month,
-                'current_year': year
-            })
+        messages.info(request, f"Génération du rapport {calendar.month_name[month]} {year} mise en file d'attente.")
+        return redirect('reports:report_job', pk=job.id)
 
     # GET request: afficher le formulaire
     current_month = datetime.now().month
@@ -314,6 +85,53 @@ def generate_report(request):
     })
 
 
+# Titres des sections de l'analyse IA, dans l'ordre de la page du rapport
+SECTIONS_AFFICHEES = [
+    ('summary', 'Résumé exécutif'),
+    ('recommendations', 'Recommandations clés'),
+    ('technical_analysis', 'Analyse technique'),
+    ('predictive_maintenance', 'Maintenance prédictive'),
+]
+
+
+@login_required
+def report_job(request, pk):
+    """Affiche l'avancement d'une génération de rapport"""
+    job = get_object_or_404(ReportJob, pk=pk)
+
+    if job.statut == 'termine' and job.report_id:
+        return redirect('reports:report_detail', pk=job.report_id)
+
+    return render(request, 'reports/report_job.html', {
+        'page_title': f'Génération du rapport {calendar.month_name[job.month]} {job.year}',
+        'job': job,
+        'sections_affichees': SECTIONS_AFFICHEES
+    })
+
+
+def _etat_job(job):
+    """État d'un job tel qu'envoyé au navigateur (interrogé par la page de suivi)"""
+    return {
+        'id': job.id,
+        'statut': job.statut,
+        'statut_display': job.get_statut_display(),
+        'progression': job.progression,
+        'message': job.message,
+        'erreur': job.erreur,
+        'sections': job.sections_partielles,
+        'termine': job.est_termine,
+        'report_url': reverse('reports:report_detail', args=[job.report_id]) if job.report_id else None
+    }
+
+
+@login_required
+def report_job_status(request, pk):
+    """API interrogée par la page de suivi pour connaître l'état du job"""
+    job = get_object_or_404(ReportJob, pk=pk)
+
+    return JsonResponse(_etat_job(job))
+
+
 # ... (les autres vues restent les mêmes)
 
 
@@ -330,6 +148,14 @@ def report_detail(request, pk):
     return render(request, 'reports/report_detail.html', context)
 
 
+@login_required
+def report_pdf(request, pk):
+    """Télécharge le PDF du rapport (généré seulement s'il a changé)"""
+    report = get_object_or_404(Report.objects.select_related('generated_by'), pk=pk)
+
+    return ReportPDFService.reponse(report)
+
+
 @login_required
 def report_delete(request, pk):
     """Supprime un rapport"""
@@ -361,7 +187,7 @@ def check_ollama_status(request):
 def test_ollama_connection(request):
     """Page pour tester la connexion Ollama"""
     ollama = OllamaService()
-    connection_result = ollama.check_connection()
+    connection_result = ollama.check_connection(use_cache=False)
     model_test = None
 
     if connection_result.get('success'):
@@ -386,7 +212,7 @@ def ollama_config(request):
         ollama = OllamaService(base_url=base_url)
         ollama.model_name = model_name
 
-        connection = ollama.check_connection()
+        connection = ollama.check_connection(use_cache=False)
 
         if connection.get('available'):
             messages.success(request,
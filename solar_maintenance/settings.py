@@ -218,3 +218,21 @@ EMAIL_SUBJECT_PREFIX = '[Solar Maintenance] '
 #    print("⚠️  Mode développement: Les emails seront affichés dans la console")
 
 INTERVENTION_REMINDER_HOURS = 24
+
+# Durée de vie (secondes) des graphiques statistiques mis en cache (invalidés à chaque modification d'intervention)
+STATISTICS_CACHE_SECONDS = 3600
+
+# Connexions HTTP vers Ollama (session partagée par processus)
+OLLAMA_POOL_SIZE = 10
+OLLAMA_MAX_RETRIES = 3
+OLLAMA_RETRY_BACKOFF = 0.5  # secondes, doublé à chaque nouvelle tentative
+OLLAMA_CONNECT_TIMEOUT = 3
+# Durée (secondes) pendant laquelle le statut de connexion Ollama est mis en cache
+OLLAMA_STATUS_CACHE_SECONDS = 30
+# Nombre maximal d'analyses IA conservées en cache (les moins récemment utilisées sont supprimées)
+REPORT_AI_CACHE_MAX_ENTRIES = 200
+
+# Téléchargement des PDF en cache (media/pdf_cache) par le serveur web plutôt que par Django :
+# 'X-Sendfile' (Apache) ou 'X-Accel-Redirect' (nginx, avec PDF_SENDFILE_URL pointant vers MEDIA_ROOT)
+PDF_SENDFILE_HEADER = ''
+PDF_SENDFILE_URL = '/protected-media/'
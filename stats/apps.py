@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class StatsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stats'
+
+    def ready(self):
+        # Brancher la mise à jour des agrégats statistiques
+        from . import signals
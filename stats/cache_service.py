@@ -0,0 +1,142 @@
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import StatisticCache, StatisticSource
+
+
+class StatisticCacheService:
+    """
+    Cache en base (StatisticCache) pour les graphiques et jeux de données statistiques.
+
+    Chaque entrée dépend de sources (interventions, clients, techniciens). Une
+    écriture incrémente la génération de ses sources (invalider()) : une seule
+    ligne mise à jour, sans toucher aux entrées ni attendre un calcul en cours.
+    Une entrée n'est servie que si elle a été calculée sur les générations
+    actuelles de ses sources et que son TTL n'est pas écoulé.
+    """
+
+    PREFIXE = 'stats:'
+    SOURCES = ('interventions', 'clients', 'techniciens')
+
+    # Durée du bail d'un calcul : au-delà, un autre processus peut recalculer
+    DUREE_CALCUL = timedelta(minutes=2)
+    # Attente maximale du calcul d'un autre processus quand aucune valeur n'existe
+    ATTENTE_MAX = 10
+    INTERVALLE_ATTENTE = 0.1
+
+    @staticmethod
+    def duree_par_defaut():
+        return timedelta(seconds=getattr(settings, 'STATISTICS_CACHE_SECONDS', 3600))
+
+    @staticmethod
+    def generations(sources):
+        """Génération actuelle de chaque source (0 si jamais invalidée)"""
+        actuelles = dict(StatisticSource.objects.filter(name__in=sources).values_list('name', 'generation'))
+        return {source: actuelles.get(source, 0) for source in sources}
+
+    @staticmethod
+    def _valeur_valide(data, expires_at, generations):
+        return (
+            data is not None and 'value' in data
+            and expires_at > timezone.now()
+            and data.get('generations') == generations
+        )
+
+    @staticmethod
+    def get_or_compute(name, builder, ttl=None, sources=SOURCES):
+        """
+        Retourne la valeur en cache pour `name`, ou la calcule avec `builder`.
+
+        Le calcul se fait hors transaction. Un seul processus calcule une clé à la
+        fois : il prend un bail (UPDATE conditionnel sur calcul_jusqu_a), et
+        n'écrit son résultat que s'il détient toujours ce bail. Pendant ce temps,
+        les autres requêtes servent l'ancienne valeur, ou attendent la nouvelle
+        s'il n'y en a pas encore.
+        """
+        ttl = ttl or StatisticCacheService.duree_par_defaut()
+        generations = StatisticCacheService.generations(sources)
+
+        ligne = StatisticCache.objects.filter(name=name).values_list('data', 'expires_at').first()
+        if ligne and StatisticCacheService._valeur_valide(*ligne, generations):
+            return ligne[0]['value']
+        if ligne is None:
+            StatisticCache.objects.get_or_create(
+                name=name, defaults={'data': {}, 'expires_at': timezone.now()}
+            )
+
+        maintenant = timezone.now()
+        bail = maintenant + StatisticCacheService.DUREE_CALCUL
+        obtenu = StatisticCache.objects.filter(name=name).filter(
+            Q(calcul_jusqu_a__isnull=True) | Q(calcul_jusqu_a__lt=maintenant)
+        ).update(calcul_jusqu_a=bail)
+
+        if not obtenu:
+            # Calcul en cours ailleurs : valeur précédente, ou attente de la nouvelle
+            if ligne and 'value' in ligne[0]:
+                return ligne[0]['value']
+            valeur = StatisticCacheService._attendre(name, generations)
+            if valeur is not None:
+                return valeur[0]
+            return builder()
+
+        try:
+            value = builder()
+        except BaseException:
+            StatisticCache.objects.filter(name=name, calcul_jusqu_a=bail).update(calcul_jusqu_a=None)
+            raise
+
+        # Compare-and-set : n'écrit que si le bail est toujours le nôtre. Les
+        # générations lues avant le calcul sont enregistrées : une invalidation
+        # survenue pendant le calcul laisse donc l'entrée périmée.
+        StatisticCache.objects.filter(name=name, calcul_jusqu_a=bail).update(
+            data={'value': value, 'generations': generations},
+            expires_at=timezone.now() + ttl,
+            calcul_jusqu_a=None,
+            updated_at=timezone.now(),
+        )
+        return value
+
+    @staticmethod
+    def _attendre(name, generations):
+        """(valeur,) calculée par un autre processus, ou None après ATTENTE_MAX secondes"""
+        limite = time.monotonic() + StatisticCacheService.ATTENTE_MAX
+        while time.monotonic() < limite:
+            time.sleep(StatisticCacheService.INTERVALLE_ATTENTE)
+            ligne = StatisticCache.objects.filter(name=name).values_list('data', 'expires_at').first()
+            if ligne and StatisticCacheService._valeur_valide(*ligne, generations):
+                return (ligne[0]['value'],)
+        return None
+
+    @staticmethod
+    def invalider(*sources):
+        """Périme les entrées dépendant de `sources` (toutes les sources par défaut)"""
+        sources = sources or StatisticCacheService.SOURCES
+        mises_a_jour = StatisticSource.objects.filter(name__in=sources).update(generation=F('generation') + 1)
+        if mises_a_jour < len(sources):
+            # Première invalidation d'une source : créer sa ligne
+            StatisticSource.objects.bulk_create(
+                [StatisticSource(name=source, generation=1) for source in sources],
+                ignore_conflicts=True
+            )
+
+
+def cache_statistique(ttl=None, sources=('interventions',)):
+    """
+    Décorateur : met en cache le résultat d'une fonction statistique sans argument,
+    périmé quand l'une des `sources` dont elle dépend est modifiée
+    """
+    def decorateur(func):
+        name = f"{StatisticCacheService.PREFIXE}{func.__name__}"
+
+        @wraps(func)
+        def wrapper():
+            return StatisticCacheService.get_or_compute(name, func, ttl, sources)
+
+        return wrapper
+
+    return decorateur
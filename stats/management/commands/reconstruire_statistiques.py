@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from clients.models import Client
+from stats.models import MonthlyInterventionStat
+from stats.rollup_service import StatisticsRollupService
+from stats.cache_service import StatisticCacheService
+
+
+class Command(BaseCommand):
+    help = 'Recalcule entièrement la table des statistiques mensuelles des interventions'
+
+    def handle(self, *args, **options):
+        debut = timezone.now()
+        self.stdout.write("=== RECONSTRUCTION DES STATISTIQUES ===")
+
+        # Réaligner les tranches stockées sur la définition actuelle des tranches
+        Client.objects.realigner_tranches_kva()
+
+        nombre_lignes = StatisticsRollupService.reconstruire()
+        StatisticCacheService.invalider()
+
+        duree = (timezone.now() - debut).total_seconds()
+        total = MonthlyInterventionStat.objects.aggregate(total=Sum('intervention_count'))['total'] or 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {nombre_lignes} lignes d'agrégat créées ({total} interventions) en {duree:.2f}s"
+        ))
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.9 on 2026-10-17 20:31
+
+import re
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+# Copies figées de utils.extraire_kva / determiner_tranche_kva à la date de la migration
+KVA = re.compile(r'(\d+)\s*KVA', re.IGNORECASE)
+PUISSANCES_KVA_SUIVIES = [3, 5, 8, 16, 24]
+
+
+def tranche_kva(type_installation):
+    match = KVA.search(type_installation or '')
+    kva = int(match.group(1)) if match else None
+    return f"{kva}KVA" if kva in PUISSANCES_KVA_SUIVIES else 'Autre'
+
+
+def remplir_statistiques(apps, schema_editor):
+    """Calcul initial des agrégats à partir des interventions existantes"""
+    Intervention = apps.get_model('interventions', 'Intervention')
+    MonthlyInterventionStat = apps.get_model('stats', 'MonthlyInterventionStat')
+
+    groupes = Intervention.objects.annotate(
+        mois_intervention=TruncMonth('date_intervention')
+    ).values(
+        'mois_intervention', 'type_intervention', 'statut', 'technicien_id', 'client__type_installation'
+    ).annotate(
+        nombre=Count('id'),
+        revenu=Sum('prix_intervention')
+    ).order_by()
+
+    agregats = defaultdict(lambda: [0, Decimal(0)])
+    for groupe in groupes:
+        cle = (
+            groupe['mois_intervention'].date().replace(day=1),
+            groupe['type_intervention'],
+            groupe['statut'],
+            groupe['technicien_id'],
+            tranche_kva(groupe['client__type_installation']),
+        )
+        agregats[cle][0] += groupe['nombre']
+        agregats[cle][1] += groupe['revenu'] or 0
+
+    MonthlyInterventionStat.objects.bulk_create([
+        MonthlyInterventionStat(
+            month=month,
+            type_intervention=type_intervention,
+            statut=statut,
+            technicien_id=technicien_id,
+            kva_bucket=kva_bucket,
+            intervention_count=nombre,
+            total_revenue=revenu,
+        )
+        for (month, type_intervention, statut, technicien_id, kva_bucket), (nombre, revenu) in agregats.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0001_initial'),
+        ('techniciens', '0005_alter_technicien_user'),
+        ('interventions', '0009_intervention_dernier_debut_en_cours_and_more'),
+        ('clients', '0005_alter_fournisseur_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyInterventionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Premier jour du mois')),
+                ('type_intervention', models.CharField(max_length=20)),
+                ('statut', models.CharField(max_length=20)),
+                ('kva_bucket', models.CharField(max_length=10)),
+                ('intervention_count', models.IntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('technicien', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='statistiques_mensuelles', to='techniciens.technicien')),
+            ],
+            options={
+                'verbose_name': 'Statistique mensuelle',
+                'verbose_name_plural': 'Statistiques mensuelles',
+                'ordering': ['month'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'type_intervention', 'statut', 'technicien', 'kva_bucket'), name='unique_monthly_intervention_stat')],
+            },
+        ),
+        migrations.RunPython(remplir_statistiques, migrations.RunPython.noop),
+    ]
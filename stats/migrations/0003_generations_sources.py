@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:14
+
+from django.db import migrations, models
+
+
+def creer_sources(apps, schema_editor):
+    """Lignes de génération des sources ; les entrées existantes (sans génération) sont périmées"""
+    StatisticSource = apps.get_model('stats', 'StatisticSource')
+    StatisticCache = apps.get_model('stats', 'StatisticCache')
+    StatisticSource.objects.bulk_create(
+        [StatisticSource(name=name) for name in ('interventions', 'clients', 'techniciens')],
+        ignore_conflicts=True
+    )
+    StatisticCache.objects.filter(name__startswith='stats:').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0002_monthlyinterventionstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatisticSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('generation', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Source statistique',
+                'verbose_name_plural': 'Sources statistiques',
+            },
+        ),
+        migrations.AddField(
+            model_name='statisticcache',
+            name='calcul_jusqu_a',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(creer_sources, migrations.RunPython.noop),
+    ]
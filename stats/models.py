@@ -10,6 +10,8 @@ class StatisticCache(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     expires_at = models.DateTimeField()
+    # Bail de construction : un seul calcul par clé tant qu'il n'a pas expiré
+    calcul_jusqu_a = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = "Cache Statistique"
@@ -20,4 +22,55 @@ class StatisticCache(models.Model):
         return self.name
 
     def is_expired(self):
-        return timezone.now() > self.expires_at
\ No newline at end of file
+        return timezone.now() > self.expires_at
+
+class StatisticSource(models.Model):
+    """
+    Génération des données sources des statistiques (interventions, clients,
+    techniciens) : incrémentée à chaque écriture, elle périme les entrées de
+    StatisticCache calculées sur une génération antérieure.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    generation = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Source statistique"
+        verbose_name_plural = "Sources statistiques"
+
+    def __str__(self):
+        return f"{self.name} (génération {self.generation})"
+
+
+class MonthlyInterventionStat(models.Model):
+    """
+    Agrégat mensuel des interventions, maintenu au fil de l'eau par les signaux
+    de l'application stats (une ligne par mois × type × statut × technicien × tranche KVA)
+    """
+    month = models.DateField(help_text="Premier jour du mois")
+    type_intervention = models.CharField(max_length=20)
+    statut = models.CharField(max_length=20)
+    technicien = models.ForeignKey(
+        'techniciens.Technicien',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='statistiques_mensuelles'
+    )
+    kva_bucket = models.CharField(max_length=10)
+
+    intervention_count = models.IntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+
+    class Meta:
+        verbose_name = "Statistique mensuelle"
+        verbose_name_plural = "Statistiques mensuelles"
+        ordering = ['month']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'type_intervention', 'statut', 'technicien', 'kva_bucket'],
+                name='unique_monthly_intervention_stat'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.month.strftime('%m/%Y')} - {self.type_intervention} / {self.statut} ({self.intervention_count})"
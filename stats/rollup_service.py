@@ -0,0 +1,244 @@
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Subquery, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from utils import TRANCHE_KVA_AUTRE
+from .models import MonthlyInterventionStat
+
+
+class StatisticsRollupService:
+    """Maintient la table d'agrégats mensuels utilisée par le tableau de bord statistique"""
+
+    @staticmethod
+    def debut_du_mois(date_heure):
+        """Retourne le premier jour du mois (dans le fuseau courant) d'une date/heure"""
+        if timezone.is_aware(date_heure):
+            date_heure = timezone.localtime(date_heure)
+        return date_heure.date().replace(day=1)
+
+    @staticmethod
+    def mois_suivant(debut):
+        """Premier jour du mois suivant"""
+        if debut.month == 12:
+            return debut.replace(year=debut.year + 1, month=1)
+        return debut.replace(month=debut.month + 1)
+
+    @staticmethod
+    def _debut_aware(jour):
+        return timezone.make_aware(datetime.combine(jour, time.min))
+
+    @staticmethod
+    def etat_intervention(intervention):
+        """
+        Retourne (clé d'agrégat, prix) pour une intervention.
+        La clé correspond à une ligne de MonthlyInterventionStat.
+        """
+        tranche_kva = intervention.client.tranche_kva if intervention.client_id else TRANCHE_KVA_AUTRE
+
+        cle = (
+            StatisticsRollupService.debut_du_mois(intervention.date_intervention),
+            intervention.type_intervention,
+            intervention.statut,
+            intervention.technicien_id,
+            tranche_kva,
+        )
+        return cle, Decimal(intervention.prix_intervention or 0)
+
+    @staticmethod
+    def etat_initial(intervention):
+        """
+        État agrégé de l'intervention tel qu'il a été chargé depuis la base
+        (voir Intervention.from_db), sans nouvelle requête. None si l'instance
+        n'a pas été chargée avec tous les champs suivis.
+        """
+        etat = getattr(intervention, '_etat_initial', {})
+        if any(champ not in etat for champ in intervention.CHAMPS_SUIVIS):
+            return None
+
+        if etat['client_id'] == intervention.client_id:
+            tranche_kva = intervention.client.tranche_kva
+        else:
+            # Changement de client : la tranche de l'ancien client est relue
+            from clients.models import Client
+            tranche_kva = Client.objects.filter(
+                pk=etat['client_id']
+            ).values_list('tranche_kva', flat=True).first() or TRANCHE_KVA_AUTRE
+
+        cle = (
+            StatisticsRollupService.debut_du_mois(etat['date_intervention']),
+            etat['type_intervention'],
+            etat['statut'],
+            etat['technicien_id'],
+            tranche_kva,
+        )
+        return cle, Decimal(etat['prix_intervention'] or 0)
+
+    @staticmethod
+    def etat_en_base(intervention_pk):
+        """Relit en base l'état agrégé d'une intervention avant sa modification"""
+        from interventions.models import Intervention
+
+        ligne = Intervention.objects.filter(pk=intervention_pk).values(
+            'date_intervention', 'type_intervention', 'statut', 'technicien_id',
+            'prix_intervention', 'client__tranche_kva'
+        ).first()
+
+        if not ligne:
+            return None
+
+        cle = (
+            StatisticsRollupService.debut_du_mois(ligne['date_intervention']),
+            ligne['type_intervention'],
+            ligne['statut'],
+            ligne['technicien_id'],
+            ligne['client__tranche_kva'],
+        )
+        return cle, Decimal(ligne['prix_intervention'] or 0)
+
+    @staticmethod
+    def _filtre(cle):
+        month, type_intervention, statut, technicien_id, kva_bucket = cle
+        return {
+            'month': month,
+            'type_intervention': type_intervention,
+            'statut': statut,
+            'technicien_id': technicien_id,
+            'kva_bucket': kva_bucket,
+        }
+
+    @staticmethod
+    def _ligne(cle):
+        """
+        Ligne d'agrégat d'une clé, réduite à une seule (les clés sans technicien
+        peuvent être en double) : sous-requête, sans aller-retour supplémentaire.
+        """
+        return MonthlyInterventionStat.objects.filter(pk__in=Subquery(
+            MonthlyInterventionStat.objects.filter(
+                **StatisticsRollupService._filtre(cle)
+            ).values('pk')[:1]
+        ))
+
+    @staticmethod
+    def _ajouter(cle, nombre, revenu):
+        variation = {
+            'intervention_count': F('intervention_count') + nombre,
+            'total_revenue': F('total_revenue') + revenu,
+        }
+        if StatisticsRollupService._ligne(cle).update(**variation):
+            return
+
+        try:
+            with transaction.atomic():
+                MonthlyInterventionStat.objects.create(
+                    intervention_count=nombre,
+                    total_revenue=revenu,
+                    **StatisticsRollupService._filtre(cle)
+                )
+        except IntegrityError:
+            # Ligne créée entre-temps par une autre requête
+            StatisticsRollupService._ligne(cle).update(**variation)
+
+    @staticmethod
+    def _retirer(cle, nombre, revenu):
+        if not StatisticsRollupService._ligne(cle).update(
+            intervention_count=F('intervention_count') - nombre,
+            total_revenue=F('total_revenue') - revenu
+        ):
+            return
+
+        # Ne pas conserver les lignes vides
+        MonthlyInterventionStat.objects.filter(
+            intervention_count__lte=0, **StatisticsRollupService._filtre(cle)
+        ).delete()
+
+    @staticmethod
+    def enregistrer_modification(ancien_etat, nouvel_etat):
+        """
+        Applique la variation entre l'ancien et le nouvel état d'une intervention.
+        Un état vaut None pour une création (ancien) ou une suppression (nouveau).
+        """
+        if ancien_etat == nouvel_etat:
+            return
+
+        # Sans point de sauvegarde : une erreur annule la transaction du save() appelant
+        with transaction.atomic(savepoint=False):
+            if ancien_etat and nouvel_etat and ancien_etat[0] == nouvel_etat[0]:
+                # Même ligne d'agrégat : seul le prix a changé
+                StatisticsRollupService._ajouter(nouvel_etat[0], 0, nouvel_etat[1] - ancien_etat[1])
+                return
+
+            if ancien_etat:
+                StatisticsRollupService._retirer(ancien_etat[0], 1, ancien_etat[1])
+            if nouvel_etat:
+                StatisticsRollupService._ajouter(nouvel_etat[0], 1, nouvel_etat[1])
+
+    @staticmethod
+    def reconstruire(mois=None):
+        """
+        Recalcule entièrement les agrégats (ou seulement ceux des mois donnés).
+        Retourne le nombre de lignes d'agrégat créées.
+        """
+        from interventions.models import Intervention
+
+        interventions = Intervention.objects.all()
+        stats_existantes = MonthlyInterventionStat.objects.all()
+
+        if mois is not None:
+            mois = sorted(set(mois))
+            if not mois:
+                return 0
+            periodes = Q()
+            for debut in mois:
+                periodes |= Q(
+                    date_intervention__gte=StatisticsRollupService._debut_aware(debut),
+                    date_intervention__lt=StatisticsRollupService._debut_aware(
+                        StatisticsRollupService.mois_suivant(debut)
+                    )
+                )
+            interventions = interventions.filter(periodes)
+            stats_existantes = stats_existantes.filter(month__in=mois)
+
+        # Regroupement entièrement SQL (mois × tranche KVA stockée sur le client, la même
+        # que pour les mises à jour au fil de l'eau) : une ligne lue par ligne d'agrégat
+        groupes = interventions.annotate(
+            mois_intervention=TruncMonth('date_intervention'),
+            tranche=F('client__tranche_kva')
+        ).values(
+            'mois_intervention', 'type_intervention', 'statut', 'technicien_id', 'tranche'
+        ).annotate(
+            nombre=Count('id'),
+            revenu=Sum('prix_intervention')
+        ).order_by()
+
+        nouvelles_stats = [
+            MonthlyInterventionStat(
+                month=StatisticsRollupService.debut_du_mois(groupe['mois_intervention']),
+                type_intervention=groupe['type_intervention'],
+                statut=groupe['statut'],
+                technicien_id=groupe['technicien_id'],
+                kva_bucket=groupe['tranche'],
+                intervention_count=groupe['nombre'],
+                total_revenue=groupe['revenu'] or 0,
+            )
+            for groupe in groupes
+        ]
+
+        with transaction.atomic():
+            stats_existantes.delete()
+            MonthlyInterventionStat.objects.bulk_create(nouvelles_stats, batch_size=1000)
+
+        return len(nouvelles_stats)
+
+    @staticmethod
+    def mois_des_interventions(interventions):
+        """Liste des mois couverts par un queryset d'interventions"""
+        return {
+            StatisticsRollupService.debut_du_mois(mois)
+            for mois in interventions.annotate(
+                mois_intervention=TruncMonth('date_intervention')
+            ).values_list('mois_intervention', flat=True).order_by().distinct()
+        }
@@ -0,0 +1,129 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from clients.models import Client
+from interventions.models import Intervention
+from interventions.signals import statuts_modifies
+from techniciens.models import Technicien
+from .models import MonthlyInterventionStat
+from .rollup_service import StatisticsRollupService
+from .cache_service import StatisticCacheService
+
+
+# ==================== INTERVENTIONS ====================
+
+@receiver(pre_save, sender=Intervention)
+def memoriser_etat_intervention(sender, instance, raw=False, **kwargs):
+    """Mémorise l'état agrégé avant modification pour pouvoir le retirer des statistiques"""
+    if raw:
+        return
+    if not instance.pk:
+        instance._etat_statistique = None
+        return
+    # État mémorisé au chargement ; relecture en base seulement s'il est incomplet
+    instance._etat_statistique = (
+        StatisticsRollupService.etat_initial(instance)
+        or StatisticsRollupService.etat_en_base(instance.pk)
+    )
+
+
+@receiver(post_save, sender=Intervention)
+def mettre_a_jour_statistiques_intervention(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ancien_etat = getattr(instance, '_etat_statistique', None)
+    nouvel_etat = StatisticsRollupService.etat_intervention(instance)
+    StatisticsRollupService.enregistrer_modification(ancien_etat, nouvel_etat)
+    instance._etat_statistique = nouvel_etat
+    StatisticCacheService.invalider('interventions')
+
+
+@receiver(pre_delete, sender=Intervention)
+def memoriser_etat_intervention_supprimee(sender, instance, **kwargs):
+    """L'instance supprimée peut être périmée : l'état retiré est relu en base"""
+    instance._etat_statistique = StatisticsRollupService.etat_en_base(instance.pk)
+
+
+@receiver(post_delete, sender=Intervention)
+def retirer_intervention_des_statistiques(sender, instance, **kwargs):
+    try:
+        etat = getattr(instance, '_etat_statistique', None) or StatisticsRollupService.etat_intervention(instance)
+    except Client.DoesNotExist:
+        # Client déjà supprimé : recalculer le mois concerné
+        StatisticsRollupService.reconstruire(
+            [StatisticsRollupService.debut_du_mois(instance.date_intervention)]
+        )
+    else:
+        StatisticsRollupService.enregistrer_modification(etat, None)
+    StatisticCacheService.invalider('interventions')
+
+
+@receiver(statuts_modifies, sender=Intervention)
+def recalculer_statistiques_transition(sender, interventions, **kwargs):
+    """Transition en masse (bulk_update, sans post_save) : recalcul des mois concernés"""
+    StatisticsRollupService.reconstruire(
+        {StatisticsRollupService.debut_du_mois(i.date_intervention) for i in interventions}
+    )
+    StatisticCacheService.invalider('interventions')
+
+
+# ==================== CLIENTS ====================
+
+@receiver(pre_save, sender=Client)
+def memoriser_tranche_client(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._tranche_kva_precedente = None
+        return
+    instance._tranche_kva_precedente = Client.objects.filter(
+        pk=instance.pk
+    ).values_list('tranche_kva', flat=True).first()
+
+
+@receiver(post_save, sender=Client)
+def recalculer_statistiques_client(sender, instance, created=False, raw=False, **kwargs):
+    """Un changement de tranche KVA déplace toutes les interventions du client"""
+    if raw:
+        return
+    # Le nom du client apparaît dans les graphiques
+    StatisticCacheService.invalider('clients')
+    if created:
+        return
+    ancienne_tranche = getattr(instance, '_tranche_kva_precedente', None)
+    if ancienne_tranche is None:
+        return
+    if ancienne_tranche != instance.tranche_kva:
+        StatisticsRollupService.reconstruire(
+            StatisticsRollupService.mois_des_interventions(instance.interventions.all())
+        )
+        StatisticCacheService.invalider('interventions')
+
+
+# ==================== TECHNICIENS ====================
+
+@receiver(pre_delete, sender=Technicien)
+def memoriser_mois_technicien(sender, instance, **kwargs):
+    instance._mois_statistiques = set(
+        MonthlyInterventionStat.objects.filter(technicien=instance).values_list('month', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Technicien)
+def recalculer_statistiques_technicien(sender, instance, **kwargs):
+    """Les interventions du technicien supprimé passent sans technicien (SET_NULL)"""
+    mois = getattr(instance, '_mois_statistiques', None)
+    if mois:
+        StatisticsRollupService.reconstruire(mois)
+    StatisticCacheService.invalider('interventions', 'techniciens')
+
+
+@receiver(post_save, sender=Technicien)
+def invalider_cache_techniciens(sender, raw=False, **kwargs):
+    """Noms des techniciens affichés dans les graphiques"""
+    if not raw:
+        StatisticCacheService.invalider('techniciens')
+
+
+@receiver(post_delete, sender=Client)
+def invalider_cache_clients(sender, **kwargs):
+    """Les interventions du client sont supprimées avec lui (CASCADE)"""
+    StatisticCacheService.invalider('interventions', 'clients')
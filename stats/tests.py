@@ -1,3 +1,169 @@
+import io
+import zipfile
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import creer_client, creer_intervention
+from .cache_service import StatisticCacheService
+from .models import MonthlyInterventionStat, StatisticCache, StatisticSource
+from .rollup_service import StatisticsRollupService
+
+
+def lignes_agregat():
+    return sorted(MonthlyInterventionStat.objects.filter(intervention_count__gt=0).values_list(
+        'month', 'type_intervention', 'statut', 'kva_bucket', 'intervention_count'
+    ))
+
+
+class StatisticCacheServiceTests(TestCase):
+
+    def setUp(self):
+        self.appels = 0
+
+    def builder(self, valeur='v1'):
+        def construire():
+            self.appels += 1
+            return valeur
+        return construire
+
+    def test_valeur_calculee_une_seule_fois(self):
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:t', self.builder()), 'v1')
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:t', self.builder()), 'v1')
+        self.assertEqual(self.appels, 1)
+
+    def test_ttl_ecoule(self):
+        StatisticCacheService.get_or_compute('stats:t', self.builder())
+        StatisticCache.objects.filter(name='stats:t').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:t', self.builder('v2')), 'v2')
+
+    def test_invalidation_limitee_aux_sources(self):
+        StatisticCacheService.get_or_compute('stats:i', self.builder(), sources=('interventions',))
+        StatisticCacheService.get_or_compute('stats:c', self.builder(), sources=('interventions', 'clients'))
+
+        StatisticCacheService.invalider('clients')
+
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:i', self.builder('v2'), sources=('interventions',)), 'v1')
+        self.assertEqual(
+            StatisticCacheService.get_or_compute('stats:c', self.builder('v2'), sources=('interventions', 'clients')),
+            'v2'
+        )
+
+    def test_invalidation_ne_modifie_pas_les_entrees(self):
+        StatisticCacheService.get_or_compute('stats:t', self.builder())
+        avant = StatisticCache.objects.get(name='stats:t')
+
+        with self.assertNumQueries(1):
+            StatisticCacheService.invalider('interventions')
+
+        apres = StatisticCache.objects.get(name='stats:t')
+        self.assertEqual((avant.data, avant.expires_at), (apres.data, apres.expires_at))
+
+    def test_invalidation_pendant_le_calcul(self):
+        """La valeur calculée est servie, mais l'entrée reste périmée pour la requête suivante"""
+        def construire():
+            StatisticCacheService.invalider('interventions')
+            return 'v1'
+
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:t', construire), 'v1')
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:t', self.builder('v2')), 'v2')
+
+    def test_calcul_en_cours_ailleurs(self):
+        """Pendant le bail d'un autre processus, l'ancienne valeur est servie sans recalcul"""
+        StatisticCacheService.get_or_compute('stats:t', self.builder())
+        StatisticCacheService.invalider()
+        StatisticCache.objects.filter(name='stats:t').update(calcul_jusqu_a=timezone.now() + timedelta(minutes=1))
+
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:t', self.builder('v2')), 'v1')
+        self.assertEqual(self.appels, 1)
+
+    def test_bail_expire(self):
+        StatisticCacheService.get_or_compute('stats:t', self.builder())
+        StatisticCacheService.invalider()
+        StatisticCache.objects.filter(name='stats:t').update(calcul_jusqu_a=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(StatisticCacheService.get_or_compute('stats:t', self.builder('v2')), 'v2')
+        self.assertIsNone(StatisticCache.objects.get(name='stats:t').calcul_jusqu_a)
+
+    def test_enregistrement_intervention_incremente_la_generation(self):
+        avant = StatisticCacheService.generations(('interventions', 'clients'))
+        creer_intervention()
+        apres = StatisticCacheService.generations(('interventions', 'clients'))
+
+        self.assertGreater(apres['interventions'], avant['interventions'])
+        self.assertTrue(StatisticSource.objects.filter(name='interventions').exists())
+
+
+class StatisticsRollupTests(TestCase):
+
+    def test_reconstruction_identique_aux_mises_a_jour(self):
+        """Mises à jour au fil de l'eau et reconstruction utilisent la même tranche (celle du client)"""
+        for numero, type_installation in enumerate(('16KVA', '6KVA', '5 kva hybride', 'sans puissance')):
+            creer_intervention(creer_client(numero, type_installation))
+        incrementales = lignes_agregat()
+
+        StatisticsRollupService.reconstruire()
+
+        self.assertEqual(lignes_agregat(), incrementales)
+        self.assertEqual(
+            {ligne[3] for ligne in incrementales},
+            {'16KVA', '5KVA', 'Autre'}
+        )
+
+    def test_changements_de_statut_identiques_a_la_reconstruction(self):
+        client = creer_client()
+        interventions = [creer_intervention(client, statut='en_cours') for _ in range(3)]
+        for intervention, statut in zip(interventions, ('terminee', 'terminee', 'annulee')):
+            intervention.statut = statut
+            intervention.save()
+        incrementales = lignes_agregat()
+
+        StatisticsRollupService.reconstruire()
+
+        self.assertEqual(lignes_agregat(), incrementales)
+        self.assertFalse(MonthlyInterventionStat.objects.filter(statut='en_cours').exists())
+
+
+class ExportExcelTests(TestCase):
+
+    # Espace de noms SpreadsheetML des fichiers xlsx
+    NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+    def setUp(self):
+        client = creer_client()
+        for statut in ('terminee', 'en_cours', 'prevue'):
+            creer_intervention(client, statut=statut)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.sn', 'x'))
+
+    def exporter(self, parametres=''):
+        reponse = self.client.get(f"{reverse('stats:export_excel')}{parametres}")
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.assertIn('.xlsx"', reponse['Content-Disposition'])
+        return zipfile.ZipFile(io.BytesIO(reponse.content))
+
+    def feuilles(self, classeur):
+        racine = ElementTree.fromstring(classeur.read('xl/workbook.xml'))
+        return [feuille.get('name') for feuille in racine.iterfind('x:sheets/x:sheet', self.NS)]
+
+    def test_feuilles_des_statistiques(self):
+        feuilles = self.feuilles(self.exporter())
+
+        self.assertIn('Répartition par type', feuilles)
+        self.assertIn('Répartition installation', feuilles)
+        self.assertNotIn('Interventions', feuilles)
+
+    def test_feuille_des_interventions(self):
+        classeur = self.exporter('?details=1')
+        feuilles = self.feuilles(classeur)
 
-# Create your tests here.
+        self.assertEqual(feuilles[-1], 'Interventions')
+        lignes = ElementTree.fromstring(classeur.read(f'xl/worksheets/sheet{len(feuilles)}.xml')).iterfind(
+            'x:sheetData/x:row', self.NS
+        )
+        # En-tête et une ligne par intervention
+        self.assertEqual(len(list(lignes)), 4)
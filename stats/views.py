@@ -2,18 +2,21 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.db.models import Count, Sum, Q
-from django.db.models.functions import TruncMonth, ExtractMonth, ExtractYear
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import timedelta
-import json
+from datetime import datetime, timedelta
+from io import BytesIO
 from plotly.offline import plot
 import plotly.graph_objects as go
 import plotly.express as px
-import pandas as pd
 
 from interventions.models import Intervention
 from clients.models import Client
 from techniciens.models import Technicien
+from utils import TRANCHES_KVA, TRANCHE_KVA_AUTRE
+from .models import MonthlyInterventionStat
+from .rollup_service import StatisticsRollupService
+from .cache_service import cache_statistique
 
 
 @login_required
@@ -39,19 +42,19 @@ def statistics_dashboard(request):
     # 5. Évolution financière (2D amélioré)
     evolution_financiere = get_evolution_financiere_ameliore()
 
-    # 6. Répartition par type d'installation (2D amélioré)
-    repartition_installation = get_repartition_par_installation_par_mois()
-
-    # 7. NOUVEAU: Répartition par type d'installation par mois
+    # 6 et 7. Répartition par type d'installation par mois (calculée une seule fois)
     repartition_installation_mois = get_repartition_par_installation_par_mois()
+    repartition_installation = repartition_installation_mois
+
+    # 8. Durées d'intervention par type (calculées en base)
+    durees_par_type = get_durees_par_type()
 
     # Statistiques globales
-    total_interventions = Intervention.objects.count()
+    totaux = get_totaux_interventions()
+    total_interventions = totaux['total_interventions']
     total_clients = Client.objects.count()
     total_techniciens = Technicien.objects.count()
-    revenu_total = Intervention.objects.filter(statut='terminee').aggregate(
-        total=Sum('prix_intervention')
-    )['total'] or 0
+    revenu_total = totaux['revenu_total']
 
     context = {
         'page_title': '📊 Tableau de Bord Statistiques',
@@ -62,6 +65,7 @@ def statistics_dashboard(request):
         'evolution_financiere': evolution_financiere,
         'repartition_installation': repartition_installation,
         'repartition_installation_mois': repartition_installation_mois,  # NOUVEAU
+        'durees_par_type': durees_par_type,
         'total_interventions': total_interventions,
         'total_clients': total_clients,
         'total_techniciens': total_techniciens,
@@ -71,25 +75,38 @@ def statistics_dashboard(request):
     return render(request, 'stats/dashboard.html', context)
 
 
+@cache_statistique()
+def get_totaux_interventions():
+    """Nombre total d'interventions et revenu des interventions terminées (table d'agrégats)"""
+    totaux = MonthlyInterventionStat.objects.aggregate(
+        total_interventions=Sum('intervention_count'),
+        revenu_total=Sum('total_revenue', filter=Q(statut='terminee'))
+    )
+    return {
+        'total_interventions': totaux['total_interventions'] or 0,
+        'revenu_total': int(totaux['revenu_total'] or 0),
+    }
+
+
+def get_debut_periode(jours):
+    """Premier mois inclus dans une période glissante de N jours"""
+    return StatisticsRollupService.debut_du_mois(timezone.now() - timedelta(days=jours))
+
+
+@cache_statistique()
 def get_interventions_par_mois():
     """Graphique 1 - Nombre d'interventions par mois (2D avec effet visuel original)"""
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=365)
-
-    interventions = Intervention.objects.filter(
-        date_intervention__gte=start_date
-    ).annotate(
-        year=ExtractYear('date_intervention'),
-        month=ExtractMonth('date_intervention')
-    ).values('year', 'month').annotate(
-        count=Count('id')
-    ).order_by('year', 'month')
+    interventions = MonthlyInterventionStat.objects.filter(
+        month__gte=get_debut_periode(365)
+    ).values('month').annotate(
+        count=Sum('intervention_count')
+    ).order_by('month')
 
     months = []
     counts = []
 
     for interv in interventions:
-        month_name = f"{interv['month']:02d}/{interv['year']}"
+        month_name = f"{interv['month'].month:02d}/{interv['month'].year}"
         months.append(month_name)
         counts.append(interv['count'])
 
@@ -209,11 +226,12 @@ def get_interventions_par_mois():
 
 
 
+@cache_statistique()
 def get_repartition_par_type():
     """Graphique 3D Pie - Répartition par type d'intervention"""
-    repartition = Intervention.objects.values('type_intervention').annotate(
-        count=Count('id')
-    )
+    repartition = MonthlyInterventionStat.objects.values('type_intervention').annotate(
+        count=Sum('intervention_count')
+    ).order_by('type_intervention')
     # Vérifier s'il y a des données
     if not repartition or sum(r['count'] for r in repartition) == 0:
         return None
@@ -263,24 +281,25 @@ def get_repartition_par_type():
 # Dans stats/views.py - Fonction get_techniciens_actifs modifiée
 # Dans stats/views.py - Modifier la fonction get_techniciens_actifs_2d
 
+@cache_statistique(sources=('interventions', 'techniciens'))
 def get_techniciens_actifs_2d():
     """Graphique 3 - Camembert élégant : Répartition des interventions par technicien"""
     # Récupérer les techniciens avec leurs interventions terminées
     techniciens = Technicien.objects.annotate(
         # Total des interventions (tous statuts)
-        intervention_count=Count('interventions'),
+        intervention_count=Coalesce(Sum('statistiques_mensuelles__intervention_count'), 0),
         # Interventions TERMINÉES seulement
-        intervention_terminees_count=Count(
-            'interventions',
-            filter=Q(interventions__statut='terminee')
-        ),
+        intervention_terminees_count=Coalesce(Sum(
+            'statistiques_mensuelles__intervention_count',
+            filter=Q(statistiques_mensuelles__statut='terminee')
+        ), 0),
         # Revenu des interventions TERMINÉES seulement
         total_revenu_terminees=Sum(
-            'interventions__prix_intervention',
-            filter=Q(interventions__statut='terminee')
+            'statistiques_mensuelles__total_revenue',
+            filter=Q(statistiques_mensuelles__statut='terminee')
         ),
         # Ancien calcul (tous statuts) - pour comparaison
-        total_revenu_tous=Sum('interventions__prix_intervention')
+        total_revenu_tous=Sum('statistiques_mensuelles__total_revenue')
     ).filter(intervention_count__gt=0).order_by('-intervention_count')[:8]
 
     if not techniciens:
@@ -420,6 +439,7 @@ def get_techniciens_actifs_2d():
 
 
 # Dans stats/views.py - Fonction get_clients_sollicites_ameliore modifiée
+@cache_statistique(sources=('interventions', 'clients'))
 def get_clients_sollicites_ameliore():
     """Graphique 2D amélioré - Clients les plus sollicités avec deux lignes de revenus"""
     clients = Client.objects.annotate(
@@ -540,28 +560,23 @@ def get_clients_sollicites_ameliore():
     return plot(fig, output_type='div', include_plotlyjs=False)
 
 
+@cache_statistique()
 def get_evolution_financiere_ameliore():
     """Graphique 2D amélioré - Évolution financière avec tendance"""
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=365)
-
-    finances = Intervention.objects.filter(
-        date_intervention__gte=start_date,
+    finances = MonthlyInterventionStat.objects.filter(
+        month__gte=get_debut_periode(365),
         statut='terminee'
-    ).annotate(
-        year=ExtractYear('date_intervention'),
-        month=ExtractMonth('date_intervention')
-    ).values('year', 'month').annotate(
-        total=Sum('prix_intervention'),
-        count=Count('id')
-    ).order_by('year', 'month')
+    ).values('month').annotate(
+        total=Sum('total_revenue'),
+        count=Sum('intervention_count')
+    ).order_by('month')
 
     months = []
     totals = []
     counts = []
 
     for f in finances:
-        month_name = f"{f['month']:02d}/{f['year']}"
+        month_name = f"{f['month'].month:02d}/{f['month'].year}"
         months.append(month_name)
         totals.append(float(f['total'] or 0))
         counts.append(f['count'])
@@ -607,143 +622,102 @@ def get_evolution_financiere_ameliore():
     return plot(fig, output_type='div', include_plotlyjs=False)
 
 
+@cache_statistique()
+def get_durees_par_type():
+    """Graphique 2D - Durée moyenne et médiane des interventions terminées par type (12 derniers mois)"""
+    terminees = Intervention.objects.filter(
+        statut='terminee',
+        date_intervention__gte=timezone.now() - timedelta(days=365)
+    )
 
-def get_repartition_par_installation_par_mois():
-    """Graphique 6 - Répartition des interventions par type d'installation par mois"""
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=180)  # 6 derniers mois
-
-    # Récupérer les interventions groupées par mois et type d'installation
-    interventions = Intervention.objects.filter(
-        date_intervention__gte=start_date
-    ).annotate(
-        month=TruncMonth('date_intervention')
-    ).select_related('client')
-
-    # Structurer les données par mois
-    data_by_month = {}
-
-    for intervention in interventions:
-        month_key = intervention.month.strftime('%Y-%m')
-        month_display = intervention.month.strftime('%b %Y')
-
-        if month_key not in data_by_month:
-            data_by_month[month_key] = {
-                'display': month_display,
-                'counts': {
-                    '3KVA': 0,
-                    '5KVA': 0,
-                    '8KVA': 0,
-                    '16KVA': 0,
-                    '24KVA': 0,
-                    'Autre': 0
-                }
-            }
-
-        # Déterminer le type d'installation
-        type_install = intervention.client.type_installation or 'Autre'
-        normalized_type = 'Autre'
-
-        for kva_type in ['3KVA', '5KVA', '8KVA', '16KVA', '24KVA']:
-            if kva_type in type_install.upper():
-                normalized_type = kva_type
-                break
-
-        data_by_month[month_key]['counts'][normalized_type] += 1
-
-    # Trier les mois
-    sorted_months = sorted(data_by_month.keys())
-    month_labels = [data_by_month[m]['display'] for m in sorted_months]
+    types = []
+    moyennes = []
+    medianes = []
+    survols = []
+
+    for code, libelle in Intervention.TYPE_INTERVENTION_CHOICES:
+        durees = terminees.filter(type_intervention=code).statistiques_durees()
+        if not durees['nombre']:
+            continue
+
+        heures = {cle: durees[cle].total_seconds() / 3600 for cle in ('moyenne', 'mediane', 'minimum', 'maximum')}
+        types.append(libelle)
+        moyennes.append(round(heures['moyenne'], 2))
+        medianes.append(round(heures['mediane'], 2))
+        survols.append(
+            f"{libelle}<br>{durees['nombre']} interventions<br>"
+            f"Min: {heures['minimum']:.1f} h - Max: {heures['maximum']:.1f} h"
+        )
 
-    # Types d'installation
-    installation_types = ['3KVA', '5KVA', '8KVA', '16KVA', '24KVA', 'Autre']
+    if not types:
+        return None
 
-    # Préparer les données pour chaque type
     fig = go.Figure()
 
-    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD']
-
-    for i, inst_type in enumerate(installation_types):
-        values = [data_by_month[m]['counts'][inst_type] for m in sorted_months]
+    fig.add_trace(go.Bar(
+        x=types,
+        y=moyennes,
+        name='Durée moyenne (h)',
+        marker_color='#3498db',
+        hovertext=survols,
+        hoverinfo='text+y'
+    ))
 
-        # Ne montrer que les types qui ont des données
-        if sum(values) > 0:
-            fig.add_trace(go.Bar(
-                name=inst_type,
-                x=month_labels,
-                y=values,
-                marker_color=colors[i],
-                hovertemplate=(
-                    f"<b>{inst_type}</b><br>"
-                    "Mois: %{x}<br>"
-                    "Interventions: %{y}<br>"
-                    "<extra></extra>"
-                )
-            ))
+    fig.add_trace(go.Bar(
+        x=types,
+        y=medianes,
+        name='Durée médiane (h)',
+        marker_color='#f39c12',
+        hovertext=survols,
+        hoverinfo='text+y'
+    ))
 
-    # SOLUTION RADICALE : Utiliser exactement la même configuration que le graphique 1
-    # Copiez toute la partie update_layout du graphique 1
     fig.update_layout(
         title=dict(
-            text='<b>Répartition par type d\'installation par mois</b>',
-            font=dict(size=14),
-        ),
-        xaxis=dict(
-            title='Mois',
-            tickangle=-45,
-            gridcolor='rgba(200,200,200,0.2)',
-            showgrid=True,
-            tickfont=dict(size=10)
-        ),
-        yaxis=dict(
-            title='Nombre d\'interventions',
-            gridcolor='rgba(200,200,200,0.2)',
-            showgrid=True,
-            title_font=dict(size=10)
+            text='<b>Durée des interventions terminées (12 derniers mois)</b>',
+            font=dict(size=14)
         ),
+        barmode='group',
+        xaxis=dict(title='Type d\'intervention'),
+        yaxis=dict(title='Heures', gridcolor='lightgrey'),
         height=400,
-        # Marge TRÈS grande en bas pour forcer l'espace
-        margin=dict(l=50, r=50, b=150, t=80),  # Augmenté à b=150
+        margin=dict(l=50, r=30, b=40, t=40),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
         paper_bgcolor='white',
-        plot_bgcolor='white',
-        hovermode='x unified',
-        barmode='stack',
+        plot_bgcolor='white'
     )
 
     return plot(fig, output_type='div', include_plotlyjs=False)
 
+
 # ==================== FONCTIONS D'EXPORT ====================
 
+@cache_statistique()
 def get_interventions_data():
     """Données brutes pour les interventions par mois"""
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=365)
-
-    interventions = Intervention.objects.filter(
-        date_intervention__gte=start_date
-    ).annotate(
-        year=ExtractYear('date_intervention'),
-        month=ExtractMonth('date_intervention')
-    ).values('year', 'month').annotate(
-        count=Count('id')
-    ).order_by('year', 'month')
+    interventions = MonthlyInterventionStat.objects.filter(
+        month__gte=get_debut_periode(365)
+    ).values('month').annotate(
+        count=Sum('intervention_count')
+    ).order_by('month')
 
     data = []
     for interv in interventions:
         data.append({
-            'year': interv['year'],
-            'month': interv['month'],
+            'year': interv['month'].year,
+            'month': interv['month'].month,
             'count': interv['count']
         })
 
     return data
 
 
+@cache_statistique()
 def get_type_data():
     """Données brutes pour la répartition par type"""
-    repartition = Intervention.objects.values('type_intervention').annotate(
-        count=Count('id')
-    )
+    repartition = MonthlyInterventionStat.objects.values('type_intervention').annotate(
+        count=Sum('intervention_count')
+    ).order_by('type_intervention')
 
     data = []
     for r in repartition:
@@ -755,10 +729,11 @@ def get_type_data():
     return data
 
 
+@cache_statistique(sources=('interventions', 'techniciens'))
 def get_techniciens_data():
     """Données brutes pour les techniciens actifs"""
     techniciens = Technicien.objects.annotate(
-        intervention_count=Count('interventions')
+        intervention_count=Coalesce(Sum('statistiques_mensuelles__intervention_count'), 0)
     ).order_by('-intervention_count')[:10]
 
     data = []
@@ -772,6 +747,7 @@ def get_techniciens_data():
     return data
 
 
+@cache_statistique(sources=('interventions', 'clients'))
 def get_clients_data():
     """Données brutes pour les clients sollicités"""
     clients = Client.objects.annotate(
@@ -791,27 +767,22 @@ def get_clients_data():
     return data
 
 
+@cache_statistique()
 def get_financial_data():
     """Données brutes pour l'évolution financière"""
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=365)
-
-    finances = Intervention.objects.filter(
-        date_intervention__gte=start_date,
+    finances = MonthlyInterventionStat.objects.filter(
+        month__gte=get_debut_periode(365),
         statut='terminee'
-    ).annotate(
-        year=ExtractYear('date_intervention'),
-        month=ExtractMonth('date_intervention')
-    ).values('year', 'month').annotate(
-        total=Sum('prix_intervention'),
-        count=Count('id')
-    ).order_by('year', 'month')
+    ).values('month').annotate(
+        total=Sum('total_revenue'),
+        count=Sum('intervention_count')
+    ).order_by('month')
 
     data = []
     for f in finances:
         data.append({
-            'year': f['year'],
-            'month': f['month'],
+            'year': f['month'].year,
+            'month': f['month'].month,
             'total': float(f['total'] or 0),
             'count': f['count']
         })
@@ -819,29 +790,17 @@ def get_financial_data():
     return data
 
 
+@cache_statistique()
 def get_installation_data():
     """Données brutes pour la répartition par type d'installation"""
-    interventions = Intervention.objects.select_related('client').all()
-
-    counts = {
-        '3KVA': 0,
-        '5KVA': 0,
-        '8KVA': 0,
-        '16KVA': 0,
-        '24KVA': 0,
-        'Autre': 0
-    }
+    repartition = MonthlyInterventionStat.objects.values('kva_bucket').annotate(
+        count=Sum('intervention_count')
+    ).order_by()
 
-    for intervention in interventions:
-        type_install = intervention.client.type_installation or 'Autre'
+    counts = {kva_type: 0 for kva_type in TRANCHES_KVA + [TRANCHE_KVA_AUTRE]}
 
-        normalized_type = 'Autre'
-        for kva_type in ['3KVA', '5KVA', '8KVA', '16KVA', '24KVA']:
-            if kva_type in type_install.upper():
-                normalized_type = kva_type
-                break
-
-        counts[normalized_type] += 1
+    for r in repartition:
+        counts[r['kva_bucket']] = r['count']
 
     data = []
     for kva_type, count in counts.items():
@@ -853,55 +812,36 @@ def get_installation_data():
     return data
 
 
+@cache_statistique()
 def get_repartition_par_installation_par_mois():
     """Graphique 7 - Répartition des interventions par type d'installation par mois"""
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=180)  # 6 derniers mois
-
-    # Récupérer les interventions groupées par mois et type d'installation
-    interventions = Intervention.objects.filter(
-        date_intervention__gte=start_date
-    ).annotate(
-        month=TruncMonth('date_intervention')
-    ).select_related('client')
+    # Agrégats par mois et tranche KVA sur les 6 derniers mois
+    repartition = MonthlyInterventionStat.objects.filter(
+        month__gte=get_debut_periode(180)
+    ).values('month', 'kva_bucket').annotate(
+        count=Sum('intervention_count')
+    ).order_by('month')
 
     # Structurer les données par mois
     data_by_month = {}
 
-    for intervention in interventions:
-        month_key = intervention.month.strftime('%Y-%m')
-        month_display = intervention.month.strftime('%b %Y')
+    for r in repartition:
+        month_key = r['month'].strftime('%Y-%m')
 
         if month_key not in data_by_month:
             data_by_month[month_key] = {
-                'display': month_display,
-                'counts': {
-                    '3KVA': 0,
-                    '5KVA': 0,
-                    '8KVA': 0,
-                    '16KVA': 0,
-                    '24KVA': 0,
-                    'Autre': 0
-                }
+                'display': r['month'].strftime('%b %Y'),
+                'counts': {kva_type: 0 for kva_type in TRANCHES_KVA + [TRANCHE_KVA_AUTRE]}
             }
 
-        # Déterminer le type d'installation
-        type_install = intervention.client.type_installation or 'Autre'
-        normalized_type = 'Autre'
-
-        for kva_type in ['3KVA', '5KVA', '8KVA', '16KVA', '24KVA']:
-            if kva_type in type_install.upper():
-                normalized_type = kva_type
-                break
-
-        data_by_month[month_key]['counts'][normalized_type] += 1
+        data_by_month[month_key]['counts'][r['kva_bucket']] += r['count']
 
     # Trier les mois
     sorted_months = sorted(data_by_month.keys())
     month_labels = [data_by_month[m]['display'] for m in sorted_months]
 
     # Types d'installation
-    installation_types = ['3KVA', '5KVA', '8KVA', '16KVA', '24KVA', 'Autre']
+    installation_types = TRANCHES_KVA + [TRANCHE_KVA_AUTRE]
 
     # Préparer les données pour chaque type
     fig = go.Figure()
@@ -976,6 +916,7 @@ def export_statistics(request):
         return redirect('dashboard')
 
     # Récupérer toutes les données
+    totaux = get_totaux_interventions()
     data = {
         'interventions_par_mois': get_interventions_data(),
         'repartition_type': get_type_data(),
@@ -985,12 +926,10 @@ def export_statistics(request):
         'repartition_installation': get_installation_data(),
         'meta': {
             'date_export': timezone.now().isoformat(),
-            'total_interventions': Intervention.objects.count(),
+            'total_interventions': totaux['total_interventions'],
             'total_clients': Client.objects.count(),
             'total_techniciens': Technicien.objects.count(),
-            'revenu_total': Intervention.objects.filter(statut='terminee').aggregate(
-                total=Sum('prix_intervention')
-            )['total'] or 0,
+            'revenu_total': totaux['revenu_total'],
         }
     }
 
@@ -1003,58 +942,84 @@ def export_statistics(request):
 
 @login_required
 def export_excel(request):
-    """Export des statistiques en Excel"""
+    """
+    Export des statistiques en Excel, construit en mémoire (aucun fichier partagé sur disque).
+    Avec ?details=1, ajoute une feuille avec toutes les interventions, lues par lots.
+    """
     if hasattr(request.user, 'technicien'):
         return redirect('dashboard')
 
-    # Créer un DataFrame pandas avec toutes les données
-    import pandas as pd
+    import xlsxwriter
     from django.http import HttpResponse
 
-    # Créer un writer Excel
-    output = pd.ExcelWriter('statistiques_solar.xlsx', engine='xlsxwriter')
-
-    # Feuille 1: Interventions par mois
-    df_interventions = pd.DataFrame(get_interventions_data())
-    if not df_interventions.empty:
-        df_interventions.to_excel(output, sheet_name='Interventions par mois', index=False)
-
-    # Feuille 2: Répartition par type
-    df_type = pd.DataFrame(get_type_data())
-    if not df_type.empty:
-        df_type.to_excel(output, sheet_name='Répartition par type', index=False)
+    output = BytesIO()
 
-    # Feuille 3: Techniciens actifs
-    df_techniciens = pd.DataFrame(get_techniciens_data())
-    if not df_techniciens.empty:
-        df_techniciens.to_excel(output, sheet_name='Techniciens actifs', index=False)
+    # constant_memory : chaque ligne est écrite puis libérée, la mémoire ne dépend pas du nombre de lignes
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#f8f9fa', 'border': 1})
 
-    # Feuille 4: Clients sollicités
-    df_clients = pd.DataFrame(get_clients_data())
-    if not df_clients.empty:
-        df_clients.to_excel(output, sheet_name='Clients sollicités', index=False)
-
-    # Feuille 5: Évolution financière
-    df_finances = pd.DataFrame(get_financial_data())
-    if not df_finances.empty:
-        df_finances.to_excel(output, sheet_name='Évolution financière', index=False)
+    feuilles = [
+        ('Interventions par mois', get_interventions_data()),
+        ('Répartition par type', get_type_data()),
+        ('Techniciens actifs', get_techniciens_data()),
+        ('Clients sollicités', get_clients_data()),
+        ('Évolution financière', get_financial_data()),
+        ('Répartition installation', get_installation_data()),
+    ]
 
-    # Feuille 6: Répartition par installation
-    df_installation = pd.DataFrame(get_installation_data())
-    if not df_installation.empty:
-        df_installation.to_excel(output, sheet_name='Répartition installation', index=False)
+    for sheet_name, lignes in feuilles:
+        if lignes:
+            ecrire_feuille_excel(workbook, sheet_name, list(lignes[0].keys()),
+                                 (list(ligne.values()) for ligne in lignes), header_format)
 
-    output.close()
+    if request.GET.get('details'):
+        ecrire_feuille_excel(workbook, 'Interventions', COLONNES_EXPORT_INTERVENTIONS,
+                             iter_interventions_export(), header_format)
 
-    # Lire le fichier Excel généré
-    with open('statistiques_solar.xlsx', 'rb') as f:
-        excel_data = f.read()
+    workbook.close()
 
     # Créer la réponse HTTP
     response = HttpResponse(
-        excel_data,
+        output.getvalue(),
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
     response['Content-Disposition'] = f'attachment; filename="statistiques_solar_{timezone.now().date()}.xlsx"'
 
-    return response
\ No newline at end of file
+    return response
+
+
+COLONNES_EXPORT_INTERVENTIONS = [
+    'id', 'date_intervention', 'type_intervention', 'statut', 'client', 'type_installation',
+    'kva', 'technicien', 'prix_intervention'
+]
+
+
+def iter_interventions_export(chunk_size=2000):
+    """Lignes brutes des interventions, lues par lots pour borner la mémoire"""
+    interventions = Intervention.objects.order_by('date_intervention', 'id').values_list(
+        'id', 'date_intervention', 'type_intervention', 'statut', 'client__nom',
+        'client__type_installation', 'client__kva', 'technicien__nom', 'prix_intervention'
+    )
+
+    for ligne in interventions.iterator(chunk_size=chunk_size):
+        ligne = list(ligne)
+        # Excel ne gère pas les fuseaux horaires
+        ligne[1] = timezone.localtime(ligne[1]).replace(tzinfo=None)
+        ligne[8] = float(ligne[8] or 0)
+        yield ligne
+
+
+def ecrire_feuille_excel(workbook, sheet_name, colonnes, lignes, header_format):
+    """Écrit une feuille ligne par ligne (compatible avec le mode constant_memory)"""
+    worksheet = workbook.add_worksheet(sheet_name)
+    date_format = workbook.add_format({'num_format': 'dd/mm/yyyy hh:mm'})
+
+    worksheet.write_row(0, 0, colonnes, header_format)
+    worksheet.set_column(0, len(colonnes) - 1, 18)
+
+    for row, ligne in enumerate(lignes, start=1):
+        for col, valeur in enumerate(ligne):
+            if isinstance(valeur, datetime):
+                worksheet.write_datetime(row, col, valeur, date_format)
+            else:
+                worksheet.write(row, col, valeur)
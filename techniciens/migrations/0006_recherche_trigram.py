@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:30
+
+from django.db import migrations
+
+
+# Index GIN pg_trgm sur UPPER(colonne), l'expression générée par icontains (PostgreSQL uniquement)
+INDEX_TRIGRAM = [
+    ('techniciens_technicien', 'nom'),
+    ('techniciens_technicien', 'email'),
+    ('techniciens_technicien', 'telephone'),
+]
+
+
+def creer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, colonne in INDEX_TRIGRAM:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_{colonne}_trgm" '
+            f'ON "{table}" USING gin (UPPER("{colonne}"::text) gin_trgm_ops)'
+        )
+
+
+def supprimer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, colonne in INDEX_TRIGRAM:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_{colonne}_trgm"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('techniciens', '0005_alter_technicien_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
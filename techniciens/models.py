@@ -1,5 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import User
+from core.search import rechercher
+
+
+class TechnicienQuerySet(models.QuerySet):
+
+    # Champs parcourus par la recherche de la liste des techniciens
+    CHAMPS_RECHERCHE = ('nom', 'email', 'telephone', 'user__username')
+
+    def rechercher(self, terme):
+        """Recherche textuelle (index trigram et tri par pertinence sur PostgreSQL)"""
+        return rechercher(self, terme, self.CHAMPS_RECHERCHE)
 
 
 class Technicien(models.Model):
@@ -19,6 +30,10 @@ class Technicien(models.Model):
         null=True,
         default='techniciens_photos/default.jpg'
     )
+    # Invalide le cache HTTP du calendrier quand le nom du technicien change
+    date_modification = models.DateTimeField(auto_now=True)
+
+    objects = TechnicienQuerySet.as_manager()
 
     def __str__(self):
         return self.nom
@@ -1,3 +1,57 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import creer_technicien
+
+from .models import Technicien
+
+
+class TechnicienRechercheTests(TestCase):
+
+    def setUp(self):
+        self.sall = creer_technicien(1, nom='Moussa Sall')
+        self.fall = creer_technicien(2, nom='Awa Fall', user=User.objects.create_user('awa.sall', 'awa@test.sn', 'x'))
+
+    def test_recherche_par_nom_et_identifiant(self):
+        self.assertEqual(set(Technicien.objects.rechercher('SALL')), {self.sall, self.fall})
+        self.assertEqual(list(Technicien.objects.rechercher('technicien1@')), [self.sall])
+
+    def test_terme_vide(self):
+        self.assertEqual(Technicien.objects.rechercher('').count(), 2)
+
+
+class TechnicienListeTests(TestCase):
+
+    def setUp(self):
+        for i in range(25):
+            creer_technicien(i, telephone=f'7800000{i:02d}')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.sn', 'x'))
+
+    def page(self, parametres=''):
+        reponse = self.client.get(f"{reverse('technicien_list')}?{parametres}")
+        self.assertEqual(reponse.status_code, 200)
+        return reponse
+
+    def test_parcours_des_pages(self):
+        """Chaque technicien apparaît une seule fois, du plus récent au plus ancien"""
+        vus, parametres, numeros = [], '', []
+        while True:
+            reponse = self.page(parametres)
+            page = reponse.context['techniciens']
+            vus.extend(technicien.pk for technicien in page)
+            numeros.append(page.number)
+            if not page.has_next():
+                break
+            parametres = page.parametres_suivant
+
+        self.assertEqual(vus, list(Technicien.objects.order_by('-id').values_list('pk', flat=True)))
+        self.assertEqual((numeros, reponse.context['nombre_pages']), ([1, 2, 3], 3))
+
+    def test_lien_vers_la_derniere_page(self):
+        premiere = self.page()
+        derniere = self.page(premiere.context['techniciens'].parametres_dernier)
+
+        self.assertEqual(derniere.context['techniciens'].number, 3)
+        self.assertEqual(len(derniere.context['techniciens']), 5)
+        self.assertContains(premiere, f'href="?{premiere.context["techniciens"].parametres_dernier}"')
@@ -1,8 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
+from core.pagination import PaginationCurseur
 from .models import Technicien
 from .forms import TechnicienForm, TechnicienSearchForm
 
@@ -25,23 +24,20 @@ def technicien_list(request):
     if search_form.is_valid():
         search_query = search_form.cleaned_data.get('search')
         if search_query:
-            techniciens = techniciens.filter(
-                Q(nom__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(telephone__icontains=search_query) |
-                Q(user__username__icontains=search_query)
-            )
-
-    # Pagination
-    paginator = Paginator(techniciens, 10)  # 10 techniciens par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+            techniciens = techniciens.rechercher(search_query)
+
+    # Pagination par curseur : 10 techniciens par page, sans OFFSET
+    paginator = PaginationCurseur(techniciens, 10)
+    page_obj = paginator.page(request.GET)
+    total_techniciens, total_estime = paginator.compte_estime()
 
     context = {
         'page_title': 'Gestion des Techniciens',
         'techniciens': page_obj,
         'search_form': search_form,
-        'total_techniciens': techniciens.count(),
+        'total_techniciens': total_techniciens,
+        'total_estime': total_estime,
+        'nombre_pages': paginator.nombre_pages(),
     }
 
     return render(request, 'techniciens/technicien_list.html', context)
@@ -61,22 +57,18 @@ def technicien_detail(request, pk):
     # Récupérer les interventions de ce technicien
     interventions = technicien.interventions.all().select_related('client').order_by('-date_intervention')
 
-    # Statistiques des interventions
-    interventions_total = interventions.count()
-    interventions_en_cours = interventions.filter(statut='en_cours').count()
-    interventions_terminees = interventions.filter(statut='terminee').count()
-    interventions_annulees = interventions.filter(statut='annulee').count()
-    interventions_prevues = interventions.filter(statut='prevue').count()
+    # Statistiques des interventions (une seule requête)
+    compteurs = interventions.compteurs()
 
     context = {
         'page_title': f'Détails Technicien - {technicien.nom}',
         'technicien': technicien,
         'interventions': interventions[:10],  # 10 dernières
-        'interventions_total': interventions_total,
-        'interventions_en_cours': interventions_en_cours,
-        'interventions_terminees': interventions_terminees,
-        'interventions_annulees': interventions_annulees,
-        'interventions_prevues': interventions_prevues,
+        'interventions_total': compteurs['total'],
+        'interventions_en_cours': compteurs['en_cours'],
+        'interventions_terminees': compteurs['terminee'],
+        'interventions_annulees': compteurs['annulee'],
+        'interventions_prevues': compteurs['prevue'],
     }
 
     return render(request, 'techniciens/technicien_detail.html', context)
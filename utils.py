@@ -44,6 +44,23 @@ def valider_kva(type_installation):
     return True, f"KVA valide détecté: {kva}KVA"
 
 
+# Tranches de puissance suivies dans les statistiques
+PUISSANCES_KVA_SUIVIES = [3, 5, 8, 16, 24]
+TRANCHES_KVA = [f"{kva}KVA" for kva in PUISSANCES_KVA_SUIVIES]
+TRANCHE_KVA_AUTRE = 'Autre'
+
+
+def determiner_tranche_kva(kva):
+    """
+    Retourne la tranche statistique correspondant à un KVA.
+    Seules les puissances standard ont leur propre tranche, le reste va dans 'Autre'.
+    """
+    if kva in PUISSANCES_KVA_SUIVIES:
+        return f"{kva}KVA"
+
+    return TRANCHE_KVA_AUTRE
+
+
 def calculer_prix_par_kva_et_type(kva, type_intervention):
     """
     Calcule le prix d'intervention en fonction du KVA et du type d'intervention.